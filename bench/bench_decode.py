@@ -0,0 +1,93 @@
+# /predict 이미지 디코딩(load_image)의 이전 방식과 현재 방식을 비교한다
+#  - legacy: split(",") → base64.b64decode → Image.open → convert("L")
+#  - current: utils.image_processing.load_image (헤더/시그니처 확인, 데이터 부분 직접 디코딩,
+#    큰 입력 축소)
+# 입력은 프론트 캔버스와 같은 투명 배경 RGBA PNG (280, 560, 1120 px)와 1120 px JPEG
+# 실행: python bench/bench_decode.py [반복 횟수]
+import base64
+import io
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from utils.image_processing import load_image  # noqa: E402
+
+
+def legacy_load_image(image_base64: str) -> Image.Image:
+    header, encoded = image_base64.split(",", 1)
+    image_bytes = base64.b64decode(encoded)
+    return Image.open(io.BytesIO(image_bytes)).convert("L")
+
+
+# 캔버스에 펜으로 그린 것 같은 획 몇 개 (크기에 비례한 굵기)
+def canvas_data_url(size: int, image_format: str = "PNG", seed: int = 0) -> str:
+    rng = random.Random(seed)
+    mode = "RGBA" if image_format == "PNG" else "RGB"
+    background = (0, 0, 0, 0) if mode == "RGBA" else (255, 255, 255)
+    image = Image.new(mode, (size, size), background)
+    draw = ImageDraw.Draw(image)
+    scale = size / 280
+    points = [
+        (rng.uniform(60, 220) * scale, rng.uniform(40, 240) * scale) for _ in range(5)
+    ]
+    draw.line(points, fill=(0, 0, 0, 255)[: len(mode)], width=int(15 * scale))
+
+    buf = io.BytesIO()
+    image.save(buf, format=image_format)
+    mime = "image/png" if image_format == "PNG" else "image/jpeg"
+    return f"data:{mime};base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+def measure(fn, data_url: str, iterations: int):
+    for _ in range(10):
+        fn(data_url)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(data_url)
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(data_url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return np.percentile(np.array(latencies) * 1e6, 50), peak / 1024
+
+
+def run(iterations: int):
+    inputs = {
+        "png 280": canvas_data_url(280),
+        "png 560": canvas_data_url(560),
+        "png 1120": canvas_data_url(1120),
+        "jpeg 1120": canvas_data_url(1120, "JPEG"),
+    }
+    print(
+        f"{'input':<10} {'KB':>6} {'legacy p50(us)':>15} {'p50(us)':>9} "
+        f"{'legacy peak(KB)':>16} {'peak(KB)':>9} {'size':>9}"
+    )
+    for name, data_url in inputs.items():
+        legacy_us, legacy_peak = measure(legacy_load_image, data_url, iterations)
+        current_us, current_peak = measure(load_image, data_url, iterations)
+        size = "x".join(str(dim) for dim in load_image(data_url).size)
+        print(
+            f"{name:<10} {len(data_url) / 1024:>6.1f} {legacy_us:>15.1f} "
+            f"{current_us:>9.1f} {legacy_peak:>16.1f} {current_peak:>9.1f} {size:>9}"
+        )
+
+    # 캔버스 크기 입력은 이전과 같은 이미지를 돌려줘야 한다
+    data_url = inputs["png 280"]
+    same = np.array_equal(
+        np.asarray(legacy_load_image(data_url)), np.asarray(load_image(data_url))
+    )
+    print(f"\npng 280 결과 동일: {same}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
@@ -0,0 +1,121 @@
+# 요청당 메트릭 기록 비용을 비교한다
+#  - none: 계측 없음
+#  - legacy: starlette_exporter 미들웨어 + 핸들러마다 labels() 조회 후 기록 (이전 방식)
+#  - route: utils.metrics.instrumented_route (라벨을 미리 묶어 둔 라우트 클래스)
+# 실행: python bench/bench_instrumentation.py [요청 수]
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import APIRouter, FastAPI, Request
+from prometheus_client import Counter, Histogram
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from utils.metrics import ApiMetrics, _EndpointMetrics, instrumented_route  # noqa: E402
+
+LEGACY_COUNT = Counter(
+    "bench_legacy_requests_total", "bench", ["endpoint", "method", "status"]
+)
+LEGACY_LATENCY = Histogram(
+    "bench_legacy_request_duration_seconds", "bench", ["endpoint", "method"]
+)
+ROUTE_METRICS = ApiMetrics("bench_route", "bench")
+
+
+def _plain_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def _legacy_app() -> FastAPI:
+    app = FastAPI()
+    try:
+        from starlette_exporter import PrometheusMiddleware
+
+        app.add_middleware(PrometheusMiddleware, app_name="bench", prefix="bench_")
+    except ImportError:
+        print("(starlette_exporter 미설치: legacy는 핸들러 계측만 포함)")
+
+    @app.get("/ping")
+    async def ping(request: Request):
+        endpoint = "ping"
+        method = request.method
+        start_time = time.monotonic()
+        status = "200"
+        try:
+            return {"ok": True}
+        finally:
+            LEGACY_LATENCY.labels(endpoint=endpoint, method=method).observe(
+                time.monotonic() - start_time
+            )
+            LEGACY_COUNT.labels(endpoint=endpoint, method=method, status=status).inc()
+
+    return app
+
+
+def _route_app() -> FastAPI:
+    app = FastAPI()
+    router = APIRouter(route_class=instrumented_route(ROUTE_METRICS))
+
+    @router.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.include_router(router)
+    return app
+
+
+async def _per_request_us(app: FastAPI, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        for _ in range(200):
+            await c.get("/ping")
+        start = time.perf_counter()
+        for _ in range(requests):
+            await c.get("/ping")
+        return (time.perf_counter() - start) / requests * 1e6
+
+
+# 기록 자체의 비용 (HTTP 처리 제외)
+def _record_ns(iterations: int):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        LEGACY_LATENCY.labels(endpoint="ping", method="GET").observe(0.001)
+        LEGACY_COUNT.labels(endpoint="ping", method="GET", status="200").inc()
+    legacy = (time.perf_counter() - start) / iterations * 1e9
+
+    bound = _EndpointMetrics(ROUTE_METRICS, "ping")
+    start = time.perf_counter()
+    for _ in range(iterations):
+        bound.record("GET", 200, 0.001)
+    route = (time.perf_counter() - start) / iterations * 1e9
+    return legacy, route
+
+
+async def run(requests: int):
+    apps = {"none": _plain_app(), "legacy": _legacy_app(), "route": _route_app()}
+    # 변형을 번갈아 여러 번 돌려 가장 빠른 값을 사용 (잡음 제거)
+    results = {name: float("inf") for name in apps}
+    for _ in range(5):
+        for name, app in apps.items():
+            us = await _per_request_us(app, requests)
+            results[name] = min(results[name], us)
+
+    print(f"{'variant':<8} {'us/request':>11} {'overhead(us)':>13}")
+    for name, us in results.items():
+        print(f"{name:<8} {us:>11.1f} {us - results['none']:>13.1f}")
+
+    legacy, route = _record_ns(requests * 10)
+    print(f"\nrecord only: legacy {legacy:.0f} ns, route {route:.0f} ns")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
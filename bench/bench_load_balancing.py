@@ -0,0 +1,110 @@
+# 지연 시간이 서로 다른 스텁 레플리카 여러 대에 대해 로드 밸런싱 정책별 분산/지연을 비교한다
+# 실행: python bench/bench_load_balancing.py [요청 수]
+import asyncio
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from stub_ml_server import FAULTS, app  # noqa: E402
+
+from utils.ml_backends import Backend, BackendPool  # noqa: E402
+from utils.payload_codec import get_codec  # noqa: E402
+from utils.resilient_client import CircuitBreaker, ResilientClient  # noqa: E402
+
+# 호스트별 추가 지연(ms). replica-3은 다른 레플리카보다 느리다
+REPLICAS = {"replica-1": 5, "replica-2": 5, "replica-3": 40}
+
+
+# 호스트별로 지연을 더하고, down으로 표시된 호스트는 연결 실패를 흉내 낸다
+class ReplicaTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+        self.down = set()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if host in self.down:
+            raise httpx.ConnectError("replica down", request=request)
+        await asyncio.sleep(REPLICAS[host] / 1000)
+        return await self.transport.handle_async_request(request)
+
+
+def _client(http_client, policy: str) -> ResilientClient:
+    backends = [
+        Backend(f"http://{host}", CircuitBreaker(host, reset_timeout=0.5))
+        for host in REPLICAS
+    ]
+    pool = BackendPool(
+        backends,
+        policy=policy,
+        health_interval=0.05,
+        unhealthy_threshold=2,
+        healthy_threshold=1,
+    )
+    return ResilientClient(http_client, pool)
+
+
+async def _phase(name, client, requests, concurrency=16, route_key=None, **kwargs):
+    semaphore = asyncio.Semaphore(concurrency)
+    used = Counter()
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(
+                "/invocations",
+                endpoint="invocations",
+                idempotent=True,
+                route_key=route_key,
+                **kwargs,
+            )
+            used[response.request.url.host] += 1
+            return time.perf_counter() - start
+
+    latencies = np.array(await asyncio.gather(*(one() for _ in range(requests))))
+    latencies *= 1000
+    print(
+        f"{name:<28} p50={np.percentile(latencies, 50):6.1f}ms "
+        f"p99={np.percentile(latencies, 99):6.1f}ms "
+        f"backends={dict(sorted(used.items()))}"
+    )
+
+
+async def run(requests: int):
+    FAULTS.update(latency_ms=2, error_rate=0, slow_rate=0)
+    body, headers = get_codec().encode(np.zeros((1, 1, 28, 28), dtype=np.float32))
+    transport = ReplicaTransport(httpx.ASGITransport(app=app))
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        for policy in BackendPool.POLICIES:
+            client = _client(http_client, policy)
+            await client.start()
+            try:
+                kwargs = {"content": body, "headers": headers}
+                await _phase(f"{policy}", client, requests, **kwargs)
+                await _phase(
+                    f"{policy} sticky(model/1)",
+                    client,
+                    requests,
+                    route_key="HybridCNN/1",
+                    **kwargs,
+                )
+
+                # replica-1 장애: 헬스 체크가 제외하고, 복구되면 다시 포함한다
+                transport.down.add("replica-1")
+                await asyncio.sleep(0.2)
+                await _phase(f"{policy} replica-1 down", client, requests, **kwargs)
+                transport.down.clear()
+                await asyncio.sleep(0.6)
+                await _phase(f"{policy} replica-1 back", client, requests, **kwargs)
+            finally:
+                await client.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 600))
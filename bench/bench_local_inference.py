@@ -0,0 +1,144 @@
+# 로컬 ONNX 추론과 원격 /invocations 호출(스텁 서버, 실제 HTTP)의 지연 시간을 비교한다
+# 실행: python bench/bench_local_inference.py [모델 경로(.onnx)] [반복 횟수]
+# 모델 경로를 주지 않으면 HybridCNN과 입출력 모양이 같은 작은 CNN을 만들어 사용한다
+# (onnx, onnxruntime, uvicorn 필요)
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+
+from routers.captcha import invoke_hybrid_cnn  # noqa: E402
+from utils.local_inference import InferenceEngine, load_local_model  # noqa: E402
+from utils.ml_backends import Backend, BackendPool  # noqa: E402
+from utils.resilient_client import CircuitBreaker, ResilientClient  # noqa: E402
+
+
+# Conv(1→8, 3x3) → ReLU → MaxPool(2) → Flatten → Gemm(1352→10), 배치 축은 동적
+def build_test_model(path: str):
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(0)
+    weights = [
+        numpy_helper.from_array(
+            rng.standard_normal((8, 1, 3, 3)).astype(np.float32), "conv_w"
+        ),
+        numpy_helper.from_array(np.zeros(8, dtype=np.float32), "conv_b"),
+        numpy_helper.from_array(
+            rng.standard_normal((1352, 10)).astype(np.float32) * 0.01, "fc_w"
+        ),
+        numpy_helper.from_array(np.zeros(10, dtype=np.float32), "fc_b"),
+    ]
+    nodes = [
+        helper.make_node("Conv", ["input", "conv_w", "conv_b"], ["conv"]),
+        helper.make_node("Relu", ["conv"], ["relu"]),
+        helper.make_node(
+            "MaxPool", ["relu"], ["pool"], kernel_shape=[2, 2], strides=[2, 2]
+        ),
+        helper.make_node("Flatten", ["pool"], ["flat"]),
+        helper.make_node("Gemm", ["flat", "fc_w", "fc_b"], ["logits"]),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        "hybrid_cnn_test",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["N", 1, 28, 28])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["N", 10])],
+        initializer=weights,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, path)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_stub(port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "stub_ml_server:app",
+            "--app-dir",
+            str(BENCH_DIR),
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ]
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/ping").raise_for_status()
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("스텁 서버가 시작되지 않았습니다.")
+
+
+async def _measure(send, batch: np.ndarray, iterations: int) -> np.ndarray:
+    for _ in range(10):
+        await send(batch)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await send(batch)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1e6
+
+
+async def run(model_path: str, iterations: int):
+    rng = np.random.default_rng(0)
+    engine = InferenceEngine(load_local_model(model_path, intra_op_threads=1))
+
+    port = _free_port()
+    stub = _start_stub(port)
+    try:
+        async with httpx.AsyncClient() as http_client:
+            backends = [Backend(f"http://127.0.0.1:{port}", CircuitBreaker("stub"))]
+            ml_client = ResilientClient(
+                http_client, BackendPool(backends, health_interval=0)
+            )
+            remote = partial(invoke_hybrid_cnn, ml_client)
+
+            print(f"{'path':<7} {'batch':>5} {'p50(us)':>9} {'p99(us)':>9}")
+            for batch_size in (1, 16):
+                batch = rng.standard_normal((batch_size, 1, 28, 28)).astype(np.float32)
+                for name, send in (("local", engine), ("remote", remote)):
+                    latencies = await _measure(send, batch, iterations)
+                    print(
+                        f"{name:<7} {batch_size:>5} "
+                        f"{np.percentile(latencies, 50):>9.1f} "
+                        f"{np.percentile(latencies, 99):>9.1f}"
+                    )
+    finally:
+        stub.terminate()
+        stub.wait()
+        engine.shutdown()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    model_path = args.pop(0) if args and args[0].endswith(".onnx") else None
+    iterations = int(args[0]) if args else 500
+    with tempfile.TemporaryDirectory() as tmp:
+        if model_path is None:
+            model_path = os.path.join(tmp, "hybrid_cnn_test.onnx")
+            build_test_model(model_path)
+        asyncio.run(run(model_path, iterations))
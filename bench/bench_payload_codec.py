@@ -0,0 +1,45 @@
+# 페이로드 코덱별 직렬화 크기/시간과 스텁 서버 왕복 지연을 비교한다
+# 실행: python bench/bench_payload_codec.py [반복 횟수]
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from stub_ml_server import app  # noqa: E402
+
+from utils.payload_codec import CODECS  # noqa: E402
+
+
+async def run(iterations: int):
+    rng = np.random.default_rng(0)
+    # decode_image가 돌려주는 1x1x28x28 정규화 텐서와 같은 모양
+    tensor = ((rng.random((1, 1, 28, 28)) - 0.1307) / 0.3081).astype(np.float32)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://stub") as client:
+        print(f"{'codec':<6} {'bytes':>8} {'encode(us)':>11} {'roundtrip(us)':>14}")
+        for name, codec in CODECS.items():
+            start = time.perf_counter()
+            for _ in range(iterations):
+                body, headers = codec.encode(tensor)
+            encode_us = (time.perf_counter() - start) / iterations * 1e6
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                body, headers = codec.encode(tensor)
+                response = await client.post(
+                    "/invocations", content=body, headers=headers
+                )
+                response.raise_for_status()
+            roundtrip_us = (time.perf_counter() - start) / iterations * 1e6
+
+            print(f"{name:<6} {len(body):>8} {encode_us:>11.1f} {roundtrip_us:>14.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -0,0 +1,91 @@
+# 장애를 주입한 스텁 서버에 ResilientClient를 붙여 헤지/적응형 제한 시간/서킷 브레이커 동작을 확인한다
+# 실행: python bench/bench_resilience.py [요청 수]
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from stub_ml_server import FAULTS, app  # noqa: E402
+
+from utils.ml_backends import Backend, BackendPool  # noqa: E402
+from utils.payload_codec import get_codec  # noqa: E402
+from utils.resilient_client import (  # noqa: E402
+    CircuitBreaker,
+    ResilientClient,
+    UpstreamUnavailableError,
+)
+
+
+async def _call(client: ResilientClient, body: bytes, headers: dict):
+    start = time.perf_counter()
+    try:
+        response = await client.post(
+            "/invocations",
+            endpoint="invocations",
+            idempotent=True,
+            content=body,
+            headers=headers,
+        )
+        result = str(response.status_code)
+    except UpstreamUnavailableError as e:
+        result = type(e).__name__
+    return result, time.perf_counter() - start
+
+
+async def _phase(name, client, body, headers, requests: int, concurrency: int = 8):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            return await _call(client, body, headers)
+
+    results = await asyncio.gather(*(one() for _ in range(requests)))
+    latencies = np.array([seconds for _, seconds in results]) * 1000
+    counts = {}
+    for result, _ in results:
+        counts[result] = counts.get(result, 0) + 1
+    tracker = client.tracker("invocations")
+    print(
+        f"{name:<10} p50={np.percentile(latencies, 50):7.1f}ms "
+        f"p99={np.percentile(latencies, 99):7.1f}ms "
+        f"max={latencies.max():7.1f}ms deadline={tracker.deadline() * 1000:7.1f}ms "
+        f"results={counts}"
+    )
+
+
+async def run(requests: int):
+    body, headers = get_codec().encode(np.zeros((1, 1, 28, 28), dtype=np.float32))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        for hedge in (False, True):
+            print(f"--- hedge={hedge}")
+            breaker = CircuitBreaker("stub", failure_threshold=5, reset_timeout=0.5)
+            client = ResilientClient(
+                http_client,
+                BackendPool([Backend("http://stub", breaker)], health_interval=0),
+                hedge=hedge,
+                tracker_options={"max_deadline": 2.0},
+            )
+
+            # 1) 정상 + 5% 느린 꼬리(300ms): 헤지가 꼬리를 잘라내는지 확인
+            FAULTS.update(latency_ms=5, error_rate=0, slow_rate=0.05, slow_ms=300)
+            await _phase("slow-tail", client, body, headers, requests)
+
+            # 2) 업스트림 장애: 서킷이 열리면 호출 없이 바로 실패
+            FAULTS.update(error_rate=1.0, slow_rate=0)
+            await _phase("outage", client, body, headers, requests)
+
+            # 3) 복구: reset_timeout 이후 시험 요청 하나가 성공하면 다시 닫힌다
+            FAULTS.update(error_rate=0)
+            await asyncio.sleep(0.6)
+            await _phase("probe", client, body, headers, 1)
+            await _phase("recovered", client, body, headers, requests)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 400))
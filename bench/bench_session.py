@@ -0,0 +1,110 @@
+# 세션 미들웨어가 캡차와 무관한 엔드포인트에 더하는 비용과 /check 검증 비용을 비교한다
+#  - session: 모든 요청에 SessionMiddleware (이전 방식, 통과한 세션 쿠키를 가진 클라이언트)
+#  - scoped: 미들웨어 없음, 캡차 라우트에서만 통과 토큰 쿠키를 확인 (현재 방식)
+# 실행: python bench/bench_session.py [요청 수]
+# 이전 방식 측정에는 itsdangerous가 필요하다 (앱 의존성이 아니므로 없으면 현재 방식만 측정)
+import asyncio
+import base64
+import json
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from utils.pass_token import PASS_COOKIE, PassTokenSigner  # noqa: E402
+
+SECRET = "bench-secret"
+
+
+def _app(with_session: bool) -> FastAPI:
+    app = FastAPI()
+    if with_session:
+        from starlette.middleware.sessions import SessionMiddleware
+
+        app.add_middleware(SessionMiddleware, secret_key=SECRET, max_age=3600)
+
+    @app.get("/models/")
+    async def models():
+        return {"models": ["HybridCNN"]}
+
+    return app
+
+
+# SessionMiddleware와 같은 방식으로 {"captcha_passed": True} 세션 쿠키를 만든다
+def _session_cookie() -> str:
+    import itsdangerous
+
+    data = base64.b64encode(json.dumps({"captcha_passed": True}).encode())
+    return itsdangerous.TimestampSigner(SECRET).sign(data).decode()
+
+
+async def _per_request_us(app: FastAPI, cookies: dict, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", cookies=cookies
+    ) as c:
+        for _ in range(200):
+            await c.get("/models/")
+        start = time.perf_counter()
+        for _ in range(requests):
+            await c.get("/models/")
+        return (time.perf_counter() - start) / requests * 1e6
+
+
+def _session_verify_us(iterations: int) -> float:
+    import itsdangerous
+
+    cookie = _session_cookie()
+    signer = itsdangerous.TimestampSigner(SECRET)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        data = signer.unsign(cookie.encode(), max_age=3600)
+        json.loads(base64.b64decode(data)).get("captcha_passed", False)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def _pass_token_verify_us(iterations: int) -> float:
+    pass_tokens = PassTokenSigner(SECRET.encode())
+    token = pass_tokens.issue()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        pass_tokens.verify(token)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def run(requests: int):
+    try:
+        import itsdangerous  # noqa: F401
+
+        with_session = True
+    except ImportError:
+        print("itsdangerous가 없어 이전 방식(session) 측정은 건너뜁니다.")
+        with_session = False
+
+    token = PassTokenSigner(SECRET.encode()).issue()
+    variants = {"scoped": (_app(False), {PASS_COOKIE: token})}
+    if with_session:
+        variants["session"] = (_app(True), {"session": _session_cookie()})
+    results = {name: float("inf") for name in variants}
+    for _ in range(5):
+        for name, (app, cookies) in variants.items():
+            us = await _per_request_us(app, cookies, requests)
+            results[name] = min(results[name], us)
+
+    print(f"{'variant':<8} {'us/request (GET /models/)':>26}")
+    for name, us in results.items():
+        print(f"{name:<8} {us:>26.1f}")
+
+    scoped = _pass_token_verify_us(requests * 10)
+    line = f"\n/check 검증만: pass token {scoped:.2f} us"
+    if with_session:
+        line += f", session {_session_verify_us(requests * 10):.2f} us"
+    print(line)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,124 @@
+# NumPy 전처리 경로가 기존 torchvision 파이프라인과 같은 값을 내는지 확인하고
+# 요청당 전처리 시간을 비교한다 (torchvision이 없으면 NumPy 경로만 측정)
+# 중앙 정렬(center_image/center_batch)도 기존 PIL crop/expand/pad 구현과 비교한다
+# 실행: python bench/compare_preprocess.py [이미지 수]
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageOps
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from utils.image_processing import (  # noqa: E402
+    MNIST_MEAN,
+    MNIST_STD,
+    center_batch,
+    center_image,
+    to_model_input,
+    to_model_input_batch,
+)
+
+
+# 프론트 캔버스와 비슷한 흰 바탕 검은 획 이미지를 만든다
+def synthetic_canvas(rng: np.random.Generator, size: int = 280) -> Image.Image:
+    image = Image.new("L", (size, size), color=255)
+    draw = ImageDraw.Draw(image)
+    points = [tuple(rng.integers(40, size - 40, size=2)) for _ in range(6)]
+    draw.line(points, fill=0, width=int(rng.integers(8, 20)))
+    return image
+
+
+# 이전 center_image 구현 (np.argwhere + PIL crop/expand/pad)
+def legacy_center_image(image: Image.Image, padding: int = 20) -> Image.Image:
+    img_array = np.array(image)
+    if img_array.max() == 0:
+        return image
+    coords = np.argwhere((img_array < 200).astype(np.uint8))
+    if coords.size == 0:
+        return image
+    y0, x0 = coords.min(axis=0)
+    y1, x1 = coords.max(axis=0) + 1
+    cropped = image.crop((x0, y0, x1, y1))
+    padded_image = ImageOps.expand(cropped, border=padding // 2, fill=255)
+    max_dim = max(padded_image.size)
+    return ImageOps.pad(padded_image, (max_dim, max_dim), color=255)
+
+
+def compare_centering(canvases):
+    for image in canvases:
+        expected = np.asarray(legacy_center_image(image))
+        if not np.array_equal(np.asarray(center_image(image)), expected):
+            raise SystemExit("center_image 결과가 이전 구현과 다릅니다.")
+    stacked = np.stack([np.asarray(image) for image in canvases])
+    for image, centered in zip(canvases, center_batch(stacked)):
+        if not np.array_equal(centered, np.asarray(legacy_center_image(image))):
+            raise SystemExit("center_batch 결과가 이전 구현과 다릅니다.")
+
+    legacy_us = timed(legacy_center_image, canvases)
+    single_us = timed(center_image, canvases)
+    out = np.empty((len(canvases), 300, 300), dtype=np.uint8)
+    start = time.perf_counter()
+    center_batch(stacked, out=out)
+    batch_us = (time.perf_counter() - start) / len(canvases) * 1e6
+    print(f"center/legacy{legacy_us:8.1f} us/image")
+    print(f"center       {single_us:8.1f} us/image")
+    print(f"center/batch {batch_us:8.1f} us/image (결과 동일)")
+
+
+def torchvision_reference(image: Image.Image) -> np.ndarray:
+    from torchvision import transforms
+
+    transform = transforms.Compose(
+        [
+            transforms.Resize((28, 28)),
+            transforms.Grayscale(num_output_channels=1),
+            transforms.ToTensor(),
+            transforms.Normalize((MNIST_MEAN,), (MNIST_STD,)),
+        ]
+    )
+    return transform(image).numpy()
+
+
+def timed(fn, images) -> float:
+    start = time.perf_counter()
+    for image in images:
+        fn(image)
+    return (time.perf_counter() - start) / len(images) * 1e6
+
+
+def main(count: int):
+    rng = np.random.default_rng(0)
+    canvases = [synthetic_canvas(rng) for _ in range(count)]
+    compare_centering(canvases)
+    images = [center_image(canvas) for canvas in canvases]
+
+    numpy_us = timed(to_model_input, images)
+    start = time.perf_counter()
+    batch = to_model_input_batch(images)
+    batch_us = (time.perf_counter() - start) / count * 1e6
+    print(f"numpy      {numpy_us:8.1f} us/image")
+    print(f"numpy/batch{batch_us:8.1f} us/image")
+
+    try:
+        import torchvision  # noqa: F401
+    except ImportError:
+        print("torchvision이 없어 기존 파이프라인 비교는 건너뜁니다.")
+        return
+
+    torch_us = timed(torchvision_reference, images)
+    print(f"torchvision{torch_us:8.1f} us/image")
+
+    max_diff = 0.0
+    for i, image in enumerate(images):
+        expected = torchvision_reference(image)
+        max_diff = max(max_diff, float(np.abs(to_model_input(image) - expected).max()))
+        max_diff = max(max_diff, float(np.abs(batch[i] - expected).max()))
+    print(f"max |numpy - torchvision| = {max_diff:g}")
+    if max_diff > 1e-6:
+        raise SystemExit("전처리 결과가 기존 파이프라인과 다릅니다.")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
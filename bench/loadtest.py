@@ -0,0 +1,428 @@
+# 네트워크 없이 앱 전체를 프로세스 안에서 띄워 엔드포인트별 처리량/지연 시간을 측정한다
+#  - 원격 ML 서비스는 stub_ml_server를 ASGI로 직접 연결 (지연/에러 비율 설정 가능)
+#  - /predict 입력은 합성 숫자 이미지 또는 --replay로 준 JSONL 기록을 사용
+#  - decode_image 단계별(decode/center/to_tensor) 지연 시간도 따로 측정
+#  - 시나리오마다 --warmup개 요청을 먼저 보내 버리고, --rounds번 측정해 라운드별 값의 중앙값을 쓴다
+#  - --save로 결과를 저장하고 --baseline으로 이전 결과와 비교 (회귀 시 종료 코드 1)
+#    요청 수/라운드/스텁 지연 등 설정이 기준과 다르면 변화율만 보여주고 판정하지 않는다
+#    라운드 간 변동(상대 표준편차)의 NOISE_SIGMAS배가 --threshold보다 크면 그만큼 허용한다
+#    (MAX_TOLERANCE까지만: 측정이 시끄러워도 두 배 이상 느려진 것은 잡는다)
+#    지연 시간은 기계/부하에 따라 달라지므로 기준 결과는 비교할 기계에서 같은 설정으로 기록한다
+#
+# 실행 예:
+#   python bench/loadtest.py --save bench/results/base.json
+#   python bench/loadtest.py --baseline bench/results/base.json
+#
+# --replay JSONL 한 줄 형식: {"method": "POST", "path": "/predict", "json": {...}}
+#   /predict 요청의 id는 재생 시 새로 발급한 캡차 ID로 바꾼다
+#   method/path가 없는 줄은 건너뛴다
+import argparse
+import asyncio
+import base64
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+STUB_URL = "http://stub-ml"
+
+# 회귀 판정 허용치 = max(--threshold, NOISE_SIGMAS x 라운드 간 상대 표준편차)
+# 단, 노이즈로 넓히는 허용치는 MAX_TOLERANCE를 넘지 않는다
+NOISE_SIGMAS = 3.0
+MAX_TOLERANCE = 1.0
+# 기준 결과와 다르면 비교가 공정하지 않은 설정
+COMPARABLE_CONFIG = (
+    "requests",
+    "concurrency",
+    "rounds",
+    "images",
+    "ml_latency_ms",
+    "ml_error_rate",
+    "ml_slow_rate",
+    "ml_slow_ms",
+)
+
+# 7-세그먼트 좌표 (280x280 캔버스) 와 숫자별 세그먼트
+_SEGMENTS = {
+    "a": ((90, 50), (190, 50)),
+    "b": ((190, 50), (190, 140)),
+    "c": ((190, 140), (190, 230)),
+    "d": ((90, 230), (190, 230)),
+    "e": ((90, 140), (90, 230)),
+    "f": ((90, 50), (90, 140)),
+    "g": ((90, 140), (190, 140)),
+}
+_DIGITS = {
+    0: "abcdef",
+    1: "bc",
+    2: "abged",
+    3: "abgcd",
+    4: "fgbc",
+    5: "afgcd",
+    6: "afgedc",
+    7: "abc",
+    8: "abcdefg",
+    9: "abcdfg",
+}
+
+
+# 캔버스에 손으로 그린 것처럼 위치/굵기를 흔든 숫자 PNG (data URL)
+def synthetic_digit(digit: int, rng: random.Random) -> str:
+    image = Image.new("L", (280, 280), 255)
+    draw = ImageDraw.Draw(image)
+    dx, dy = rng.randint(-40, 40), rng.randint(-30, 30)
+    width = rng.randint(12, 22)
+    for segment in _DIGITS[digit]:
+        (x0, y0), (x1, y1) = _SEGMENTS[segment]
+        jitter = [rng.randint(-6, 6) for _ in range(4)]
+        draw.line(
+            [
+                (x0 + dx + jitter[0], y0 + dy + jitter[1]),
+                (x1 + dx + jitter[2], y1 + dy + jitter[3]),
+            ],
+            fill=0,
+            width=width,
+        )
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+def load_replay(path: str) -> List[dict]:
+    entries = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if "method" in entry and "path" in entry:
+                entries.append(entry)
+    return entries
+
+
+def summarize(latencies: List[float], errors: Dict[str, int], elapsed: float) -> Dict:
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    values = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+    }
+
+
+# 라운드별 요약을 하나로 합친다. 지연 시간/처리량은 중앙값, 변동은 상대 표준편차(*_rsd)
+def combine_rounds(rounds: List[Dict]) -> Dict:
+    errors: Dict[str, int] = {}
+    for summary in rounds:
+        for status, count in summary["errors"].items():
+            errors[status] = errors.get(status, 0) + count
+    combined = {
+        "requests": sum(summary["requests"] for summary in rounds),
+        "errors": errors,
+        "rounds": len(rounds),
+    }
+    measured = [summary for summary in rounds if summary["requests"]]
+    if not measured:
+        return combined
+    for key in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+        values = np.array([summary[key] for summary in measured])
+        combined[key] = float(np.median(values))
+        if key in ("rps", "p95_ms"):
+            mean = values.mean()
+            rsd = values.std(ddof=1) / mean if len(values) > 1 and mean > 0 else 0.0
+            combined[f"{key}_rsd"] = float(rsd)
+    return combined
+
+
+# 요청 생성 함수(응답 상태 코드를 반환)를 concurrency개 태스크로 나눠 total번 실행
+# 400 이상 응답은 상태 코드별로 센다 (429는 전처리 풀 과부하로 거절된 요청)
+async def run_scenario(make_request, total: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            status = await make_request(i)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+# decode_image를 단계별로 나눠 측정 (워커 풀/이벤트 루프 영향 없이 순수 CPU 시간)
+def bench_decode_stages(images: List[str], iterations: int) -> Dict:
+    from utils.image_processing import center_image, load_image, to_model_input
+
+    stages = {"decode": [], "center": [], "to_tensor": []}
+    for i in range(iterations):
+        image_base64 = images[i % len(images)]
+        t0 = time.perf_counter()
+        image = load_image(image_base64)
+        t1 = time.perf_counter()
+        centered = center_image(image, padding=20)
+        t2 = time.perf_counter()
+        to_model_input(centered)
+        t3 = time.perf_counter()
+        stages["decode"].append(t1 - t0)
+        stages["center"].append(t2 - t1)
+        stages["to_tensor"].append(t3 - t2)
+
+    results = {}
+    for name, values in stages.items():
+        summary = summarize(values, {}, sum(values))
+        results[f"decode_image.{name}"] = summary
+    return results
+
+
+async def run(args) -> Dict:
+    import httpx
+    import stub_ml_server
+
+    stub_ml_server.FAULTS.update(
+        latency_ms=args.ml_latency_ms,
+        error_rate=args.ml_error_rate,
+        slow_rate=args.ml_slow_rate,
+        slow_ms=args.ml_slow_ms,
+    )
+
+    import main
+    from utils.http_client import InstrumentedTransport
+
+    # 앱이 만드는 원격 ML 클라이언트를 스텁 서버로 연결
+    main.create_http_client = lambda: httpx.AsyncClient(
+        transport=InstrumentedTransport(httpx.ASGITransport(app=stub_ml_server.app))
+    )
+
+    rng = random.Random(args.seed)
+    images = [synthetic_digit(i % 10, rng) for i in range(args.images)]
+    replay = load_replay(args.replay) if args.replay else []
+    model_inputs = {"inputs": np.zeros((1, 784)).tolist()}
+
+    # /predict 시나리오가 측정 중에 /predict 호출 시간만 따로 모은다
+    predict_latencies: List[float] = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as c:
+
+            async def get(path):
+                response = await c.get(path)
+                return response.status_code
+
+            async def predict(i):
+                captcha = (await c.get("/captcha")).json()
+                payload = {"id": captcha["id"], "image": images[i % len(images)]}
+                start = time.perf_counter()
+                response = await c.post("/predict", json=payload)
+                predict_latencies.append(time.perf_counter() - start)
+                return response.status_code
+
+            async def model_predict(i):
+                response = await c.post(
+                    "/models/predict/HybridCNN/1/", json=model_inputs
+                )
+                return response.status_code
+
+            async def replayed(i):
+                entry = replay[i % len(replay)]
+                payload = entry.get("json")
+                if entry["path"] == "/predict" and payload is not None:
+                    captcha = (await c.get("/captcha")).json()
+                    payload = {**payload, "id": captcha["id"]}
+                response = await c.request(entry["method"], entry["path"], json=payload)
+                return response.status_code
+
+            scenarios = {
+                "GET /captcha": lambda i: get("/captcha"),
+                "POST /predict": predict,
+                "GET /models/": lambda i: get("/models/"),
+                "GET /models/{name}/versions/": lambda i: get(
+                    "/models/HybridCNN/versions/"
+                ),
+                "POST /models/predict/{name}/{version}/": model_predict,
+                # /predict로 쌓인 이미지를 증분 내보내기 (한 번에 최대 100장)
+                "GET /images": lambda i: get("/images?since_seq=0&limit=100"),
+            }
+            if replay:
+                scenarios["replay"] = replayed
+
+            selected = {
+                name: make_request
+                for name, make_request in scenarios.items()
+                if not args.only or args.only in name
+            }
+
+            async def measure(name, make_request, total):
+                nonlocal predict_latencies
+                predict_latencies = []
+                scale = 10 if "images" in name else 1
+                summary = await run_scenario(
+                    make_request, max(1, total // scale), args.concurrency
+                )
+                # /predict는 캡차 발급 시간을 빼고 /predict 호출만 지연 시간으로 집계
+                if predict_latencies:
+                    values = np.array(predict_latencies) * 1000
+                    for q in (50, 95, 99):
+                        summary[f"p{q}_ms"] = float(np.percentile(values, q))
+                return summary
+
+            # 커넥션/캐시/지연 import가 데워지도록 먼저 보내고 결과는 버린다
+            if args.warmup > 0:
+                for name, make_request in selected.items():
+                    await measure(name, make_request, args.warmup)
+                bench_decode_stages(images, args.warmup)
+
+            # 라운드를 바깥 루프로 돌려 실행 중 기계 속도 변화가 한 시나리오에
+            # 몰리지 않고 모든 시나리오의 라운드 간 변동(*_rsd)에 드러나게 한다
+            rounds: Dict[str, List[Dict]] = {}
+            for _ in range(args.rounds):
+                for name, make_request in selected.items():
+                    summary = await measure(name, make_request, args.requests)
+                    rounds.setdefault(name, []).append(summary)
+                for name, summary in bench_decode_stages(images, args.requests).items():
+                    rounds.setdefault(name, []).append(summary)
+
+    results = {name: combine_rounds(summaries) for name, summaries in rounds.items()}
+    return results
+
+
+def print_results(results: Dict, baseline: Optional[Dict], threshold: float) -> bool:
+    regressed = False
+    print(
+        f"{'scenario':<40} {'rps':>8} {'p50(ms)':>8} {'p95(ms)':>8} "
+        f"{'p99(ms)':>8}  errors / vs baseline"
+    )
+    for name, summary in results.items():
+        errors = ",".join(f"{k}x{v}" for k, v in summary["errors"].items()) or "-"
+        line = (
+            f"{name:<40} {summary.get('rps', 0):>8.1f} "
+            f"{summary.get('p50_ms', 0):>8.2f} {summary.get('p95_ms', 0):>8.2f} "
+            f"{summary.get('p99_ms', 0):>8.2f}  {errors}"
+        )
+        base = (baseline or {}).get(name)
+        if base and base.get("p95_ms") and summary.get("p95_ms"):
+            p95_change = summary["p95_ms"] / base["p95_ms"] - 1
+            rps_change = summary["rps"] / base["rps"] - 1 if base.get("rps") else 0.0
+            p95_tolerance = _tolerance(summary, base, "p95_ms", threshold)
+            rps_tolerance = _tolerance(summary, base, "rps", threshold)
+            line += (
+                f"  p95 {p95_change:+.0%} (±{p95_tolerance:.0%})"
+                f" rps {rps_change:+.0%} (±{rps_tolerance:.0%})"
+            )
+            # 단계별 CPU 측정은 rps가 의미 없으므로 p95만 본다
+            if p95_change > p95_tolerance or (
+                not name.startswith("decode_image") and rps_change < -rps_tolerance
+            ):
+                line += "  REGRESSION"
+                regressed = True
+        print(line)
+    return regressed
+
+
+# 두 결과 중 라운드 간 변동이 큰 쪽 기준으로 허용치를 넓힌다
+def _tolerance(summary: Dict, base: Dict, key: str, threshold: float) -> float:
+    noise = max(summary.get(f"{key}_rsd", 0.0), base.get(f"{key}_rsd", 0.0))
+    return max(threshold, min(NOISE_SIGMAS * noise, MAX_TOLERANCE))
+
+
+def check_config(config: Dict, base_config: Dict) -> List[str]:
+    return [
+        f"{key}: 기준 {base_config.get(key)!r} / 현재 {config.get(key)!r}"
+        for key in COMPARABLE_CONFIG
+        if base_config.get(key) != config.get(key)
+    ]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--requests", type=int, default=500, help="라운드당 시나리오별 요청 수"
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=5, help="측정 반복 횟수 (중앙값 사용)"
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=100, help="측정 전에 버리는 요청 수"
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--images", type=int, default=50, help="합성 이미지 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replay", help="재생할 요청 JSONL 파일")
+    parser.add_argument("--only", help="이름에 이 문자열이 들어간 시나리오만 실행")
+    parser.add_argument("--ml-latency-ms", type=float, default=2.0)
+    parser.add_argument("--ml-error-rate", type=float, default=0.0)
+    parser.add_argument("--ml-slow-rate", type=float, default=0.0)
+    parser.add_argument("--ml-slow-ms", type=float, default=200.0)
+    parser.add_argument("--save", help="결과를 저장할 JSON 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 경로")
+    parser.add_argument(
+        "--threshold", type=float, default=0.15, help="회귀로 볼 변화율 (기본 15%%)"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    args.rounds = max(1, args.rounds)
+    baseline = None
+    mismatched: List[str] = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            saved = json.load(f)
+        baseline = saved["results"]
+        mismatched = check_config(vars(args), saved.get("config", {}))
+    save_path = os.path.abspath(args.save) if args.save else None
+    if args.replay:
+        args.replay = os.path.abspath(args.replay)
+
+    # 앱이 쓰는 static/, 라벨 DB 등은 임시 디렉터리에 만든다
+    os.environ.setdefault("REMOTE_ML_SERVICE_URL", STUB_URL)
+    os.environ.setdefault("REMOTE_ML_HEALTH_INTERVAL_SECONDS", "0")
+    os.environ.setdefault("PREDICTION_CACHE_ENABLED", "false")
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        results = asyncio.run(run(args))
+
+    regressed = print_results(results, baseline, args.threshold)
+    # 요청 수 등이 다르면 지연 시간 분포 자체가 달라지므로 변화율은 참고로만 보여준다
+    if mismatched:
+        print("\n경고: 기준 결과와 설정이 달라 회귀 판정을 하지 않습니다.")
+        for line in mismatched:
+            print(f"  {line}")
+        regressed = False
+    if save_path:
+        os.makedirs(os.path.dirname(save_path) or ".", exist_ok=True)
+        with open(save_path, "w") as f:
+            json.dump(
+                {"config": vars(args), "results": results},
+                f,
+                indent=2,
+            )
+        print(f"\n결과 저장: {save_path}")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
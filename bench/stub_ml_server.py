@@ -0,0 +1,91 @@
+# 로컬 벤치마크용 원격 ML 서비스 스텁
+# 실행: uvicorn stub_ml_server:app --app-dir bench --port 5001
+import asyncio
+import os
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from utils.payload_codec import decode_payload  # noqa: E402
+
+# 호출당 인위적인 지연 시간(ms)
+STUB_ML_LATENCY_MS = float(os.getenv("STUB_ML_LATENCY_MS", "0"))
+
+# 장애 주입 설정: 503 응답 비율, 느린 응답 비율과 그 지연 시간(ms)
+# 실행 중에는 POST /_faults 로 바꿀 수 있다
+FAULTS = {
+    "latency_ms": STUB_ML_LATENCY_MS,
+    "error_rate": float(os.getenv("STUB_ML_ERROR_RATE", "0")),
+    "slow_rate": float(os.getenv("STUB_ML_SLOW_RATE", "0")),
+    "slow_ms": float(os.getenv("STUB_ML_SLOW_MS", "1000")),
+}
+
+app = FastAPI()
+
+
+def _fake_logits(inputs: np.ndarray) -> list:
+    # 입력마다 결정적인 숫자를 골라 해당 위치만 1인 로짓을 돌려준다
+    rows = inputs.reshape(inputs.shape[0], -1)
+    digits = np.abs(rows.sum(axis=1)).astype(np.int64) % 10
+    return np.eye(10, dtype=np.float32)[digits].tolist()
+
+
+async def _delay():
+    latency_ms = FAULTS["latency_ms"]
+    if random.random() < FAULTS["slow_rate"]:
+        latency_ms += FAULTS["slow_ms"]
+    if latency_ms > 0:
+        await asyncio.sleep(latency_ms / 1000)
+    if random.random() < FAULTS["error_rate"]:
+        raise HTTPException(status_code=503, detail="injected fault")
+
+
+@app.post("/_faults")
+async def set_faults(faults: dict):
+    unknown = set(faults) - set(FAULTS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"unknown keys: {sorted(unknown)}")
+    FAULTS.update({key: float(value) for key, value in faults.items()})
+    return FAULTS
+
+
+@app.get("/ping")
+async def ping():
+    return {"status": "ok"}
+
+
+@app.post("/invocations")
+async def invocations(request: Request):
+    body = await request.body()
+    try:
+        inputs = decode_payload(body, request.headers)
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await _delay()
+    return {"predictions": _fake_logits(inputs)}
+
+
+@app.get("/models/")
+async def list_models():
+    await _delay()
+    return [{"name": "HybridCNN"}]
+
+
+@app.get("/models/{model_name}/versions/")
+async def list_model_versions(model_name: str):
+    await _delay()
+    return [{"name": model_name, "version": "1"}]
+
+
+@app.post("/models/predict/{model_name}/")
+@app.post("/models/predict/{model_name}/{version}/")
+async def predict(model_name: str, request: Request, version: str = None):
+    body = await request.body()
+    inputs = decode_payload(body, request.headers)
+    await _delay()
+    return {"predictions": _fake_logits(inputs)}
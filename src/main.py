@@ -1,20 +1,132 @@
+# 모듈별 import 시간/RSS 측정은 다른 import보다 먼저 시작해야 한다
+# isort: off
+from utils import import_profile
+
+# isort: on
+import logging
 import os
+import time
+from contextlib import asynccontextmanager
+from functools import partial
 from pathlib import Path
 
 # 원격 ML 서비스 URL
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.sessions import SessionMiddleware
-from starlette_exporter import PrometheusMiddleware, handle_metrics
 
 from routers import captcha, image_dataset, model
+from utils.batcher import create_predict_batcher
+from utils.challenge_store import create_challenge_store
+from utils.dataset_writer import create_dataset_writer
+from utils.http_client import create_http_client
+from utils.image_label_store import create_label_store
+from utils.image_processing import create_image_limits
+from utils.local_inference import create_inference_engine
+from utils.metrics import cleanup_dead_workers, handle_metrics, multiprocess_dir
+from utils.ml_backends import backend_urls_from_env
+from utils.pass_token import create_pass_token_signer
+from utils.payload_codec import create_payload_codec
+from utils.prediction_cache import create_prediction_cache
+from utils.preprocess_pool import create_preprocess_pool
+from utils.request_limits import BodySizeLimitMiddleware, predict_max_body_bytes
+from utils.resilient_client import create_ml_client
+from utils.response_cache import create_model_cache
+from utils.warmup import (
+    STARTUP_PHASE_SECONDS,
+    create_readiness,
+    handle_ready,
+    report_imports,
+)
 
 env_path = Path(__file__).resolve().parent.parent / ".env"
 load_dotenv(dotenv_path=env_path)
-app = FastAPI()
 
-print("REMOTE_ML_SERVICE_URL =", os.getenv("REMOTE_ML_SERVICE_URL"))
+# 앱 로그 출력 설정 (uvicorn은 자기 로거만 설정하므로 루트 로거는 여기서)
+# httpx는 요청마다 INFO 로그를 남기므로 경고 이상만
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 시작 시 모듈별 import 시간/RSS 출력 (콜드 스타트 회귀 추적)
+    report_imports(import_profile.PROFILER)
+    start = time.monotonic()
+    # 멀티 워커 모드: 재시작된 워커가 있으면 죽은 워커의 게이지 값을 정리
+    path = multiprocess_dir()
+    if path is not None:
+        cleanup_dead_workers(path)
+    # 원격 호출 텐서 직렬화 포맷 (알 수 없는 값이면 여기서 시작 실패)
+    app.state.payload_codec = create_payload_codec()
+    # 원격 ML 호출에 공용으로 쓰는 커넥션 풀 클라이언트
+    app.state.http_client = create_http_client()
+    logging.info(f"REMOTE_ML_SERVICE_URLS = {backend_urls_from_env()}")
+    # 제한 시간/서킷 브레이커/헤지 요청을 적용한 원격 ML 호출 계층
+    app.state.ml_client = create_ml_client(app.state.http_client)
+    # 백엔드 헬스 체크 시작
+    await app.state.ml_client.start()
+    # HybridCNN 추론 경로 (로컬 모델 또는 원격 ML 서비스, 로컬 실패 시 원격으로 대체)
+    app.state.inference_engine = create_inference_engine(
+        partial(
+            captcha.invoke_hybrid_cnn,
+            app.state.ml_client,
+            codec=app.state.payload_codec,
+        )
+    )
+    # 동시 /predict 요청을 묶어 한 번에 추론하는 배치 처리기
+    app.state.predict_batcher = create_predict_batcher(
+        app.state.inference_engine,
+        split_on_error=captcha.is_client_error,
+    )
+    await app.state.predict_batcher.start()
+    # 캡차 ID → 정답 저장소 (memory | redis | signed)
+    app.state.challenge_store = create_challenge_store()
+    await app.state.challenge_store.start()
+    # 캡차 통과 쿠키 서명/검증 (/predict, /check에서만 사용)
+    app.state.pass_tokens = create_pass_token_signer()
+    # /predict 이미지 입력 상한 (바이트 수, 픽셀 수, 축소 기준 크기)
+    app.state.image_limits = create_image_limits()
+    # 이미지 디코딩/전처리를 이벤트 루프 밖에서 실행하는 워커 풀
+    app.state.preprocess_pool = create_preprocess_pool()
+    # 캡처 이미지 라벨 저장소 (SQLite, LABELS_DB_PATH)
+    app.state.label_store = create_label_store()
+    # 캡처 이미지/라벨을 모아서 기록하는 백그라운드 writer
+    app.state.dataset_writer = create_dataset_writer(app.state.label_store)
+    await app.state.dataset_writer.start()
+    # /models 목록/버전 응답 캐시
+    app.state.model_cache = create_model_cache()
+    # 모델 프록시 예측 결과 캐시 (입력 해시 기준)
+    app.state.prediction_cache = create_prediction_cache()
+    # 모델 프록시 설정 (캐시 무효화 토큰, 대량 추론 배치 크기)
+    app.state.model_proxy_settings = model.create_model_proxy_settings()
+    STARTUP_PHASE_SECONDS.labels(phase="lifespan").set(time.monotonic() - start)
+    # 워밍업: 모델 로드, 전처리 경로, 커넥션 풀, 더미 추론 (WARMUP_MODE)
+    app.state.readiness = create_readiness()
+    await app.state.readiness.start(app.state)
+    try:
+        yield
+    finally:
+        await app.state.readiness.stop()
+        await app.state.dataset_writer.stop()
+        app.state.preprocess_pool.shutdown()
+        await app.state.challenge_store.close()
+        await app.state.predict_batcher.stop()
+        app.state.inference_engine.shutdown()
+        await app.state.ml_client.stop()
+        await app.state.http_client.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# /predict 업로드 크기 제한 (JSON 파싱/이미지 디코딩 전에 거절)
+# CORS보다 먼저 등록해 413 응답에도 CORS 헤더가 붙도록 한다
+# (나중에 등록한 미들웨어가 바깥쪽에서 감싼다)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_bytes=predict_max_body_bytes(),
+    paths=("/predict",),
+)
 
 # CORS 설정 (프론트와 통신 허용)
 app.add_middleware(
@@ -25,22 +137,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Prometheus 미들웨어
-app.add_middleware(
-    PrometheusMiddleware,
-    app_name="captcha",
-    prefix="captcha_",
-)
-
-# 세션 미들웨어 (캡차 통과 여부 등 저장용)
-app.add_middleware(
-    SessionMiddleware,
-    secret_key="super-secret-key",
-    max_age=3600,  # 세션 유지 시간 (초)
-)
-
 # Prometheus가 스크랩할 수 있도록 핸들러 연결
 app.add_route("/metrics", handle_metrics)
+# 워밍업이 끝나기 전에는 503 (readiness probe용)
+app.add_route("/ready", handle_ready)
 
 # 라우터 등록
 app.include_router(captcha.router)
@@ -0,0 +1,241 @@
+# 저장된 캡차 이미지(static/images)를 라벨 저장소 순서대로 다시 전처리해
+# 학습용 .npy 샤드로 묶는 오프라인 스크립트
+#  - 샤드마다 {name}.images.npy (float32 (N, 1, 28, 28) 모델 입력, --raw면 uint8 (N, 28, 28)),
+#    {name}.labels.npy (int64), {name}.seqs.npy (라벨 저장소 seq)
+#  - 학습 시 np.load(path, mmap_mode="r")로 PNG 디코딩 없이 바로 읽을 수 있다
+#  - manifest.json에 완료된 샤드와 이어서 처리할 seq를 기록하므로 중단 후 다시 실행하면 이어서 처리
+# 실행: python reprocess.py --out dataset/ [--recenter --padding 24 --threshold 180]
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Dict, List
+
+import numpy as np
+from PIL import Image
+
+from utils.image_label_store import DEFAULT_LABELS_DB_PATH, ImageLabelStore
+from utils.image_processing import (
+    INPUT_SIZE,
+    center_batch,
+    to_model_input_batch,
+)
+from utils.paths import SAVE_DIR
+
+MANIFEST = "manifest.json"
+
+
+def _atomic_save(path: str, array: np.ndarray):
+    tmp_path = path + ".tmp.npy"
+    np.save(tmp_path, array, allow_pickle=False)
+    os.replace(tmp_path, path)
+
+
+def _atomic_write_json(path: str, data: dict):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# 크기가 같은 이미지끼리 쌓아 center_batch로 한 번에 중앙 정렬
+def _recenter(images: List[Image.Image], padding: int, threshold: int):
+    groups: Dict[tuple, List[int]] = {}
+    for i, image in enumerate(images):
+        groups.setdefault(image.size, []).append(i)
+
+    centered: List[Image.Image] = [None] * len(images)
+    for indices in groups.values():
+        stacked = np.stack([np.asarray(images[i]) for i in indices])
+        results = center_batch(stacked, padding, threshold=threshold)
+        for i, result in zip(indices, results):
+            centered[i] = Image.fromarray(result)
+    return centered
+
+
+def _to_raw_batch(images: List[Image.Image]) -> np.ndarray:
+    out = np.empty((len(images), INPUT_SIZE, INPUT_SIZE), dtype=np.uint8)
+    for i, image in enumerate(images):
+        out[i] = np.asarray(
+            image.resize((INPUT_SIZE, INPUT_SIZE), Image.Resampling.BILINEAR)
+        )
+    return out
+
+
+# 워커 프로세스에서 샤드 하나를 처리하고 파일로 기록한다
+def process_shard(task: dict) -> dict:
+    start = time.perf_counter()
+    config = task["config"]
+    images, labels, seqs = [], [], []
+    missing = invalid = 0
+    for seq, filename, label in task["records"]:
+        if not label.isdigit():
+            invalid += 1
+            continue
+        path = os.path.join(config["images_dir"], filename)
+        try:
+            with Image.open(path) as image:
+                images.append(image.convert("L"))
+        except FileNotFoundError:
+            missing += 1
+            continue
+        except Exception:
+            invalid += 1
+            continue
+        labels.append(int(label))
+        seqs.append(seq)
+
+    if config["recenter"] and images:
+        images = _recenter(images, config["padding"], config["threshold"])
+    if config["raw"]:
+        array = _to_raw_batch(images)
+    else:
+        array = to_model_input_batch(images)
+
+    prefix = os.path.join(task["out"], task["name"])
+    _atomic_save(prefix + ".images.npy", array)
+    _atomic_save(prefix + ".labels.npy", np.asarray(labels, dtype=np.int64))
+    _atomic_save(prefix + ".seqs.npy", np.asarray(seqs, dtype=np.int64))
+    return {
+        "name": task["name"],
+        "first_seq": task["records"][0][0],
+        "last_seq": task["records"][-1][0],
+        "count": len(labels),
+        "missing": missing,
+        "invalid": invalid,
+        "bytes": array.nbytes,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def load_manifest(out: str, config: dict, restart: bool) -> dict:
+    path = os.path.join(out, MANIFEST)
+    if restart or not os.path.exists(path):
+        return {"config": config, "next_seq": 0, "shards": []}
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest["config"] != config:
+        raise SystemExit(
+            "기존 manifest.json과 설정이 다릅니다. 다른 --out을 쓰거나 --restart로 "
+            "처음부터 다시 처리하세요."
+        )
+    return manifest
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="저장된 캡차 이미지를 .npy 샤드로 변환"
+    )
+    parser.add_argument("--out", required=True, help="샤드를 기록할 디렉터리")
+    parser.add_argument("--images-dir", default=SAVE_DIR)
+    parser.add_argument(
+        "--labels-db",
+        default=os.getenv("LABELS_DB_PATH", DEFAULT_LABELS_DB_PATH),
+        help="라벨 DB 경로 (기본: LABELS_DB_PATH)",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-size", type=int, default=4096)
+    parser.add_argument(
+        "--recenter", action="store_true", help="저장된 이미지를 다시 중앙 정렬"
+    )
+    parser.add_argument("--padding", type=int, default=20)
+    parser.add_argument("--threshold", type=int, default=200)
+    parser.add_argument(
+        "--raw", action="store_true", help="정규화 없이 uint8 28x28 픽셀로 저장"
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="manifest.json을 무시하고 처음부터"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.makedirs(args.out, exist_ok=True)
+    # 결과에 영향을 주는 설정만 manifest에 기록 (워커 수 등은 바꿔서 이어도 된다)
+    config = {
+        "images_dir": os.path.abspath(args.images_dir),
+        "shard_size": args.shard_size,
+        "recenter": args.recenter,
+        "padding": args.padding,
+        "threshold": args.threshold,
+        "raw": args.raw,
+    }
+    manifest = load_manifest(args.out, config, args.restart)
+    manifest_path = os.path.join(args.out, MANIFEST)
+    if manifest["shards"]:
+        print(
+            f"이어서 처리: 샤드 {len(manifest['shards'])}개 완료, "
+            f"seq {manifest['next_seq']} 이후부터"
+        )
+
+    records = (
+        (record.seq, record.filename, record.label)
+        for record in ImageLabelStore(args.labels_db).iter_labels(
+            after_seq=manifest["next_seq"]
+        )
+    )
+    shard_index = len(manifest["shards"])
+    # 완료 순서와 무관하게 앞에서부터 연속으로 끝난 샤드까지만 체크포인트에 반영
+    pending: Dict[Future, int] = {}
+    done: Dict[int, dict] = {}
+    next_commit = shard_index
+    totals = {"count": 0, "missing": 0, "invalid": 0, "bytes": 0}
+    start = time.perf_counter()
+
+    def commit(results):
+        nonlocal next_commit
+        for future in results:
+            index = pending.pop(future)
+            done[index] = future.result()
+            shard = done[index]
+            for key in totals:
+                totals[key] += shard[key]
+            print(
+                f"{shard['name']}: {shard['count']}장 "
+                f"({shard['count'] / shard['seconds']:.0f}장/초, "
+                f"누락 {shard['missing']}, 오류 {shard['invalid']})"
+            )
+        while next_commit in done:
+            shard = done.pop(next_commit)
+            manifest["shards"].append(shard)
+            manifest["next_seq"] = shard["last_seq"]
+            next_commit += 1
+        _atomic_write_json(manifest_path, manifest)
+
+    # 읽어 둔 샤드가 워커 수의 두 배를 넘지 않도록 제한 (메모리 일정)
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        while True:
+            chunk = list(islice(records, args.shard_size))
+            if chunk:
+                task = {
+                    "name": f"shard-{shard_index:05d}",
+                    "records": chunk,
+                    "out": args.out,
+                    "config": config,
+                }
+                pending[executor.submit(process_shard, task)] = shard_index
+                shard_index += 1
+            if not pending:
+                break
+            if chunk and len(pending) < args.workers * 2:
+                continue
+            completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+            commit(completed)
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(
+        f"\n완료: {totals['count']}장, {elapsed:.1f}초 "
+        f"({totals['count'] / elapsed:.0f}장/초, "
+        f"{totals['bytes'] / elapsed / 2**20:.1f} MB/초), "
+        f"누락 {totals['missing']}, 오류 {totals['invalid']}, "
+        f"전체 샤드 {len(manifest['shards'])}개"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,44 +1,28 @@
-import json
 import logging
-import os
 import time
+from typing import Annotated, Optional
 
 import httpx
 import numpy as np
-from fastapi import APIRouter, HTTPException, Request
-from prometheus_client import Counter, Gauge, Histogram
+from fastapi import APIRouter, Cookie, Depends, HTTPException, Request, Response
+from prometheus_client import Counter, Histogram
 
 from schemas.captcha import CaptchaRequest, CaptchaResponse
-from utils.id_gen import generate_captcha_id
-from utils.image_processing import decode_image
-
-router = APIRouter(
-    tags=["Captcha"],
-)
-
-REMOTE_ML_SERVICE_URL = os.getenv("REMOTE_ML_SERVICE_URL")
-print(f"🔍 REMOTE_ML_SERVICE_URL 환경변수: {REMOTE_ML_SERVICE_URL}")
-
-# 메모리 기반 문제 저장소 (임시용)
-captcha_store = {}
+from utils.batcher import PredictBatcher
+from utils.challenge_store import ChallengeStoreDep
+from utils.dataset_writer import DatasetWriterDep
+from utils.image_processing import ImageLimits, InvalidImageError, decode_image_timed
+from utils.metrics import SIZE_BUCKETS, ApiMetrics, instrumented_route
+from utils.pass_token import PASS_COOKIE, PassTokenDep
+from utils.payload_codec import get_codec
+from utils.preprocess_pool import PoolSaturatedError, PreprocessPoolDep
+from utils.resilient_client import ResilientClient, UpstreamUnavailableError
 
 # ==============================
 # Prometheus 메트릭 정의
 # ==============================
-# 엔드포인트별 기본 메트릭
-CAPTCHA_REQUEST_COUNT = Counter(
-    "captcha_api_requests_total",
-    "Captcha 관련 API 요청 수",
-    ["endpoint", "method", "status"],
-)
-CAPTCHA_REQUEST_LATENCY = Histogram(
-    "captcha_api_request_duration_seconds",
-    "Captcha 관련 API 요청 처리 시간(초)",
-    ["endpoint", "method"],
-)
-CAPTCHA_ERROR_COUNT = Counter(
-    "captcha_api_errors_total", "Captcha 관련 API 에러 발생 수", ["endpoint", "method"]
-)
+# 엔드포인트별 기본 메트릭 (지연 시간/상태/크기는 라우트 클래스에서 기록)
+CAPTCHA_API = ApiMetrics("captcha", "Captcha")
 
 # 캡차 생성/검증 관련
 CAPTCHA_GENERATED = Counter("captcha_generated_total", "생성된 캡차 총 개수")
@@ -61,113 +45,164 @@ REMOTE_ML_LATENCY = Histogram(
 REMOTE_ML_ERRORS = Counter(
     "remote_ml_errors_total", "원격 ML 호출 실패 횟수", ["model", "method", "status"]
 )
-REMOTE_ML_PAYLOAD_SIZE = Gauge(
-    "remote_ml_payload_bytes", "원격 ML 서비스로 전송된 페이로드 바이트 크기", ["model"]
+REMOTE_ML_PAYLOAD_SIZE = Histogram(
+    "remote_ml_payload_bytes",
+    "원격 ML 서비스로 전송된 페이로드 바이트 크기",
+    ["model"],
+    buckets=SIZE_BUCKETS,
 )
 
-# 요청/응답 크기
-REQUEST_PAYLOAD_SIZE = Gauge(
-    "api_request_payload_bytes", "API 요청 페이로드 크기(바이트)", ["endpoint"]
-)
-RESPONSE_SIZE_BYTES = Gauge(
-    "api_response_size_bytes", "API 응답 바디 크기(바이트)", ["endpoint"]
+# /predict 처리 단계별 소요 시간
+PREDICT_STAGE_LATENCY = Histogram(
+    "captcha_predict_stage_seconds",
+    "/predict 단계별 처리 시간(초)",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
 )
 # ==============================
 
+router = APIRouter(
+    tags=["Captcha"],
+    route_class=instrumented_route(CAPTCHA_API),
+)
+
+# 요청마다 labels()를 조회하지 않도록 단계별 라벨을 미리 묶어 둔다
+_STAGE = {
+    stage: PREDICT_STAGE_LATENCY.labels(stage=stage)
+    for stage in ("challenge", "queue", "decode", "preprocess", "inference", "persist")
+}
 
-@router.get("/captcha", summary="숫자 랜덤 생성")
-def get_captcha(request: Request):
-    endpoint = "get_captcha"
-    method = request.method
-    start_time = time.monotonic()
-    status = "200"  # ← 기본값
 
+# 원격 ML 서비스의 HybridCNN 모델 예측 API 호출 (배치 단위)
+# codec을 주지 않으면 JSON ({"inputs": [...]})
+async def invoke_hybrid_cnn(
+    client: ResilientClient, batch: np.ndarray, codec=None
+) -> list:
+    # 설정된 코덱으로 한 번만 직렬화하고, 그 버퍼 길이를 크기로 사용
+    body, headers = (codec or get_codec()).encode(batch)
+    REMOTE_ML_PAYLOAD_SIZE.labels(model="HybridCNN").observe(len(body))
+
+    ml_start = time.monotonic()
+    try:
+        response = await client.post(
+            "/invocations",
+            endpoint="invocations",
+            idempotent=True,
+            # 배치 크기(2의 거듭제곱 구간)마다 지연 분포가 달라 제한 시간도 따로 학습
+            latency_key=f"batch{1 << (len(batch) - 1).bit_length()}",
+            content=body,
+            headers=headers,
+        )
+    finally:
+        REMOTE_ML_LATENCY.labels(model="HybridCNN", method="POST").observe(
+            time.monotonic() - ml_start
+        )
+
+    if response.status_code != 200:
+        REMOTE_ML_ERRORS.labels(
+            model="HybridCNN", method="POST", status=str(response.status_code)
+        ).inc()
+    response.raise_for_status()
+    return response.json()["predictions"]
+
+
+# 4xx 응답은 특정 입력 때문일 수 있으므로 배치를 쪼개 요청별로 다시 보낸다
+def is_client_error(error: Exception) -> bool:
+    return (
+        isinstance(error, httpx.HTTPStatusError)
+        and 400 <= error.response.status_code < 500
+    )
+
+
+# 이미지 입력 상한 (lifespan에서 .env 로딩 후 생성)
+def get_image_limits(request: Request) -> ImageLimits:
+    return request.app.state.image_limits
+
+
+ImageLimitsDep = Annotated[ImageLimits, Depends(get_image_limits)]
+
+
+@router.get("/captcha", summary="숫자 랜덤 생성")
+async def get_captcha(store: ChallengeStoreDep):
     try:
         from random import randint
 
-        captcha_id = generate_captcha_id()
         expected = str(randint(0, 9))
-        captcha_store[captcha_id] = expected
+        captcha_id = await store.issue(expected)
 
         CAPTCHA_GENERATED.inc()  # 생성 개수
-        status = "200"
         return {"id": captcha_id, "expected": expected}
 
     except Exception as e:
-        status = "500"
-        CAPTCHA_ERROR_COUNT.labels(endpoint=endpoint, method=method).inc()
         logging.error(f"Captcha 생성 오류: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="서버 오류 발생")
 
-    finally:
-        duration = time.monotonic() - start_time
-        CAPTCHA_REQUEST_LATENCY.labels(endpoint=endpoint, method=method).observe(
-            duration
-        )
-        CAPTCHA_REQUEST_COUNT.labels(
-            endpoint=endpoint, method=method, status=status
-        ).inc()
-
 
-@router.post("/predict", summary="유저 입력 이미지 추론")
-async def predict(req: CaptchaRequest, request: Request):
-    endpoint = "predict_captcha"
-    method = request.method
-    start_time = time.monotonic()
-    status = "200"  # ← 기본값
-
-    expected = captcha_store.get(req.id)
-    if not expected:
-        status = "400"
+@router.post("/predict", name="predict_captcha", summary="유저 입력 이미지 추론")
+async def predict(
+    req: CaptchaRequest,
+    response: Response,
+    batcher: PredictBatcher,
+    store: ChallengeStoreDep,
+    pool: PreprocessPoolDep,
+    writer: DatasetWriterDep,
+    pass_tokens: PassTokenDep,
+    limits: ImageLimitsDep,
+):
+    # 여기서는 ID 확인만 하고, 소비(삭제)는 추론이 끝난 뒤에 한다
+    # (전처리 큐 포화 429나 추론 서버 503/504는 같은 ID로 다시 시도할 수 있도록)
+    challenge_start = time.perf_counter()
+    if not await store.get(req.id):
+        _STAGE["challenge"].observe(time.perf_counter() - challenge_start)
         CAPTCHA_INVALID_ID.inc()
-        CAPTCHA_ERROR_COUNT.labels(endpoint=endpoint, method=method).inc()
         # 잘못된 캡차 ID 요청이므로 400으로 응답, 카운터만 증가
-        duration = time.monotonic() - start_time
-        CAPTCHA_REQUEST_LATENCY.labels(endpoint=endpoint, method=method).observe(
-            duration
-        )
-        CAPTCHA_REQUEST_COUNT.labels(
-            endpoint=endpoint, method=method, status=status
-        ).inc()
         raise HTTPException(status_code=400, detail="유효하지 않은 캡차 ID입니다.")
+    challenge_seconds = time.perf_counter() - challenge_start
 
     try:
+        # 디코딩/중앙 정렬/변환은 CPU 작업이므로 워커 풀에서 실행
+        submitted = time.perf_counter()
+        image_input, centered_image, timings = await pool.run(
+            decode_image_timed, req.image, limits
+        )
+        # 워커 풀 대기 시간 = 전체 - 워커 안에서 실제로 걸린 시간
+        _STAGE["queue"].observe(
+            time.perf_counter() - submitted - timings["decode"] - timings["preprocess"]
+        )
+        _STAGE["decode"].observe(timings["decode"])
+        _STAGE["preprocess"].observe(timings["preprocess"])
+
+        # 동시 요청과 묶여 HybridCNN 모델(로컬 또는 원격)로 한 번에 추론됨
+        with _STAGE["inference"].time():
+            logits = (await batcher.submit(image_input))[0]
+
+        # 한 번 제출된 캡차 ID는 재사용할 수 없도록 꺼내면서 삭제
+        # 같은 ID로 동시에 들어온 요청 중 하나만 성공하고 나머지는 결과 없이 400
+        consume_start = time.perf_counter()
+        expected = await store.consume(req.id)
+        _STAGE["challenge"].observe(
+            challenge_seconds + time.perf_counter() - consume_start
+        )
+        if not expected:
+            CAPTCHA_INVALID_ID.inc()
+            raise HTTPException(status_code=400, detail="유효하지 않은 캡차 ID입니다.")
 
-        image_input = decode_image(req.image, captcha_id=req.id, label=expected)
-        headers = {"Content-Type": "application/json"}
-        payload = {"inputs": image_input.tolist()}
-
-        # 요청 페이로드 크기 기록
-        payload_size = len(json.dumps(payload).encode("utf-8"))
-        REQUEST_PAYLOAD_SIZE.labels(endpoint=endpoint).set(payload_size)
-
-        # 원격 ML 서비스의 HybridCNN 모델 예측 API 호출
-        remote_url = f"{REMOTE_ML_SERVICE_URL}/invocations"
-        async with httpx.AsyncClient() as client:
-            ml_start = time.monotonic()
-            response = await client.post(remote_url, json=payload, headers=headers)
-            ml_duration = time.monotonic() - ml_start
-
-            REMOTE_ML_LATENCY.labels(model="HybridCNN", method=method).observe(
-                ml_duration
-            )
-            REMOTE_ML_PAYLOAD_SIZE.labels(model="HybridCNN").set(payload_size)
-
-            response.raise_for_status()
-            result = response.json()
-
-            if response.status_code != 200:
-                REMOTE_ML_ERRORS.labels(
-                    model="HybridCNN", method=method, status=str(response.status_code)
-                ).inc()
+        # 데이터셋 저장은 백그라운드 writer가 묶어서 처리 (과부하 시 버려질 수 있음)
+        with _STAGE["persist"].time():
+            writer.submit(f"captcha_{req.id}.png", centered_image, expected)
 
-        logits = result["predictions"][0]
         predicted_digit = int(np.argmax(logits))
         passed = str(predicted_digit) == expected
 
-        status = str(response.status_code)
         if passed:
-            request.session["captcha_passed"] = True
+            # 통과 여부는 서명된 통과 토큰 쿠키로 전달 (/check에서 확인)
+            response.set_cookie(
+                PASS_COOKIE,
+                pass_tokens.issue(),
+                max_age=pass_tokens.max_age,
+                httponly=True,
+                samesite="lax",
+            )
             CAPTCHA_VERIFY_SUCCESS.inc()
             return CaptchaResponse(passed=True, message="✅ 통과")
         else:
@@ -177,51 +212,40 @@ async def predict(req: CaptchaRequest, request: Request):
             )
 
     except HTTPException:
-        # 이미 위에서 HTTPException을 발생시킬 때 처리했으므로, 여기로는 오지 않음
         raise
 
+    except InvalidImageError as e:
+        # 형식/크기가 잘못된 업로드는 클라이언트 오류로 응답
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+    except UpstreamUnavailableError as e:
+        logging.warning(f"원격 ML 서비스 사용 불가: {e}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail="추론 서버에 일시적으로 연결할 수 없습니다.",
+        )
+
+    except PoolSaturatedError:
+        raise HTTPException(
+            status_code=429, detail="요청이 많습니다. 잠시 후 다시 시도하세요."
+        )
+
     except Exception as e:
-        status = "500"
-        CAPTCHA_ERROR_COUNT.labels(endpoint=endpoint, method=method).inc()
         logging.error(f"Captcha 예측 오류: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="서버 오류 발생")
 
-    finally:
-        duration = time.monotonic() - start_time
-        CAPTCHA_REQUEST_LATENCY.labels(endpoint=endpoint, method=method).observe(
-            duration
-        )
-        CAPTCHA_REQUEST_COUNT.labels(
-            endpoint=endpoint, method=method, status=status
-        ).inc()
-
 
 @router.get("/check", summary="이미지 가부 결정")
-def check_captcha(request: Request):
-    endpoint = "check_captcha"
-    method = request.method
-    start_time = time.monotonic()
-    status = "200"  # ← 기본값
-
+def check_captcha(
+    pass_tokens: PassTokenDep,
+    captcha_pass: Annotated[Optional[str], Cookie()] = None,
+):
     try:
-        passed_flag = request.session.get("captcha_passed", False)
-        status = "200"
-        if passed_flag:
+        if pass_tokens.verify(captcha_pass):
             return {"access": "granted"}
         else:
             return {"access": "denied"}
 
     except Exception as e:
-        status = "500"
-        CAPTCHA_ERROR_COUNT.labels(endpoint=endpoint, method=method).inc()
         logging.error(f"Captcha 체크 오류: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="서버 오류 발생")
-
-    finally:
-        duration = time.monotonic() - start_time
-        CAPTCHA_REQUEST_LATENCY.labels(endpoint=endpoint, method=method).observe(
-            duration
-        )
-        CAPTCHA_REQUEST_COUNT.labels(
-            endpoint=endpoint, method=method, status=status
-        ).inc()
@@ -1,83 +1,210 @@
-import io
+import asyncio
+import hashlib
+import json
 import logging
 import os
-import time
 import zipfile
+from itertools import islice
+from typing import Annotated, Iterator, List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
-from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client import Counter, Histogram
 
-router = APIRouter(
-    tags=["Image"],
-)
+from utils.image_label_store import ImageLabelStore, LabelRecord
+from utils.metrics import ApiMetrics, instrumented_route
+from utils.paths import SAVE_DIR
+from utils.zip_stream import ZipMember, file_member, stream_zip
+
+# 증분 내보내기 한 번에 담는 최대 이미지 수 (중단 시 이 단위로 이어받음)
+EXPORT_MAX_LIMIT = 100_000
+
+
+# limit을 주지 않은 요청의 기본값 (.env 로딩 이후 요청 시점에 읽는다)
+def export_default_limit() -> int:
+    return min(EXPORT_MAX_LIMIT, int(os.getenv("EXPORT_DEFAULT_LIMIT", "10000")))
 
-SAVED_DIR = "static/images"  # CAPTCHA 이미지가 저장된 디렉터리
 
 # ==============================
 # Prometheus 메트릭 정의
 # ==============================
-# 엔드포인트별 기본 메트릭
-IMAGE_REQUEST_COUNT = Counter(
-    "image_api_requests_total",
-    "Image 관련 API 요청 수",
-    ["endpoint", "method", "status"],
-)
-IMAGE_REQUEST_LATENCY = Histogram(
-    "image_api_request_duration_seconds",
-    "Image 관련 API 요청 처리 시간(초)",
-    ["endpoint", "method"],
-)
-IMAGE_ERROR_COUNT = Counter(
-    "image_api_errors_total", "Image 관련 API 에러 발생 수", ["endpoint", "method"]
-)
+# 엔드포인트별 기본 메트릭 (지연 시간/상태/크기는 라우트 클래스에서 기록)
+IMAGE_API = ApiMetrics("image", "Image")
 # 이미지 다운로드 관련
 CAPTCHA_IMAGES_DOWNLOAD = Counter(
     "captcha_images_download_total", "이미지 다운로드(zip) 요청 수"
 )
-CAPTCHA_IMAGES_ZIP_SIZE = Gauge(
-    "captcha_images_zip_bytes", "생성된 ZIP 파일 크기(바이트)"
+CAPTCHA_IMAGES_ZIP_SIZE = Histogram(
+    "captcha_images_zip_bytes",
+    "전송한 ZIP 파일 크기(바이트)",
+    buckets=(1e5, 1e6, 1e7, 5e7, 1e8, 5e8, 1e9, 5e9),
 )
 # ==============================
 
+router = APIRouter(
+    tags=["Image"],
+    route_class=instrumented_route(IMAGE_API),
+)
+
+
+# 라벨 저장소 (lifespan에서 LABELS_DB_PATH로 생성)
+def get_label_store(request: Request) -> ImageLabelStore:
+    return request.app.state.label_store
+
+
+LabelStoreDep = Annotated[ImageLabelStore, Depends(get_label_store)]
 
-@router.get("/images", summary="이미지 파일 및 CSV 파일 다운로드")
-async def download_captcha_images_zip():
-    endpoint = "download_images"
-    method = "GET"
-    start_time = time.monotonic()
-    status = "200"  # ← 기본값
 
+def _dataset_members(store: ImageLabelStore) -> Iterator[ZipMember]:
+    if os.path.isdir(SAVE_DIR):
+        with os.scandir(SAVE_DIR) as entries:
+            for entry in entries:
+                # 이미지 파일만 포함 (임시 파일/예전 CSV 제외)
+                if not entry.name.endswith(".png") or entry.name.startswith("."):
+                    continue
+                # PNG는 이미 압축되어 있으므로 다시 deflate하지 않고 저장만 한다
+                try:
+                    yield file_member(entry.path, arcname=entry.name)
+                except FileNotFoundError:
+                    continue
+
+    # 라벨은 라벨 저장소에서 CSV로 내보내 함께 담는다
+    yield ZipMember(
+        arcname="labels.csv",
+        chunks=(chunk.encode("utf-8") for chunk in store.iter_labels_csv()),
+        compress_type=zipfile.ZIP_DEFLATED,
+    )
+
+
+def _hashed_chunks(chunks: Iterator[bytes], entry: dict) -> Iterator[bytes]:
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+        yield chunk
+    entry["sha256"] = digest.hexdigest()
+
+
+# manifest는 앞선 파일들이 모두 기록된 뒤 직렬화되어야 하므로 지연 평가
+def _manifest_chunks(manifest: dict) -> Iterator[bytes]:
+    yield json.dumps(manifest, ensure_ascii=False).encode("utf-8")
+
+
+# 커서 이후 라벨 레코드에 해당하는 이미지 + labels.csv + manifest.json
+def _incremental_members(
+    store: ImageLabelStore, records: List[LabelRecord], manifest: dict
+):
+    for record in records:
+        path = os.path.join(SAVE_DIR, record.filename)
+        try:
+            member = file_member(path, arcname=record.filename)
+        except FileNotFoundError:
+            manifest["missing"].append(record.filename)
+            continue
+        entry = {
+            "seq": record.seq,
+            "filename": record.filename,
+            "label": record.label,
+            "created_at": record.created_at,
+            "size": member.size,
+        }
+        manifest["files"].append(entry)
+        # 같은 커서 범위는 항상 같은 바이트가 나오도록 mtime을 저장 시각으로 고정
+        yield member._replace(
+            chunks=_hashed_chunks(member.chunks, entry), mtime=record.created_at
+        )
+
+    yield ZipMember(
+        arcname="labels.csv",
+        chunks=(
+            chunk.encode("utf-8") for chunk in store.iter_labels_csv(records=records)
+        ),
+        compress_type=zipfile.ZIP_DEFLATED,
+        mtime=records[-1].created_at if records else 0,
+    )
+    # 체크섬은 파일을 모두 흘려보낸 뒤에야 알 수 있으므로 manifest는 마지막에 담는다
+    yield ZipMember(
+        arcname="manifest.json",
+        chunks=_manifest_chunks(manifest),
+        compress_type=zipfile.ZIP_DEFLATED,
+        mtime=records[-1].created_at if records else 0,
+    )
+
+
+# 실제로 전송한 바이트 수로 ZIP 크기 메트릭을 기록
+def _track_zip_size(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    total = 0
+    for chunk in chunks:
+        total += len(chunk)
+        yield chunk
+    CAPTCHA_IMAGES_ZIP_SIZE.observe(total)
+
+
+@router.get(
+    "/images", name="download_images", summary="이미지 파일 및 CSV 파일 다운로드"
+)
+async def download_captcha_images_zip(
+    store: LabelStoreDep,
+    since_seq: Annotated[
+        Optional[int], Query(ge=0, description="이 seq 이후 저장된 이미지만 내보냄")
+    ] = None,
+    since: Annotated[
+        Optional[float], Query(description="이 Unix 시각 이후 저장된 이미지만 내보냄")
+    ] = None,
+    limit: Annotated[
+        Optional[int], Query(ge=1, le=EXPORT_MAX_LIMIT, description="최대 이미지 수")
+    ] = None,
+):
     try:
         CAPTCHA_IMAGES_DOWNLOAD.inc()
 
-        # 실제 이미지 압축
-        zbuf = io.BytesIO()
-        with zipfile.ZipFile(zbuf, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-            if os.path.isdir(SAVED_DIR):
-                for fname in os.listdir(SAVED_DIR):
-                    full_path = os.path.join(SAVED_DIR, fname)
-                    zf.write(full_path, arcname=fname)
+        if since_seq is None and since is None:
+            # 전체 내보내기. 다음 증분 요청에 쓸 커서를 헤더로 알려준다
+            # (이 사이에 저장된 이미지는 다음 증분에 한 번 더 포함될 수 있음)
+            next_cursor = await asyncio.to_thread(store.max_seq)
+            members = _dataset_members(store)
+            headers = {
+                "Content-Disposition": "attachment; filename=captcha_images.zip",
+                "X-Export-Next-Cursor": str(next_cursor),
+            }
+        else:
+            # 증분 내보내기: 라벨 저장소의 seq 인덱스로 변경분만 조회
+            if since_seq is not None:
+                after_seq = since_seq
+            else:
+                after_seq = await asyncio.to_thread(store.seq_before_time, since)
+            limit = limit or export_default_limit()
+            records = await asyncio.to_thread(
+                lambda: list(islice(store.iter_labels(after_seq=after_seq), limit + 1))
+            )
+            has_more = len(records) > limit
+            records = records[:limit]
+            next_cursor = records[-1].seq if records else after_seq
 
-        zbuf.seek(0)
-        zip_size = len(zbuf.getvalue())
-        CAPTCHA_IMAGES_ZIP_SIZE.set(zip_size)
+            manifest = {
+                "cursor_start": after_seq,
+                "next_cursor": next_cursor,
+                "has_more": has_more,
+                "files": [],
+                "missing": [],
+            }
+            members = _incremental_members(store, records, manifest)
+            filename = f"captcha_images_{after_seq}_{next_cursor}.zip"
+            # 다운로드가 끊기면 마지막으로 받은 next_cursor부터 다시 요청하면 된다
+            headers = {
+                "Content-Disposition": f"attachment; filename={filename}",
+                "X-Export-Cursor-Start": str(after_seq),
+                "X-Export-Next-Cursor": str(next_cursor),
+                "X-Export-Has-More": "true" if has_more else "false",
+            }
 
+        # 파일을 읽는 대로 ZIP 청크를 흘려보낸다. 동기 제너레이터이므로
+        # StreamingResponse가 스레드 풀에서 순회해 이벤트 루프를 막지 않는다
         return StreamingResponse(
-            zbuf,
+            _track_zip_size(stream_zip(members)),
             media_type="application/zip",
-            headers={"Content-Disposition": "attachment; filename=captcha_images.zip"},
+            headers=headers,
         )
 
     except Exception as e:
-        status = "500"
-        IMAGE_ERROR_COUNT.labels(endpoint=endpoint, method=method).inc()
         logging.error(f"이미지 다운로드 오류: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="서버 오류 발생")
-
-    finally:
-        duration = time.monotonic() - start_time
-        IMAGE_REQUEST_LATENCY.labels(endpoint=endpoint, method=method).observe(duration)
-        IMAGE_REQUEST_COUNT.labels(
-            endpoint=endpoint, method=method, status=status
-        ).inc()
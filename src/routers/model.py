@@ -1,120 +1,256 @@
+import hmac
 import logging
 import os
-import time
-from typing import List
+from functools import partial
+from typing import Annotated, List, Optional
 
-import httpx
-from fastapi import APIRouter, HTTPException, Request
-from prometheus_client import Counter, Histogram
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
-router = APIRouter(tags=["Model"])
-
-REMOTE_ML_SERVICE_URL = os.getenv("REMOTE_ML_SERVICE_URL")
+from utils.bulk_inference import (
+    NDJSON_CONTENT_TYPE,
+    BulkInputError,
+    DuplexStreamingResponse,
+    read_bulk_batches,
+    stream_bulk_predictions,
+    with_error_trailer,
+)
+from utils.metrics import ApiMetrics, instrumented_route
+from utils.prediction_cache import PredictionCache, PredictionCacheDep
+from utils.resilient_client import MlClient, ResilientClient, UpstreamUnavailableError
+from utils.response_cache import (
+    AsyncTTLCache,
+    CacheEntry,
+    ModelCache,
+    etag_matches,
+)
 
 # ==============================
 # Prometheus 메트릭 정의
 # ==============================
-# 엔드포인트별 기본 메트릭
-MODEL_REQUEST_COUNT = Counter(
-    "model_api_requests_total",
-    "Model 관련 API 요청 수",
-    ["endpoint", "method", "status"],
-)
-MODEL_REQUEST_LATENCY = Histogram(
-    "model_api_request_duration_seconds",
-    "Model 관련 API 요청 처리 시간(초)",
-    ["endpoint", "method"],
-)
-MODEL_ERROR_COUNT = Counter(
-    "model_api_errors_total", "Model 관련 API 에러 발생 수", ["endpoint", "method"]
-)
+# 엔드포인트별 기본 메트릭 (지연 시간/상태/크기는 라우트 클래스에서 기록)
+MODEL_API = ApiMetrics("model", "Model")
 # ==============================
 
+router = APIRouter(tags=["Model"], route_class=instrumented_route(MODEL_API))
+
 
 class InferenceRequest(BaseModel):
     inputs: List[List[float]]
 
 
-@router.get("/", summary="루트 디렉토리")
-async def read_root(request: Request):
-    endpoint = "read_root"
-    method = request.method
-    start_time = time.monotonic()
-    status = "200"  # ← 기본값
+# 모델 프록시 설정 (.env가 로드된 뒤 lifespan에서 읽는다)
+#  - admin_token: 캐시 무효화 요청의 X-Admin-Token과 일치해야 함 (없으면 무효화 불가)
+#  - bulk_batch_size / bulk_max_in_flight: 대량 추론에서 원격 호출 한 번에 보낼 행 수,
+#    동시에 진행할 원격 호출 수
+class ModelProxySettings:
+    def __init__(
+        self,
+        admin_token: Optional[str] = None,
+        bulk_batch_size: int = 256,
+        bulk_max_in_flight: int = 4,
+    ):
+        self.admin_token = admin_token
+        self.bulk_batch_size = max(1, bulk_batch_size)
+        self.bulk_max_in_flight = max(1, bulk_max_in_flight)
+
+
+def create_model_proxy_settings() -> ModelProxySettings:
+    admin_token = os.getenv("MODEL_CACHE_ADMIN_TOKEN") or None
+    if admin_token is None:
+        logging.warning(
+            "MODEL_CACHE_ADMIN_TOKEN이 설정되지 않아 모델 캐시 무효화 API를 사용할 수 없습니다."
+        )
+    return ModelProxySettings(
+        admin_token=admin_token,
+        bulk_batch_size=int(os.getenv("MODEL_BULK_BATCH_SIZE", "256")),
+        bulk_max_in_flight=int(os.getenv("MODEL_BULK_MAX_IN_FLIGHT", "4")),
+    )
+
+
+def get_model_proxy_settings(request: Request) -> ModelProxySettings:
+    return request.app.state.model_proxy_settings
+
+
+ModelProxySettingsDep = Annotated[ModelProxySettings, Depends(get_model_proxy_settings)]
+
 
+async def _fetch_json(client: ResilientClient, path: str, endpoint: str):
+    response = await client.get(path, endpoint=endpoint)
+    response.raise_for_status()
+    return response.json()
+
+
+# 모델 버전 목록 (모델 목록/버전 캐시를 거친다)
+async def _model_versions(
+    client: ResilientClient, cache: AsyncTTLCache, model_name: str
+) -> CacheEntry:
+    remote_path = f"/models/{model_name}/versions/"
+    return await cache.get_or_fetch(
+        f"versions:{model_name}",
+        partial(_fetch_json, client, remote_path, "model_versions"),
+    )
+
+
+# 버전 목록에서 가장 큰 숫자 버전 (형식을 알 수 없으면 None)
+def _latest_version(versions) -> Optional[str]:
+    if not isinstance(versions, list):
+        return None
+    numbers = [
+        str(item["version"])
+        for item in versions
+        if isinstance(item, dict) and str(item.get("version", "")).isdigit()
+    ]
+    return max(numbers, key=int, default=None)
+
+
+# 버전 미지정 호출이 사용할 최신 버전을 버전 목록 캐시로 정한다
+# 정한 버전의 경로로 원격 호출하므로 캐시 키의 버전과 실제 응답한 모델이 항상 같다
+# (새 버전 배포 후 버전 목록 캐시가 갱신되기 전까지는 이전 버전이 응답하므로
+#  배포 시 /models/cache/invalidate?model_name=...으로 목록을 비운다)
+async def _resolve_latest_version(
+    client: ResilientClient, cache: AsyncTTLCache, model_name: str
+) -> Optional[str]:
     try:
-        result = {"message": "MLflow FastAPI Model Serving Server is running 🚀"}
-        status = "200"
-        return result
-    finally:
-        duration = time.monotonic() - start_time
-        MODEL_REQUEST_LATENCY.labels(endpoint=endpoint, method=method).observe(duration)
-        MODEL_REQUEST_COUNT.labels(
-            endpoint=endpoint, method=method, status=status
-        ).inc()
+        entry = await _model_versions(client, cache, model_name)
+    except Exception as e:
+        logging.warning(f"최신 모델 버전 조회 실패({model_name}), 캐시 없이 호출: {e}")
+        return None
+    return _latest_version(entry.value)
 
 
-@router.get("/models/", summary="등록된 모델 목록 반환")
-async def list_models(request: Request):
-    endpoint = "list_models"
-    method = request.method
-    start_time = time.monotonic()
-    status = "200"  # ← 기본값
+# 같은 (모델, 버전, 입력)에 대한 원격 예측 결과는 캐시에서 바로 돌려준다
+async def _cached_predict(
+    client: ResilientClient,
+    cache: PredictionCache,
+    remote_path: str,
+    model_name: str,
+    version: Optional[str],
+    body: InferenceRequest,
+) -> Response:
+    versioned = version is not None
+    # 버전을 정하지 못했으면 어떤 모델이 응답할지 알 수 없으므로 캐시하지 않는다
+    key = (
+        cache.make_key(model_name, version, body.inputs)
+        if cache.enabled and versioned
+        else None
+    )
+    if key is not None:
+        cached = await cache.get(key)
+        if cached is not None:
+            return Response(cached, media_type="application/json")
+
+    # 같은 모델/버전은 같은 백엔드로 보내 모델이 올라와 있는 레플리카를 재사용
+    response = await client.post(
+        remote_path,
+        endpoint="predict",
+        idempotent=True,
+        route_key=f"{model_name}/{version}" if versioned else model_name,
+        json=body.model_dump(),
+    )
+    response.raise_for_status()
+    if key is not None:
+        await cache.put(key, response.content)
+    return Response(response.content, media_type="application/json")
+
+
+# 대량 추론 배치 하나를 원격 예측 API로 보내고 행별 예측 목록을 돌려준다
+# (입력마다 다른 대량 작업은 캐시 적중을 기대하기 어려워 예측 캐시를 거치지 않음)
+async def _send_bulk_batch(
+    client: ResilientClient, remote_path: str, route_key: str, body: bytes, rows: int
+) -> list:
+    response = await client.post(
+        remote_path,
+        endpoint="predict_bulk",
+        idempotent=True,
+        route_key=route_key,
+        content=body,
+        headers={"Content-Type": "application/json"},
+    )
+    response.raise_for_status()
+    data = response.json()
+    predictions = data["predictions"] if isinstance(data, dict) else data
+    if len(predictions) != rows:
+        raise ValueError(
+            f"예측 행 수({len(predictions)})가 입력 행 수({rows})와 다릅니다."
+        )
+    return predictions
+
+
+# If-None-Match가 현재 ETag와 같으면 본문 없이 304로 응답
+def _cached_response(request: Request, entry: CacheEntry) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(entry.value, headers=headers)
+
+
+@router.get("/", summary="루트 디렉토리")
+async def read_root():
+    return {"message": "MLflow FastAPI Model Serving Server is running 🚀"}
+
 
-    remote_url = f"{REMOTE_ML_SERVICE_URL}/models/"
+@router.get("/models/", summary="등록된 모델 목록 반환")
+async def list_models(request: Request, client: MlClient, cache: ModelCache):
+    remote_path = "/models/"
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(remote_url)
-            response.raise_for_status()
-            data = response.json()
-            status = str(response.status_code)
-            return data
+        entry = await cache.get_or_fetch(
+            "models", partial(_fetch_json, client, remote_path, "models")
+        )
+        return _cached_response(request, entry)
+
+    except UpstreamUnavailableError as e:
+        logging.warning(f"Remote ML unavailable: {e}")
+        raise HTTPException(status_code=e.status_code, detail=str(e))
 
     except Exception as e:
-        status = "500"
-        MODEL_ERROR_COUNT.labels(endpoint=endpoint, method=method).inc()
         logging.error(f"Error listing models: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error listing models: {e}")
 
-    finally:
-        duration = time.monotonic() - start_time
-        MODEL_REQUEST_LATENCY.labels(endpoint=endpoint, method=method).observe(duration)
-        MODEL_REQUEST_COUNT.labels(
-            endpoint=endpoint, method=method, status=status
-        ).inc()
-
 
 @router.get("/models/{model_name}/versions/", summary="특정 모델의 버전 목록 반환")
-async def list_model_versions(model_name: str, request: Request):
-    endpoint = "list_model_versions"
-    method = request.method
-    start_time = time.monotonic()
-    status = "200"  # ← 기본값
-
-    remote_url = f"{REMOTE_ML_SERVICE_URL}/models/{model_name}/versions/"
+async def list_model_versions(
+    model_name: str,
+    request: Request,
+    client: MlClient,
+    cache: ModelCache,
+):
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(remote_url)
-            response.raise_for_status()
-            data = response.json()
-            status = str(response.status_code)
-            return data
+        entry = await _model_versions(client, cache, model_name)
+        return _cached_response(request, entry)
+
+    except UpstreamUnavailableError as e:
+        logging.warning(f"Remote ML unavailable: {e}")
+        raise HTTPException(status_code=e.status_code, detail=str(e))
 
     except Exception as e:
-        status = "500"
-        MODEL_ERROR_COUNT.labels(endpoint=endpoint, method=method).inc()
         logging.error(f"Error listing model versions: {e}", exc_info=True)
         raise HTTPException(
             status_code=500, detail=f"Error listing model versions: {e}"
         )
 
-    finally:
-        duration = time.monotonic() - start_time
-        MODEL_REQUEST_LATENCY.labels(endpoint=endpoint, method=method).observe(duration)
-        MODEL_REQUEST_COUNT.labels(
-            endpoint=endpoint, method=method, status=status
-        ).inc()
+
+@router.post("/models/cache/invalidate", summary="모델 목록/버전 캐시 무효화")
+async def invalidate_model_cache(
+    cache: ModelCache,
+    settings: ModelProxySettingsDep,
+    model_name: Optional[str] = None,
+    x_admin_token: Annotated[Optional[str], Header()] = None,
+):
+    # 토큰이 설정되지 않았으면 누구도 무효화할 수 없다
+    if settings.admin_token is None or not hmac.compare_digest(
+        (x_admin_token or "").encode(), settings.admin_token.encode()
+    ):
+        raise HTTPException(status_code=403, detail="권한이 없습니다.")
+
+    if model_name:
+        # 새 버전 배포 시 해당 모델의 버전 목록과 전체 목록을 함께 비운다
+        invalidated = cache.invalidate(f"versions:{model_name}")
+        invalidated += cache.invalidate("models")
+    else:
+        invalidated = cache.invalidate()
+    return {"invalidated": invalidated}
 
 
 @router.post(
@@ -123,36 +259,32 @@ async def list_model_versions(model_name: str, request: Request):
     summary="버전 미지정 모델 예측",
 )
 async def predict_without_version(
-    model_name: str, request: Request, body: InferenceRequest
+    model_name: str,
+    body: InferenceRequest,
+    client: MlClient,
+    cache: PredictionCacheDep,
+    model_cache: ModelCache,
 ):
-    endpoint = "predict_without_version"
-    method = request.method
-    start_time = time.monotonic()
-    status = "200"  # ← 기본값
-
-    remote_url = f"{REMOTE_ML_SERVICE_URL}/models/predict/{model_name}/"
+    remote_path = f"/models/predict/{model_name}/"
     try:
-        payload = body.model_dump()
-        async with httpx.AsyncClient() as client:
-            response = await client.post(remote_url, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            status = str(response.status_code)
-            return data
+        # 캐시를 쓸 때만 최신 버전을 정해 버전 지정 호출과 같은 키로 캐시한다
+        version = None
+        if cache.enabled:
+            version = await _resolve_latest_version(client, model_cache, model_name)
+        if version is not None:
+            remote_path = f"/models/predict/{model_name}/{version}/"
+        return await _cached_predict(
+            client, cache, remote_path, model_name, version, body
+        )
+
+    except UpstreamUnavailableError as e:
+        logging.warning(f"Remote ML unavailable: {e}")
+        raise HTTPException(status_code=e.status_code, detail=str(e))
 
     except Exception as e:
-        status = "500"
-        MODEL_ERROR_COUNT.labels(endpoint=endpoint, method=method).inc()
         logging.error(f"Prediction failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
 
-    finally:
-        duration = time.monotonic() - start_time
-        MODEL_REQUEST_LATENCY.labels(endpoint=endpoint, method=method).observe(duration)
-        MODEL_REQUEST_COUNT.labels(
-            endpoint=endpoint, method=method, status=status
-        ).inc()
-
 
 @router.post(
     "/models/predict/{model_name}/{version}/",
@@ -160,32 +292,65 @@ async def predict_without_version(
     summary="버전 지정 모델 예측",
 )
 async def predict_with_version(
-    model_name: str, version: str, request: Request, body: InferenceRequest
+    model_name: str,
+    version: str,
+    body: InferenceRequest,
+    client: MlClient,
+    cache: PredictionCacheDep,
 ):
-    endpoint = "predict_with_version"
-    method = request.method
-    start_time = time.monotonic()
-    status = "200"  # ← 기본값
-
-    remote_url = f"{REMOTE_ML_SERVICE_URL}/models/predict/{model_name}/{version}/"
+    remote_path = f"/models/predict/{model_name}/{version}/"
     try:
-        payload = body.model_dump()
-        async with httpx.AsyncClient() as client:
-            response = await client.post(remote_url, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            status = str(response.status_code)
-            return data
+        return await _cached_predict(
+            client, cache, remote_path, model_name, version, body
+        )
+
+    except UpstreamUnavailableError as e:
+        logging.warning(f"Remote ML unavailable: {e}")
+        raise HTTPException(status_code=e.status_code, detail=str(e))
 
     except Exception as e:
-        status = "500"
-        MODEL_ERROR_COUNT.labels(endpoint=endpoint, method=method).inc()
         logging.error(f"Prediction failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
 
-    finally:
-        duration = time.monotonic() - start_time
-        MODEL_REQUEST_LATENCY.labels(endpoint=endpoint, method=method).observe(duration)
-        MODEL_REQUEST_COUNT.labels(
-            endpoint=endpoint, method=method, status=status
-        ).inc()
+
+# NDJSON(한 줄에 입력 행 하나) 또는 고정 길이 원시 바이너리 바디를 받아
+# 배치로 묶어 원격 호출하고, 예측을 입력 순서대로 한 줄씩 NDJSON으로 흘려보낸다
+@router.post(
+    "/models/predict/{model_name}/{version}/bulk",
+    include_in_schema=False,
+    summary="버전 지정 모델 대량 예측 (스트리밍)",
+)
+async def predict_bulk(
+    model_name: str,
+    version: str,
+    request: Request,
+    client: MlClient,
+    settings: ModelProxySettingsDep,
+):
+    remote_path = f"/models/predict/{model_name}/{version}/"
+    send = partial(_send_bulk_batch, client, remote_path, f"{model_name}/{version}")
+    batches = read_bulk_batches(
+        request.stream(), request.headers, settings.bulk_batch_size
+    )
+    predictions = stream_bulk_predictions(batches, send, settings.bulk_max_in_flight)
+    try:
+        # 첫 배치 결과가 나온 뒤 응답을 시작해 입력 오류/원격 장애는 상태 코드로 알린다
+        first = await predictions.__anext__()
+
+    except StopAsyncIteration:
+        raise HTTPException(status_code=400, detail="입력 행이 없습니다.")
+
+    except BulkInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except UpstreamUnavailableError as e:
+        logging.warning(f"Remote ML unavailable: {e}")
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+    except Exception as e:
+        logging.error(f"Bulk prediction failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
+
+    return DuplexStreamingResponse(
+        with_error_trailer(first, predictions), media_type=NDJSON_CONTENT_TYPE
+    )
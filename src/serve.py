@@ -0,0 +1,30 @@
+# 서버 실행 스크립트: WEB_CONCURRENCY 개의 uvicorn 워커로 실행
+# 워커가 2개 이상이면 Prometheus 메트릭을 PROMETHEUS_MULTIPROC_DIR에 모아 /metrics에서 합산
+# 실행: python serve.py
+import os
+
+import uvicorn
+
+
+def main():
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+
+    # 워커가 prometheus_client를 import하기 전에 디렉터리를 비워 둔다
+    from utils.metrics import multiprocess_dir, prepare_multiprocess_dir
+
+    path = multiprocess_dir()
+    if path is not None:
+        prepare_multiprocess_dir(path)
+
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
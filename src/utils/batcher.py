@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Annotated, Awaitable, Callable, Optional
+
+import numpy as np
+from fastapi import Depends, Request
+from prometheus_client import Histogram
+
+# ==============================
+# Prometheus 메트릭 정의
+# ==============================
+PREDICT_BATCH_SIZE = Histogram(
+    "predict_batch_size",
+    "원격 ML 서비스로 한 번에 묶어 보낸 예측 요청 수",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+PREDICT_BATCH_QUEUE_WAIT = Histogram(
+    "predict_batch_queue_wait_seconds",
+    "예측 요청이 배치로 묶이기까지 큐에서 대기한 시간(초)",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+# ==============================
+
+SendBatch = Callable[[np.ndarray], Awaitable[list]]
+
+
+# 동시에 들어온 예측 요청을 최대 N개 / T밀리초 단위로 묶어 한 번에 호출한다
+class MicroBatcher:
+    def __init__(
+        self,
+        send_batch: SendBatch,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 2.0,
+        split_on_error: Optional[Callable[[Exception], bool]] = None,
+    ):
+        self.send_batch = send_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        # True를 반환하는 에러는 입력 문제로 보고 요청별로 다시 보내 격리한다
+        self.split_on_error = split_on_error
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight = set()
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        # 아직 배치로 묶이지 못한 요청은 실패 처리
+        pending = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._fail(pending, RuntimeError("배치 처리기가 종료되었습니다."))
+
+    # 입력 하나(첫 축이 배치 축)를 제출하고 해당 입력의 예측 결과 행들을 받는다
+    async def submit(self, inputs: np.ndarray) -> list:
+        if self._task is None:
+            raise RuntimeError("배치 처리기가 시작되지 않았습니다.")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((inputs, future, time.monotonic()))
+        return await future
+
+    async def _collect(self):
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                await self._fill(batch)
+            except asyncio.CancelledError:
+                self._fail(batch, RuntimeError("배치 처리기가 종료되었습니다."))
+                raise
+
+            # 다음 배치 수집이 막히지 않도록 전송은 별도 태스크에서 수행
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _fill(self, batch):
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                return
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                return
+
+    @staticmethod
+    def _fail(batch, error: Exception):
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _dispatch(self, batch):
+        now = time.monotonic()
+        live = []
+        for inputs, future, enqueued_at in batch:
+            PREDICT_BATCH_QUEUE_WAIT.observe(now - enqueued_at)
+            # 대기 중 클라이언트가 끊겨 취소된 요청은 보내지 않는다
+            if not future.done():
+                live.append((inputs, future))
+
+        # 모양이 다른 입력은 함께 쌓을 수 없으므로 shape별로 나눠 보낸다
+        groups = {}
+        for inputs, future in live:
+            groups.setdefault(inputs.shape[1:], []).append((inputs, future))
+        await asyncio.gather(*(self._send_group(group) for group in groups.values()))
+
+    async def _send_group(self, group):
+        PREDICT_BATCH_SIZE.observe(len(group))
+        stacked = np.concatenate([inputs for inputs, _ in group], axis=0)
+        try:
+            predictions = await self.send_batch(stacked)
+            if len(predictions) != len(stacked):
+                raise ValueError(
+                    f"예측 결과 수({len(predictions)})가 입력 수({len(stacked)})와 "
+                    "다릅니다."
+                )
+        except Exception as e:
+            if len(group) > 1 and self.split_on_error and self.split_on_error(e):
+                logging.warning(f"배치 예측 실패, 요청별로 재시도합니다: {e}")
+                await asyncio.gather(*(self._send_group([item]) for item in group))
+                return
+            for _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for inputs, future in group:
+            rows = len(inputs)
+            if not future.done():
+                future.set_result(predictions[offset : offset + rows])
+            offset += rows
+
+
+def create_predict_batcher(
+    send_batch: SendBatch,
+    split_on_error: Optional[Callable[[Exception], bool]] = None,
+) -> MicroBatcher:
+    return MicroBatcher(
+        send_batch,
+        max_batch_size=int(os.getenv("PREDICT_BATCH_MAX_SIZE", "16")),
+        max_wait_ms=float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "2")),
+        split_on_error=split_on_error,
+    )
+
+
+def get_predict_batcher(request: Request) -> MicroBatcher:
+    return request.app.state.predict_batcher
+
+
+PredictBatcher = Annotated[MicroBatcher, Depends(get_predict_batcher)]
@@ -0,0 +1,222 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Awaitable, Callable, List, Mapping, Optional
+
+import numpy as np
+from fastapi.responses import StreamingResponse
+from prometheus_client import Counter
+
+from utils.payload_codec import DTYPE_HEADER, SHAPE_HEADER, SUPPORTED_DTYPES
+
+# ==============================
+# Prometheus 메트릭 정의
+# ==============================
+BULK_ROWS = Counter("model_bulk_rows_total", "대량 추론으로 처리한 입력 행 수")
+BULK_BATCHES = Counter(
+    "model_bulk_batches_total",
+    "대량 추론에서 원격 ML 서비스로 보낸 배치 수",
+    ["result"],
+)
+# ==============================
+
+# 한 줄(한 행)의 최대 크기. 줄바꿈 없는 거대한 바디로 메모리가 늘어나는 것을 막는다
+MAX_LINE_BYTES = 1024 * 1024
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+RAW_CONTENT_TYPE = "application/octet-stream"
+
+# 배치 하나(원격 요청 바디) → 예측 행 목록
+SendBulkBatch = Callable[[bytes, int], Awaitable[list]]
+
+
+# 잘못된 입력 (스트리밍 시작 전이면 400, 이후면 마지막 에러 줄로 알림)
+class BulkInputError(ValueError):
+    pass
+
+
+# NDJSON: 한 줄에 숫자 배열 하나. 파싱은 검증용으로만 하고 원문 바이트를 그대로 이어 붙인다
+async def _ndjson_batches(
+    chunks: AsyncIterator[bytes], batch_size: int
+) -> AsyncIterator[List[bytes]]:
+    buffer = bytearray()
+    batch: List[bytes] = []
+    width = None
+    # 오류 메시지의 줄 번호 (1부터, 빈 줄 포함해 요청 본문의 줄과 일치)
+    line_no = 0
+
+    def parse(line: bytes) -> Optional[bytes]:
+        nonlocal width, line_no
+        line_no += 1
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            values = np.asarray(json.loads(line), dtype=np.float64)
+        except (ValueError, TypeError):
+            raise BulkInputError(f"{line_no}번째 줄이 숫자 배열이 아닙니다.")
+        if values.ndim != 1:
+            raise BulkInputError(f"{line_no}번째 줄이 1차원 배열이 아닙니다.")
+        if width is None:
+            width = values.shape[0]
+        elif values.shape[0] != width:
+            raise BulkInputError(
+                f"{line_no}번째 줄의 길이({values.shape[0]})가 "
+                f"첫 행({width})과 다릅니다."
+            )
+        return line
+
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end < 0:
+                break
+            line = parse(bytes(buffer[start:end]))
+            start = end + 1
+            if line is not None:
+                batch.append(line)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        del buffer[:start]
+        if len(buffer) > MAX_LINE_BYTES:
+            raise BulkInputError(f"한 행이 {MAX_LINE_BYTES}바이트를 넘습니다.")
+
+    line = parse(bytes(buffer))
+    if line is not None:
+        batch.append(line)
+    if batch:
+        yield batch
+
+
+def _json_body(rows: List[bytes]) -> bytes:
+    return b'{"inputs":[' + b",".join(rows) + b"]}"
+
+
+# 원시 바이너리: 고정 길이 행의 연속 (payload_codec의 raw 포맷과 같은 헤더 사용)
+# X-Tensor-Shape의 마지막 값이 행 길이, X-Tensor-Dtype은 float32(기본) | uint8
+def _raw_row_format(headers: Mapping[str, str]):
+    dtype_name = headers.get(DTYPE_HEADER, "float32")
+    if dtype_name not in SUPPORTED_DTYPES:
+        raise BulkInputError(f"지원하지 않는 dtype입니다: {dtype_name}")
+    shape_value = headers.get(SHAPE_HEADER)
+    if not shape_value:
+        raise BulkInputError(f"{SHAPE_HEADER} 헤더가 필요합니다.")
+    try:
+        width = int(shape_value.split(",")[-1])
+    except ValueError:
+        raise BulkInputError(f"잘못된 {SHAPE_HEADER} 헤더입니다: {shape_value}")
+    if width <= 0:
+        raise BulkInputError(f"잘못된 {SHAPE_HEADER} 헤더입니다: {shape_value}")
+    return SUPPORTED_DTYPES[dtype_name], width
+
+
+async def _raw_batches(
+    chunks: AsyncIterator[bytes], headers: Mapping[str, str], batch_size: int
+) -> AsyncIterator[np.ndarray]:
+    dtype, width = _raw_row_format(headers)
+    batch_bytes = dtype.itemsize * width * batch_size
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= batch_bytes:
+            yield np.frombuffer(bytes(buffer[:batch_bytes]), dtype=dtype)
+            del buffer[:batch_bytes]
+    if len(buffer) % (dtype.itemsize * width):
+        raise BulkInputError("바디 길이가 행 크기의 배수가 아닙니다.")
+    if buffer:
+        yield np.frombuffer(bytes(buffer), dtype=dtype)
+
+
+# 요청 바디를 배치 단위의 원격 요청 바디(JSON {"inputs": [...]})와 행 수로 나눈다
+async def read_bulk_batches(
+    chunks: AsyncIterator[bytes], headers: Mapping[str, str], batch_size: int
+) -> AsyncIterator[tuple]:
+    content_type = headers.get("content-type", NDJSON_CONTENT_TYPE)
+    content_type = content_type.split(";")[0].strip()
+    if content_type == RAW_CONTENT_TYPE:
+        _, width = _raw_row_format(headers)
+        async for values in _raw_batches(chunks, headers, batch_size):
+            rows = values.reshape(-1, width)
+            yield json.dumps({"inputs": rows.tolist()}).encode(), len(rows)
+    elif content_type in (NDJSON_CONTENT_TYPE, "application/jsonl", "text/plain"):
+        async for rows in _ndjson_batches(chunks, batch_size):
+            yield _json_body(rows), len(rows)
+    else:
+        raise BulkInputError(f"지원하지 않는 Content-Type입니다: {content_type}")
+
+
+# 배치를 읽는 대로 원격 호출을 시작하되 동시에 max_in_flight개까지만 진행하고,
+# 결과는 입력 순서대로 한 행씩 NDJSON 줄로 내보낸다
+# 응답을 내보내는 속도보다 입력이 빠르면 바디 읽기를 멈추므로 메모리는 작업 크기와 무관하다
+async def stream_bulk_predictions(
+    batches: AsyncIterator[tuple],
+    send: SendBulkBatch,
+    max_in_flight: int = 4,
+) -> AsyncIterator[bytes]:
+    slots = asyncio.Semaphore(max(1, max_in_flight))
+    pending: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        try:
+            async for body, rows in batches:
+                await slots.acquire()
+                await pending.put(asyncio.ensure_future(send(body, rows)))
+        except Exception as e:
+            await pending.put(e)
+        else:
+            await pending.put(None)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            try:
+                predictions = await item
+            except Exception:
+                BULK_BATCHES.labels(result="error").inc()
+                raise
+            finally:
+                slots.release()
+            BULK_BATCHES.labels(result="ok").inc()
+            BULK_ROWS.inc(len(predictions))
+            yield b"".join(
+                json.dumps(prediction, separators=(",", ":")).encode() + b"\n"
+                for prediction in predictions
+            )
+    finally:
+        # 클라이언트가 끊겼거나 실패한 경우 남은 원격 호출을 정리
+        producer.cancel()
+        while not pending.empty():
+            item = pending.get_nowait()
+            if isinstance(item, asyncio.Future):
+                item.cancel()
+
+
+# 응답을 시작한 뒤의 실패는 상태 코드를 바꿀 수 없으므로 마지막 줄에 에러를 알린다
+# (클라이언트는 받은 예측 줄 수로 몇 번째 행부터 다시 보내면 되는지 알 수 있다)
+async def with_error_trailer(
+    first: bytes, rest: AsyncIterator[bytes]
+) -> AsyncIterator[bytes]:
+    yield first
+    try:
+        async for chunk in rest:
+            yield chunk
+    except Exception as e:
+        logging.warning(f"대량 추론 중단: {e}")
+        yield json.dumps({"error": str(e)}, ensure_ascii=False).encode() + b"\n"
+
+
+# 요청 바디를 읽는 동안 응답을 보내는 스트리밍 응답
+# StreamingResponse는 연결 종료를 감지하려고 receive()를 따로 호출하는데,
+# 그러면 아직 읽지 않은 요청 바디를 가로채므로 응답 전송만 한다
+# (연결이 끊기면 바디 읽기에서 ClientDisconnect가 발생해 처리가 멈춘다)
+class DuplexStreamingResponse(StreamingResponse):
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
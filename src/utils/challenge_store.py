@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Annotated, Optional
+
+from fastapi import Depends, Request
+from prometheus_client import Counter, Gauge
+
+from utils.id_gen import generate_captcha_id
+
+# ==============================
+# Prometheus 메트릭 정의
+# ==============================
+# 워커마다 따로 가진 저장소(memory, signed의 재사용 필터)는 워커별 값의 합계
+CAPTCHA_STORE_SIZE = Gauge(
+    "captcha_store_entries",
+    "캡차 문제 저장소에 보관 중인 항목 수 (워커 합계)",
+    ["backend"],
+    multiprocess_mode="livesum",
+)
+# 여러 워커가 같은 Redis를 공유하므로 같은 값을 중복 합산하지 않도록 최댓값을 사용
+CAPTCHA_SHARED_STORE_SIZE = Gauge(
+    "captcha_shared_store_entries",
+    "워커들이 공유하는 캡차 문제 저장소(redis)에 보관 중인 항목 수",
+    ["backend"],
+    multiprocess_mode="livemax",
+)
+CAPTCHA_STORE_EVICTIONS = Counter(
+    "captcha_store_evictions_total",
+    "캡차 문제 저장소에서 제거된 항목 수",
+    ["backend", "reason"],
+)
+# ==============================
+
+
+# 캡차 ID → 정답 저장소 인터페이스
+class ChallengeStore(ABC):
+    backend = "base"
+
+    # 새 캡차 ID를 발급한다 (정답은 저장소에 두거나 ID 자체에 담는다)
+    @abstractmethod
+    async def issue(self, expected: str) -> str: ...
+
+    # 정답을 조회만 하고 항목은 남겨 둔다
+    @abstractmethod
+    async def get(self, challenge_id: str) -> Optional[str]: ...
+
+    # 정답을 꺼내면서 삭제한다 (한 번만 사용 가능)
+    @abstractmethod
+    async def consume(self, challenge_id: str) -> Optional[str]: ...
+
+    # 백그라운드 작업이 필요한 저장소는 lifespan에서 시작 (선택 구현)
+    async def start(self) -> None:  # noqa: B027
+        pass
+
+    async def close(self) -> None:  # noqa: B027
+        pass
+
+
+# 무작위 ID를 만들고 ID → 정답을 저장하는 저장소의 공통 부분
+class KeyValueChallengeStore(ChallengeStore):
+    async def issue(self, expected: str) -> str:
+        challenge_id = generate_captcha_id()
+        await self.put(challenge_id, expected)
+        return challenge_id
+
+    @abstractmethod
+    async def put(self, challenge_id: str, expected: str) -> None: ...
+
+
+# 프로세스 내 TTL 저장소 (항목 수 상한 있음)
+# 모든 항목의 TTL이 같아 발급 순서 = 만료 순서이므로, 조회해도 순서를 바꾸지 않고
+# 상한을 넘으면 가장 먼저 발급된 항목부터 버린다 (FIFO). 만료 정리도 앞쪽만 보면 된다
+class MemoryChallengeStore(KeyValueChallengeStore):
+    backend = "memory"
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 100_000):
+        self.ttl = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        # challenge_id → (expected, expires_at), 발급(= 만료) 순으로 정렬
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # set_function은 멀티 워커 모드에서 수집되지 않으므로 변경 시 직접 기록
+        self._size = CAPTCHA_STORE_SIZE.labels(backend=self.backend)
+
+    def _purge_expired(self, now: float):
+        # TTL이 모두 같으므로 앞쪽(가장 오래된 항목)부터 만료 여부만 보면 된다
+        while self._entries:
+            challenge_id, (_, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[challenge_id]
+            CAPTCHA_STORE_EVICTIONS.labels(backend=self.backend, reason="expired").inc()
+
+    async def put(self, challenge_id: str, expected: str) -> None:
+        now = time.monotonic()
+        self._purge_expired(now)
+        self._entries[challenge_id] = (expected, now + self.ttl)
+        self._entries.move_to_end(challenge_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            CAPTCHA_STORE_EVICTIONS.labels(
+                backend=self.backend, reason="capacity"
+            ).inc()
+        self._size.set(len(self._entries))
+
+    def _lookup(self, challenge_id: str, now: float) -> Optional[str]:
+        entry = self._entries.get(challenge_id)
+        if entry is None:
+            return None
+        expected, expires_at = entry
+        if expires_at <= now:
+            del self._entries[challenge_id]
+            CAPTCHA_STORE_EVICTIONS.labels(backend=self.backend, reason="expired").inc()
+            return None
+        return expected
+
+    async def get(self, challenge_id: str) -> Optional[str]:
+        return self._lookup(challenge_id, time.monotonic())
+
+    async def consume(self, challenge_id: str) -> Optional[str]:
+        expected = self._lookup(challenge_id, time.monotonic())
+        if expected is not None:
+            del self._entries[challenge_id]
+        self._size.set(len(self._entries))
+        return expected
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Redis 호환 저장소 (워커/레플리카 간 공유, 만료는 Redis TTL에 맡김)
+# 항목 수는 {prefix}index 정렬 집합(점수 = 만료 시각 ms)으로 관리해
+# 요청 경로에서 키 전체를 훑지 않고, 주기적인 정리/집계는 백그라운드 작업에서 한다
+class RedisChallengeStore(KeyValueChallengeStore):
+    backend = "redis"
+
+    def __init__(
+        self,
+        client,
+        ttl_seconds: float = 300,
+        key_prefix: str = "captcha:",
+        size_refresh_seconds: float = 10,
+    ):
+        self.client = client
+        self.ttl = ttl_seconds
+        self.key_prefix = key_prefix
+        self.index_key = f"{key_prefix}index"
+        self.size_refresh = size_refresh_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def _key(self, challenge_id: str) -> str:
+        return f"{self.key_prefix}{challenge_id}"
+
+    async def start(self) -> None:
+        if self.size_refresh > 0 and self._task is None:
+            self._task = asyncio.create_task(self._size_loop())
+
+    # 만료된 ID를 색인에서 지우고 남은 개수를 기록 (O(log N + 만료 수))
+    async def refresh_size(self) -> int:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(self.index_key, "-inf", int(time.time() * 1000))
+            pipe.zcard(self.index_key)
+            _, count = await pipe.execute()
+        CAPTCHA_SHARED_STORE_SIZE.labels(backend=self.backend).set(count)
+        return count
+
+    async def _size_loop(self):
+        while True:
+            try:
+                await self.refresh_size()
+            except Exception as e:
+                logging.warning(f"캡차 저장소 크기 집계 실패: {e}")
+            await asyncio.sleep(self.size_refresh)
+
+    async def put(self, challenge_id: str, expected: str) -> None:
+        ttl_ms = int(self.ttl * 1000)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(challenge_id), expected, px=ttl_ms)
+            pipe.zadd(self.index_key, {challenge_id: int(time.time() * 1000) + ttl_ms})
+            await pipe.execute()
+
+    async def get(self, challenge_id: str) -> Optional[str]:
+        value = await self.client.get(self._key(challenge_id))
+        return _to_str(value)
+
+    async def consume(self, challenge_id: str) -> Optional[str]:
+        # GETDEL은 원자적이라 여러 워커가 같은 ID를 동시에 소비해도 한 번만 성공
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.getdel(self._key(challenge_id))
+            pipe.zrem(self.index_key, challenge_id)
+            value, _ = await pipe.execute()
+        return _to_str(value)
+
+    async def close(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.client.aclose()
+
+
+def _to_str(value) -> Optional[str]:
+    if value is None:
+        return None
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _create_redis_client(url: str):
+    # "fakeredis://"는 로컬 개발/테스트용 인메모리 Redis 대체품
+    if url.startswith("fakeredis://"):
+        try:
+            from fakeredis import FakeAsyncRedis
+        except ImportError:
+            raise RuntimeError("fakeredis 패키지가 설치되어 있지 않습니다.")
+        return FakeAsyncRedis()
+
+    try:
+        from redis.asyncio import Redis
+    except ImportError:
+        raise RuntimeError(
+            "CAPTCHA_STORE_BACKEND=redis 사용 시 redis 패키지가 필요합니다."
+        )
+    return Redis.from_url(url)
+
+
+def create_challenge_store() -> ChallengeStore:
+    backend = os.getenv("CAPTCHA_STORE_BACKEND", "memory")
+    ttl_seconds = float(os.getenv("CAPTCHA_STORE_TTL_SECONDS", "300"))
+
+    if backend == "memory":
+        # 워커마다 저장소가 따로이므로 다른 워커로 간 /predict는 ID를 찾지 못한다
+        if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+            logging.warning(
+                "여러 워커에서 memory 캡차 저장소를 사용 중입니다. "
+                "CAPTCHA_STORE_BACKEND=redis를 사용하세요."
+            )
+        max_entries = int(os.getenv("CAPTCHA_STORE_MAX_ENTRIES", "100000"))
+        return MemoryChallengeStore(ttl_seconds=ttl_seconds, max_entries=max_entries)
+    if backend == "redis":
+        url = os.getenv("CAPTCHA_STORE_REDIS_URL", "redis://localhost:6379/0")
+        return RedisChallengeStore(_create_redis_client(url), ttl_seconds=ttl_seconds)
+    if backend == "signed":
+        # 저장소 없이 서명 토큰을 캡차 ID로 사용 (utils.signed_challenge)
+        from utils.signed_challenge import create_signed_challenge_store
+
+        return create_signed_challenge_store(ttl_seconds)
+    raise ValueError(f"알 수 없는 캡차 저장소 백엔드입니다: {backend}")
+
+
+def get_challenge_store(request: Request) -> ChallengeStore:
+    return request.app.state.challenge_store
+
+
+ChallengeStoreDep = Annotated[ChallengeStore, Depends(get_challenge_store)]
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Annotated, List, Optional, Tuple
+
+from fastapi import Depends, Request
+from PIL import Image
+from prometheus_client import Counter, Gauge, Histogram
+
+from utils.image_label_store import ImageLabelStore
+from utils.paths import SAVE_DIR
+
+# ==============================
+# Prometheus 메트릭 정의
+# ==============================
+DATASET_QUEUE_DEPTH = Gauge(
+    "dataset_capture_queue_depth",
+    "저장 대기 중인 데이터셋 캡처 수",
+    multiprocess_mode="livesum",
+)
+DATASET_QUEUE_LAG = Histogram(
+    "dataset_capture_lag_seconds",
+    "캡처가 큐에 들어간 뒤 디스크에 기록되기까지 걸린 시간(초)",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+DATASET_CAPTURES_WRITTEN = Counter(
+    "dataset_captures_written_total", "디스크에 기록된 데이터셋 캡처 수"
+)
+DATASET_CAPTURES_DROPPED = Counter(
+    "dataset_captures_dropped_total", "저장하지 않고 버린 데이터셋 캡처 수", ["reason"]
+)
+# ==============================
+
+# (파일명, 이미지, 라벨, 큐 진입 시각)
+Capture = Tuple[str, Image.Image, Optional[str], float]
+
+_STOP = object()
+
+
+# 캡처 이미지/라벨을 큐에 모았다가 백그라운드에서 묶어서 기록한다
+class DatasetWriter:
+    def __init__(
+        self,
+        label_store: ImageLabelStore,
+        save_dir: str = SAVE_DIR,
+        max_queue: int = 1000,
+        flush_size: int = 64,
+        flush_interval_ms: float = 500,
+        sample_rate: float = 1.0,
+    ):
+        self.label_store = label_store
+        self.save_dir = save_dir
+        self.max_queue = max(1, max_queue)
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000
+        self.sample_rate = sample_rate
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # 남은 캡처를 모두 기록한 뒤 종료
+        task, self._task = self._task, None
+        if task is None:
+            return
+        self._queue.put_nowait(_STOP)
+        await task
+
+    # 요청 처리 경로에서 호출: 블로킹 없이 큐에 넣고, 넘치면 버린다
+    def submit(self, filename: str, image: Image.Image, label: Optional[str]) -> bool:
+        if self._task is None:
+            DATASET_CAPTURES_DROPPED.labels(reason="stopped").inc()
+            return False
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            DATASET_CAPTURES_DROPPED.labels(reason="sampled").inc()
+            return False
+        if self._queue.qsize() >= self.max_queue:
+            DATASET_CAPTURES_DROPPED.labels(reason="overflow").inc()
+            return False
+        self._queue.put_nowait((filename, image, label, time.monotonic()))
+        DATASET_QUEUE_DEPTH.inc()
+        return True
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.flush_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except Exception as e:
+                DATASET_CAPTURES_DROPPED.labels(reason="error").inc(len(batch))
+                logging.error(f"데이터셋 저장 오류: {e}", exc_info=True)
+            finally:
+                DATASET_QUEUE_DEPTH.dec(len(batch))
+
+    def _write_batch(self, batch: List[Capture]):
+        os.makedirs(self.save_dir, exist_ok=True)
+        rows = []
+        for filename, image, label, enqueued_at in batch:
+            # 임시 파일에 쓴 뒤 rename해 읽는 쪽이 쓰다 만 PNG를 보지 않도록 한다
+            path = os.path.join(self.save_dir, filename)
+            tmp_path = os.path.join(self.save_dir, f".{filename}.tmp")
+            image.save(tmp_path, format="PNG")
+            os.replace(tmp_path, path)
+            if label:
+                rows.append((filename, label))
+            DATASET_QUEUE_LAG.observe(time.monotonic() - enqueued_at)
+
+        if rows:
+            self.label_store.save_labels(rows)
+        DATASET_CAPTURES_WRITTEN.inc(len(batch))
+
+
+def create_dataset_writer(label_store: ImageLabelStore) -> DatasetWriter:
+    return DatasetWriter(
+        label_store,
+        max_queue=int(os.getenv("DATASET_QUEUE_SIZE", "1000")),
+        flush_size=int(os.getenv("DATASET_FLUSH_SIZE", "64")),
+        flush_interval_ms=float(os.getenv("DATASET_FLUSH_INTERVAL_MS", "500")),
+        sample_rate=float(os.getenv("DATASET_SAMPLE_RATE", "1.0")),
+    )
+
+
+def get_dataset_writer(request: Request) -> DatasetWriter:
+    return request.app.state.dataset_writer
+
+
+DatasetWriterDep = Annotated[DatasetWriter, Depends(get_dataset_writer)]
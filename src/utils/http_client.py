@@ -0,0 +1,123 @@
+import logging
+import os
+import time
+from typing import Annotated
+
+import httpx
+from fastapi import Depends, Request
+from prometheus_client import Gauge, Histogram
+
+# ==============================
+# Prometheus 메트릭 정의
+# ==============================
+# 원격 ML 커넥션 풀 관련
+REMOTE_ML_POOL_IN_USE = Gauge(
+    "remote_ml_pool_requests_in_flight",
+    "커넥션 풀에서 처리 중인 원격 ML 요청 수",
+    multiprocess_mode="livesum",
+)
+REMOTE_ML_POOL_MAX = Gauge(
+    "remote_ml_pool_max_connections",
+    "커넥션 풀 최대 연결 수 설정값 (워커 합계)",
+    multiprocess_mode="livesum",
+)
+REMOTE_ML_POOL_WAIT = Histogram(
+    "remote_ml_pool_wait_seconds",
+    "커넥션 풀에서 연결을 얻기까지 대기한 시간(초)",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+# ==============================
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+# 진행 중인 요청 수와 풀 대기 시간을 기록하는 transport 래퍼
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.monotonic()
+        acquired = False
+        user_trace = request.extensions.get("trace")
+
+        # httpcore는 풀에서 연결을 얻은 뒤에야 trace 이벤트를 발생시키므로
+        # 첫 이벤트까지의 시간을 풀 대기 시간으로 본다.
+        async def trace(event_name, info):
+            nonlocal acquired
+            if not acquired:
+                acquired = True
+                REMOTE_ML_POOL_WAIT.observe(time.monotonic() - start)
+            if user_trace is not None:
+                ret = user_trace(event_name, info)
+                if hasattr(ret, "__await__"):
+                    await ret
+
+        request.extensions["trace"] = trace
+        REMOTE_ML_POOL_IN_USE.inc()
+        try:
+            return await self._transport.handle_async_request(request)
+        finally:
+            REMOTE_ML_POOL_IN_USE.dec()
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_http_client() -> httpx.AsyncClient:
+    # .env 로딩 이후(lifespan 시점)에 설정을 읽도록 함수 안에서 조회
+    max_connections = _env_int("REMOTE_ML_MAX_CONNECTIONS", 100)
+    max_keepalive = _env_int("REMOTE_ML_MAX_KEEPALIVE", 20)
+    keepalive_expiry = _env_float("REMOTE_ML_KEEPALIVE_EXPIRY", 30.0)
+    http2 = _env_bool("REMOTE_ML_HTTP2")
+
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logging.warning(
+                "h2 패키지가 없어 HTTP/2 설정을 무시하고 HTTP/1.1을 사용합니다."
+            )
+            http2 = False
+
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive,
+        keepalive_expiry=keepalive_expiry,
+    )
+    timeout = httpx.Timeout(
+        connect=_env_float("REMOTE_ML_CONNECT_TIMEOUT", 3.0),
+        read=_env_float("REMOTE_ML_READ_TIMEOUT", 10.0),
+        write=_env_float("REMOTE_ML_WRITE_TIMEOUT", 10.0),
+        pool=_env_float("REMOTE_ML_POOL_TIMEOUT", 5.0),
+    )
+    transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+
+    REMOTE_ML_POOL_MAX.set(max_connections)
+    return httpx.AsyncClient(
+        transport=InstrumentedTransport(transport),
+        timeout=timeout,
+    )
+
+
+# 라우터에서 Depends로 주입받는 앱 공용 클라이언트
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    return request.app.state.http_client
+
+
+HttpClient = Annotated[httpx.AsyncClient, Depends(get_http_client)]
@@ -1,33 +1,184 @@
 import csv
+import io
+import logging
 import os
-from typing import Dict, Optional
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, TextIO, Tuple
 
+# 예전 버전이 사용하던 CSV 파일 (있으면 최초 연결 시 DB로 가져온다)
 LABELS_CSV_PATH = os.path.join("static", "images", "labels.csv")
+DEFAULT_LABELS_DB_PATH = os.path.join("static", "labels.db")
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL UNIQUE,
+    label TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS labels_created_at ON labels (created_at);
+"""
 
-# labels.csv에 label을 저장(추가 또는 업데이트)
-def save_label(filename: str, label: str):
-    os.makedirs(os.path.dirname(LABELS_CSV_PATH), exist_ok=True)
-    file_exists = os.path.exists(LABELS_CSV_PATH)
-    with open(LABELS_CSV_PATH, "a", newline="") as csvfile:
-        writer = csv.writer(csvfile)
-        if not file_exists:
-            writer.writerow(["filename", "label"])
-        writer.writerow([filename, label])
-
-
-# labels.csv 전체를 dict로 반환
-def load_labels() -> Dict[str, str]:
-    labels = {}
-    if os.path.exists(LABELS_CSV_PATH):
-        with open(LABELS_CSV_PATH, newline="") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                labels[row["filename"]] = row["label"]
-    return labels
-
-
-# labels.csv에서 label을 조회
-def get_label(filename: str) -> Optional[str]:
-    labels = load_labels()
-    return labels.get(filename)
+
+class LabelRecord(NamedTuple):
+    seq: int
+    filename: str
+    label: str
+    created_at: float
+
+
+# 파일명 → 라벨을 SQLite(WAL)에 저장하고 seq 순서로 읽어 오는 저장소
+class ImageLabelStore:
+    def __init__(
+        self,
+        db_path: str = DEFAULT_LABELS_DB_PATH,
+        legacy_csv_path: str = LABELS_CSV_PATH,
+    ):
+        self.db_path = db_path
+        self.legacy_csv_path = legacy_csv_path
+        # 스레드(및 프로세스)마다 별도 연결을 사용
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        local = self._local
+        conn = getattr(local, "conn", None)
+        # fork된 워커 프로세스는 부모의 연결을 물려받으므로 새로 연다
+        if conn is not None and local.pid == os.getpid():
+            return conn
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._import_legacy_csv(conn)
+
+        local.conn = conn
+        local.pid = os.getpid()
+        return conn
+
+    def _import_legacy_csv(self, conn: sqlite3.Connection):
+        path = self.legacy_csv_path
+        if not os.path.exists(path):
+            return
+        # 여러 워커가 동시에 시작해도 한 번만 가져오도록 쓰기 잠금을 잡고 확인
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if os.path.exists(path):
+                now = time.time()
+                with open(path, newline="") as csvfile:
+                    rows = [
+                        (row["filename"], row["label"], now)
+                        for row in csv.DictReader(csvfile)
+                    ]
+                # 중복 파일명은 뒤쪽(최신) 값으로 정리된다
+                conn.executemany(
+                    "INSERT OR REPLACE INTO labels (filename, label, created_at) "
+                    "VALUES (?, ?, ?)",
+                    rows,
+                )
+                os.replace(path, path + ".imported")
+                logging.info(f"labels.csv에서 {len(rows)}개 라벨을 가져왔습니다.")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # label을 저장(추가 또는 업데이트)
+    def save_label(self, filename: str, label: str):
+        self.save_labels([(filename, label)])
+
+    # 여러 행을 한 트랜잭션으로 저장. 이미 있는 파일명은 새 seq로 갱신된다
+    def save_labels(self, rows: Iterable[Tuple[str, str]]):
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO labels (filename, label, created_at) "
+                "VALUES (?, ?, ?)",
+                ((filename, label, now) for filename, label in rows),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # seq 순서로 라벨을 조금씩 읽어 온다 (전체를 메모리에 올리지 않음)
+    def iter_labels(
+        self, after_seq: int = 0, batch_size: int = 1000
+    ) -> Iterator[LabelRecord]:
+        conn = self._connect()
+        while True:
+            rows = conn.execute(
+                "SELECT seq, filename, label, created_at FROM labels "
+                "WHERE seq > ? ORDER BY seq LIMIT ?",
+                (after_seq, batch_size),
+            ).fetchall()
+            for row in rows:
+                yield LabelRecord(*row)
+            if len(rows) < batch_size:
+                return
+            after_seq = rows[-1][0]
+
+    # 가장 최근에 저장된 라벨의 seq (비어 있으면 0)
+    def max_seq(self) -> int:
+        row = self._connect().execute("SELECT MAX(seq) FROM labels").fetchone()
+        return row[0] or 0
+
+    # 주어진 시각 이후 저장된 첫 라벨 직전의 seq (증분 내보내기 커서로 사용)
+    def seq_before_time(self, timestamp: float) -> int:
+        row = (
+            self._connect()
+            .execute("SELECT MIN(seq) FROM labels WHERE created_at > ?", (timestamp,))
+            .fetchone()
+        )
+        return row[0] - 1 if row[0] is not None else self.max_seq()
+
+    # 전체 라벨을 dict로 반환
+    def load_labels(self) -> Dict[str, str]:
+        return {record.filename: record.label for record in self.iter_labels()}
+
+    # 파일명으로 label 조회 (인덱스 조회)
+    def get_label(self, filename: str) -> Optional[str]:
+        row = (
+            self._connect()
+            .execute("SELECT label FROM labels WHERE filename = ?", (filename,))
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    # labels.csv 형식(filename,label)의 텍스트를 batch_rows 행씩 잘라 내보낸다
+    # records를 주면 저장소를 다시 조회하지 않고 해당 라벨만 내보낸다
+    def iter_labels_csv(
+        self,
+        after_seq: int = 0,
+        batch_rows: int = 1000,
+        records: Optional[Iterable[LabelRecord]] = None,
+    ) -> Iterator[str]:
+        if records is None:
+            records = self.iter_labels(after_seq=after_seq, batch_size=batch_rows)
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(["filename", "label"])
+        rows = 0
+        for record in records:
+            writer.writerow([record.filename, record.label])
+            rows += 1
+            if rows % batch_rows == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+
+    # labels.csv 형식으로 내보내기
+    def write_labels_csv(self, out: TextIO, after_seq: int = 0):
+        for chunk in self.iter_labels_csv(after_seq=after_seq):
+            out.write(chunk)
+
+
+# LABELS_DB_PATH: 라벨 DB 파일 경로 (.env 로딩 이후 lifespan에서 읽는다)
+def create_label_store() -> ImageLabelStore:
+    return ImageLabelStore(os.getenv("LABELS_DB_PATH", DEFAULT_LABELS_DB_PATH))
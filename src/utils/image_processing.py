@@ -1,74 +1,246 @@
-import base64
+import binascii
 import io
 import os
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 
 import numpy as np
-import torch
-from PIL import Image, ImageOps
-from torchvision import transforms
+from PIL import Image
 
-from utils.image_label_store import save_label
+# 모델 입력 크기와 MNIST 정규화 상수
+INPUT_SIZE = 28
+MNIST_MEAN = 0.1307
+MNIST_STD = 0.3081
 
 
-def center_image(image: Image.Image, padding: int = 20) -> Image.Image:
-    img_array = np.array(image)
-    if img_array.max() == 0:
-        return image
+# 입력 이미지 상한 (디코딩된 파일 바이트 수, 픽셀 수)과 프론트 캔버스 크기
+# 캔버스보다 2배 이상 큰 입력은 디코딩 시 target_size 근처로 줄인다
+# 워커 프로세스로도 그대로 넘길 수 있도록 NamedTuple로 둔다
+class ImageLimits(NamedTuple):
+    max_bytes: int = 1024 * 1024
+    max_pixels: int = 2048 * 2048
+    target_size: int = 280
 
-    binarized = (img_array < 200).astype(np.uint8)
-    coords = np.argwhere(binarized)
-    if coords.size == 0:
-        return image
 
-    y0, x0 = coords.min(axis=0)
-    y1, x1 = coords.max(axis=0) + 1
-    cropped = image.crop((x0, y0, x1, y1))
+DEFAULT_IMAGE_LIMITS = ImageLimits()
 
-    padded_image = ImageOps.expand(cropped, border=padding // 2, fill=255)
-    max_dim = max(padded_image.size)
-    squared_image = ImageOps.pad(padded_image, (max_dim, max_dim), color=255)
-    return squared_image
 
+# .env 로딩 이후(lifespan 시점)에 읽는다
+def create_image_limits() -> ImageLimits:
+    return ImageLimits(
+        max_bytes=int(os.getenv("IMAGE_MAX_BYTES", str(1024 * 1024))),
+        max_pixels=int(os.getenv("IMAGE_MAX_PIXELS", str(2048 * 2048))),
+        target_size=int(os.getenv("IMAGE_TARGET_SIZE", "280")),
+    )
 
-def decode_image(
-    image_base64: str, captcha_id: str = None, label: str = None
-) -> torch.Tensor:
-    try:
-        # 기대하는 포맷: "data:image/png;base64,...."
-        header, encoded = image_base64.split(",", 1)
-    except ValueError:
-        raise ValueError(
+
+# torchvision ToTensor + Normalize와 같은 float32 연산 순서로 0~255 픽셀값을
+# 미리 정규화해 둔 룩업 테이블 (요청마다 나눗셈/뺄셈을 하지 않도록)
+_NORMALIZE_LUT = (
+    np.arange(256, dtype=np.float32) / np.float32(255) - np.float32(MNIST_MEAN)
+) / np.float32(MNIST_STD)
+
+
+# 같은 크기의 흑백 이미지 묶음 (N, H, W) uint8을 한 번에 중앙 정렬
+#  - 획(값 < threshold)의 경계 상자를 행/열 any 축소로 구하고
+#  - 잘라낸 영역을 padding // 2 여백과 함께 정사각형 가운데에 out 버퍼로 바로 복사
+# 결과는 out[i] 안의 뷰 목록이며, crop → ImageOps.expand → ImageOps.pad와 픽셀 단위로 같다
+# (완전히 검은 이미지나 획이 없는 이미지는 원본 그대로)
+def center_batch(
+    images: np.ndarray,
+    padding: int = 20,
+    out: Optional[np.ndarray] = None,
+    threshold: int = 200,
+) -> List[np.ndarray]:
+    count, height, width = images.shape
+    border = padding // 2
+    side = max(height, width) + 2 * border
+    if out is None:
+        out = np.empty((count, side, side), dtype=np.uint8)
+
+    binarized = images < threshold
+    rows = binarized.any(axis=2)
+    cols = binarized.any(axis=1)
+    has_stroke = rows.any(axis=1)
+    all_black = images.max(axis=(1, 2)) == 0
+    y0 = rows.argmax(axis=1)
+    y1 = height - rows[:, ::-1].argmax(axis=1)
+    x0 = cols.argmax(axis=1)
+    x1 = width - cols[:, ::-1].argmax(axis=1)
+
+    results = []
+    for i in range(count):
+        if all_black[i] or not has_stroke[i]:
+            target = out[i, :height, :width]
+            target[...] = images[i]
+            results.append(target)
+            continue
+
+        crop_h, crop_w = y1[i] - y0[i], x1[i] - x0[i]
+        padded_h, padded_w = crop_h + 2 * border, crop_w + 2 * border
+        square = max(padded_h, padded_w)
+        # ImageOps.pad와 같은 반올림 (round(차이 * 0.5), 짝수 쪽으로 반올림)
+        top = round((square - padded_h) * 0.5)
+        left = round((square - padded_w) * 0.5)
+
+        target = out[i, :square, :square]
+        target.fill(255)
+        target[
+            top + border : top + border + crop_h,
+            left + border : left + border + crop_w,
+        ] = images[i, y0[i] : y1[i], x0[i] : x1[i]]
+        results.append(target)
+    return results
+
+
+# 흑백(L) 이미지 한 장 중앙 정렬 (/predict 경로, center_batch와 같은 결과)
+def center_image(
+    image: Image.Image, padding: int = 20, threshold: int = 200
+) -> Image.Image:
+    (centered,) = center_batch(
+        np.asarray(image)[np.newaxis], padding, threshold=threshold
+    )
+    return Image.fromarray(centered)
+
+
+# Resize(28x28, bilinear) → ToTensor → Normalize를 PIL/NumPy만으로 수행 (1x28x28)
+def to_model_input(image: Image.Image) -> np.ndarray:
+    out = np.empty((1, INPUT_SIZE, INPUT_SIZE), dtype=np.float32)
+    _write_model_input(image, out[0])
+    return out
+
+
+# 여러 이미지를 한 번에 변환해 (N, 1, 28, 28) 배열로 반환
+def to_model_input_batch(images: Sequence[Image.Image]) -> np.ndarray:
+    out = np.empty((len(images), 1, INPUT_SIZE, INPUT_SIZE), dtype=np.float32)
+    for i, image in enumerate(images):
+        _write_model_input(image, out[i, 0])
+    return out
+
+
+def _write_model_input(image: Image.Image, out: np.ndarray):
+    if image.mode != "L":
+        image = image.convert("L")
+    resized = image.resize((INPUT_SIZE, INPUT_SIZE), Image.Resampling.BILINEAR)
+    np.take(_NORMALIZE_LUT, np.asarray(resized), out=out)
+
+
+# 지원하는 data URL MIME 타입 → PIL 포맷 이름
+_IMAGE_FORMATS = {
+    "image/png": "PNG",
+    "image/jpeg": "JPEG",
+    "image/webp": "WEBP",
+}
+# 파일 시그니처 확인에 필요한 base64 앞부분 (16자 = 12바이트, WEBP 시그니처까지)
+_SNIFF_CHARS = 16
+
+
+# 잘못된 이미지 입력 (status_code로 응답 코드를 정한다)
+class InvalidImageError(ValueError):
+    status_code = 400
+
+
+class ImageTooLargeError(InvalidImageError):
+    status_code = 413
+
+
+def _signature_matches(image_format: str, head: bytes) -> bool:
+    if image_format == "PNG":
+        return head.startswith(b"\x89PNG\r\n\x1a\n")
+    if image_format == "JPEG":
+        return head.startswith(b"\xff\xd8\xff")
+    return head[:4] == b"RIFF" and head[8:12] == b"WEBP"
+
+
+# "data:image/png;base64,...." 헤더에서 PIL 포맷과 데이터 시작 위치를 얻는다
+def _parse_data_url(image_base64: str) -> Tuple[str, int]:
+    comma = image_base64.find(",", 0, 64)
+    if comma < 0:
+        raise InvalidImageError(
             "올바른 이미지 포맷이 아닙니다. header와 데이터 구분자(',')를 확인하세요."
         )
+    header = image_base64[:comma]
+    if not header.startswith("data:") or not header.endswith(";base64"):
+        raise InvalidImageError("base64 data URL 형식이 아닙니다.")
+    mime = header[len("data:") : -len(";base64")].lower()
+    image_format = _IMAGE_FORMATS.get(mime)
+    if image_format is None:
+        raise InvalidImageError(f"지원하지 않는 이미지 형식입니다: {mime}")
+    return image_format, comma + 1
+
+
+# 캔버스보다 훨씬 큰 입력은 전처리 전에 싸게 줄인다
+# JPEG는 디코딩 단계(DCT)에서 줄이고, 나머지는 정수 배율 평균(reduce)으로 줄인다
+def _downscale(image: Image.Image, target: int) -> Image.Image:
+    if max(image.size) // target >= 2 and image.format == "JPEG":
+        # 요청 크기 이상을 유지하는 가장 작은 배율(1/2, 1/4, 1/8)을 고른다
+        scale = target / max(image.size)
+        image.draft("L", (int(image.width * scale), int(image.height * scale)))
+    image = image.convert("L")
+    factor = max(image.size) // target
+    return image.reduce(factor) if factor >= 2 else image
+
+
+# base64 data URL을 흑백(L) 이미지로 디코딩
+#  - 선언한 MIME 타입과 실제 파일 시그니처를 앞부분만 디코딩해 먼저 확인
+#  - 디코딩 전 바이트 수, 픽셀 디코딩 전(헤더만 읽은 상태) 픽셀 수 상한을 확인
+#  - 문자열 전체를 split/encode하지 않고 데이터 부분 str을 바로 base64 디코딩
+#    (ASCII가 아닌 문자가 섞이면 a2b_base64가 ValueError를 낸다)
+def load_image(
+    image_base64: str, limits: ImageLimits = DEFAULT_IMAGE_LIMITS
+) -> Image.Image:
+    image_format, start = _parse_data_url(image_base64)
+    if (len(image_base64) - start) * 3 // 4 > limits.max_bytes:
+        raise ImageTooLargeError(f"이미지가 {limits.max_bytes}바이트를 넘습니다.")
 
     try:
-        image_bytes = base64.b64decode(encoded)
-    except base64.binascii.Error:
-        raise ValueError("base64 디코딩에 실패했습니다.")
+        head = binascii.a2b_base64(image_base64[start : start + _SNIFF_CHARS])
+    except ValueError:
+        raise InvalidImageError("base64 디코딩에 실패했습니다.")
+    if not _signature_matches(image_format, head):
+        raise InvalidImageError("이미지 데이터가 선언한 형식과 다릅니다.")
+    try:
+        image_bytes = binascii.a2b_base64(image_base64[start:])
+    except ValueError:
+        raise InvalidImageError("base64 디코딩에 실패했습니다.")
 
     try:
-        original_image = Image.open(io.BytesIO(image_bytes)).convert("L")
+        image = Image.open(io.BytesIO(image_bytes), formats=[image_format])
+        width, height = image.size
+        if width * height > limits.max_pixels:
+            raise ImageTooLargeError(
+                f"이미지 크기({width}x{height})가 허용 픽셀 수를 넘습니다."
+            )
+        return _downscale(image, limits.target_size)
+    except InvalidImageError:
+        raise
     except Exception as e:
-        raise ValueError("이미지 처리 중 오류 발생: " + str(e))
-
-    centered_image = center_image(original_image, padding=20)
-
-    if captcha_id:
-        save_dir = "static/images"
-        os.makedirs(save_dir, exist_ok=True)
-        filename = f"captcha_{captcha_id}.png"
-        centered_image.save(os.path.join(save_dir, filename))
-
-        if label:
-            save_label(filename, label)
-
-    transform = transforms.Compose(
-        [
-            transforms.Resize((28, 28)),
-            transforms.Grayscale(num_output_channels=1),
-            transforms.ToTensor(),
-            transforms.Normalize((0.1307,), (0.3081,)),
-        ]
-    )
-    tensor_image = transform(centered_image).unsqueeze(0)
-    return tensor_image
+        raise InvalidImageError("이미지 처리 중 오류 발생: " + str(e))
+
+
+# 중앙 정렬 후 모델 입력(1x1x28x28)으로 변환
+def preprocess_image(image: Image.Image) -> Tuple[np.ndarray, Image.Image]:
+    centered_image = center_image(image, padding=20)
+    # 데이터셋 저장은 호출 측에서 백그라운드로 처리하도록 이미지도 함께 반환
+    return to_model_input(centered_image)[np.newaxis], centered_image
+
+
+def decode_image(
+    image_base64: str, limits: ImageLimits = DEFAULT_IMAGE_LIMITS
+) -> Tuple[np.ndarray, Image.Image]:
+    return preprocess_image(load_image(image_base64, limits))
+
+
+# decode_image와 같지만 단계별 소요 시간(초)도 함께 반환 (워커 풀 안에서 측정)
+def decode_image_timed(
+    image_base64: str, limits: ImageLimits = DEFAULT_IMAGE_LIMITS
+) -> Tuple[np.ndarray, Image.Image, Dict[str, float]]:
+    start = time.perf_counter()
+    image = load_image(image_base64, limits)
+    decoded = time.perf_counter()
+    model_input, centered_image = preprocess_image(image)
+    timings = {
+        "decode": decoded - start,
+        "preprocess": time.perf_counter() - decoded,
+    }
+    return model_input, centered_image, timings
@@ -0,0 +1,140 @@
+import importlib.abc
+import os
+import sys
+import time
+from typing import List, NamedTuple, Optional
+
+# 서버 시작 시 모듈별 import 시간과 RSS 증가량을 기록한다 (콜드 스타트 회귀 추적용)
+# main.py가 다른 모듈보다 먼저 import해야 하므로 표준 라이브러리만 사용한다
+# 모듈별 기록은 로더를 감싸므로 기본은 꺼져 있고 IMPORT_PROFILE=true일 때만 켠다
+# (.env보다 먼저 읽히므로 프로세스 환경 변수로 지정). 꺼져 있어도 전체 import 시간은 기록
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class ImportRecord(NamedTuple):
+    name: str
+    depth: int
+    seconds: float
+    rss_bytes: int
+
+
+# sys.meta_path 맨 앞에서 모듈을 찾아 주고, 로더의 create/exec를 감싸 시간을 잰다
+# 같은 최상위 패키지 안의 하위 모듈(numpy.core 등)은 부모 기록에 포함시키고
+# 다른 패키지로 넘어가는 import만 한 단계 깊은 자식으로 기록한다 (시간/RSS는 자식 포함)
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    def __init__(self):
+        self.records: List[Optional[ImportRecord]] = []
+        self.started = time.perf_counter()
+        self.start_rss = rss_bytes()
+        self.finished: Optional[float] = None
+        self.finish_rss = 0
+        self._stack: List[tuple] = []
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    # 앱 모듈 import가 끝나면 제거 (이후 요청 처리 중 import에는 영향 없음)
+    # 처음 호출될 때만 True (워커 프로세스당 한 번 보고)
+    def stop(self) -> bool:
+        if self.finished is not None:
+            return False
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+        self.finished = time.perf_counter()
+        self.finish_rss = rss_bytes()
+        return True
+
+    @property
+    def seconds(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def find_spec(self, fullname, path, target=None):
+        root = fullname.partition(".")[0]
+        if self._stack and self._stack[-1][1] == root:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        # 내장/고정 모듈 로더(클래스 자체)와 exec_module이 없는 로더는 그대로 둔다
+        loader = spec.loader
+        if loader is None or isinstance(loader, type):
+            return spec
+        if not hasattr(loader, "exec_module"):
+            return spec
+        self._wrap(loader, fullname, root)
+        return spec
+
+    def _wrap(self, loader, fullname: str, root: str):
+        create, execute = loader.create_module, loader.exec_module
+
+        # 다음 import부터는 원래 메서드를 쓰도록 되돌린다
+        def restore():
+            del loader.create_module, loader.exec_module
+
+        # 시작 순서대로 자리를 잡아 두고 끝날 때 채운다 (부모가 자식보다 앞에 오도록)
+        def create_module(spec):
+            self._stack.append(
+                (len(self.records), root, time.perf_counter(), rss_bytes())
+            )
+            self.records.append(None)
+            try:
+                return create(spec)
+            except BaseException:
+                self._finish(fullname)
+                restore()
+                raise
+
+        def exec_module(module):
+            try:
+                execute(module)
+            finally:
+                self._finish(fullname)
+                restore()
+
+        try:
+            loader.create_module = create_module
+            loader.exec_module = exec_module
+        except AttributeError:
+            pass
+
+    def _finish(self, fullname: str):
+        index, _, start, start_rss = self._stack.pop()
+        self.records[index] = ImportRecord(
+            fullname,
+            len(self._stack),
+            time.perf_counter() - start,
+            rss_bytes() - start_rss,
+        )
+
+    # min_seconds 이상 걸린 import만 트리 형태로 (들여쓰기 = 깊이)
+    def report(self, min_seconds: float = 0.005, limit: int = 40) -> List[str]:
+        lines = []
+        for record in self.records:
+            if record is None or record.seconds < min_seconds:
+                continue
+            indent = "  " * record.depth
+            lines.append(
+                f"{indent}{record.name:<{40 - len(indent)}} "
+                f"{record.seconds * 1000:>8.1f} ms {record.rss_bytes / 2**20:>+8.1f} MB"
+            )
+        return lines[:limit]
+
+
+PROFILER = ImportProfiler()
+if os.getenv("IMPORT_PROFILE", "false").lower() in ("1", "true", "yes"):
+    PROFILER.install()
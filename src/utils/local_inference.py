@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+from prometheus_client import Counter, Gauge, Histogram
+
+# ==============================
+# Prometheus 메트릭 정의
+# ==============================
+INFERENCE_BATCHES = Counter(
+    "inference_batches_total",
+    "추론 경로별 처리한 배치 수 (local | remote)",
+    ["backend", "result"],
+)
+INFERENCE_FALLBACKS = Counter(
+    "inference_fallback_total", "로컬 추론 실패로 원격 호출로 대체한 배치 수"
+)
+LOCAL_INFERENCE_LATENCY = Histogram(
+    "local_inference_duration_seconds",
+    "로컬 모델 배치 추론 시간(초, 실행기 대기 포함)",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+MODEL_LOAD_SECONDS = Gauge(
+    "local_inference_model_load_seconds",
+    "로컬 모델 로드(런타임 import 포함)에 걸린 시간(초)",
+    multiprocess_mode="livemax",
+)
+# ==============================
+
+SendBatch = Callable[[np.ndarray], Awaitable[list]]
+
+
+# ONNX Runtime으로 내보낸 HybridCNN 모델 실행
+class OnnxModel:
+    def __init__(self, path: str, intra_op_threads: int):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # 배치 축이 1로 고정된 모델은 한 장씩 실행
+        self.fixed_batch = model_input.shape[0] == 1
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        if self.fixed_batch and len(batch) > 1:
+            return np.concatenate([self.predict(row[None]) for row in batch])
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+# torch.jit.save로 저장한 TorchScript 모델 실행 (torch가 설치된 경우만)
+class TorchScriptModel:
+    def __init__(self, path: str, intra_op_threads: int):
+        import torch
+
+        torch.set_num_threads(intra_op_threads)
+        self.torch = torch
+        self.module = torch.jit.load(path, map_location="cpu").eval()
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        with self.torch.inference_mode():
+            return self.module(self.torch.from_numpy(batch)).numpy()
+
+
+# 파일 확장자로 실행 엔진을 고른다 (.onnx → ONNX Runtime, .pt/.ts → TorchScript)
+def load_local_model(path: str, intra_op_threads: int = 1):
+    if path.endswith(".onnx"):
+        return OnnxModel(path, intra_op_threads)
+    if path.endswith((".pt", ".pth", ".ts")):
+        return TorchScriptModel(path, intra_op_threads)
+    raise ValueError(f"지원하지 않는 모델 형식입니다: {path}")
+
+
+# 원격 호출(invoke_hybrid_cnn)과 같은 인터페이스로 배치를 받아 로짓 행 목록을 돌려준다
+# 로컬 모델은 loader로 처음 필요할 때(워밍업 또는 첫 요청) 불러온다
+# (onnxruntime/torch import와 모델 로드를 시작 경로에서 뺄 수 있도록)
+# 로컬 모델이 없거나 실패하면 fallback(원격 호출)로 대체한다
+class InferenceEngine:
+    def __init__(
+        self,
+        model=None,
+        fallback: Optional[SendBatch] = None,
+        workers: int = 1,
+        loader: Optional[Callable[[], object]] = None,
+    ):
+        self.model = model
+        self.loader = loader
+        self.fallback = fallback
+        self._load_lock = threading.Lock()
+        # 모델 실행 전용 스레드 (전처리 풀/이벤트 루프와 CPU를 나눠 쓰지 않도록 분리)
+        self.executor = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+            if self.local
+            else None
+        )
+
+    @property
+    def local(self) -> bool:
+        return self.model is not None or self.loader is not None
+
+    @property
+    def backend(self) -> str:
+        return "local" if self.local else "remote"
+
+    # 모델을 불러온다 (추론 스레드에서 호출, 여러 번 호출해도 한 번만 로드)
+    # 실패하면 fallback이 있을 때 원격 추론으로 전환하고, 없으면 예외를 그대로 올린다
+    def load(self):
+        with self._load_lock:
+            if self.model is not None or self.loader is None:
+                return self.model
+            start = time.monotonic()
+            try:
+                self.model = self.loader()
+            except Exception as e:
+                if self.fallback is None:
+                    raise
+                logging.warning(
+                    f"로컬 모델을 불러오지 못해 원격 추론을 사용합니다: {e}"
+                )
+                self.loader = None
+                return None
+            seconds = time.monotonic() - start
+            MODEL_LOAD_SECONDS.set(seconds)
+            logging.info(f"로컬 추론 모델 로드 ({seconds:.2f}s)")
+            return self.model
+
+    def _predict(self, batch: np.ndarray) -> Optional[np.ndarray]:
+        model = self.model if self.model is not None else self.load()
+        if model is None:
+            return None
+        return model.predict(batch)
+
+    async def __call__(self, batch: np.ndarray) -> list:
+        if not self.local:
+            return await self._remote(batch)
+
+        start = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            logits = await loop.run_in_executor(self.executor, self._predict, batch)
+        except Exception as e:
+            INFERENCE_BATCHES.labels(backend="local", result="error").inc()
+            if self.fallback is None:
+                raise
+            INFERENCE_FALLBACKS.inc()
+            logging.warning(f"로컬 추론 실패, 원격 호출로 대체: {e}")
+            return await self._remote(batch)
+        finally:
+            LOCAL_INFERENCE_LATENCY.observe(time.monotonic() - start)
+
+        # 로드에 실패해 원격으로 전환된 경우
+        if logits is None:
+            return await self._remote(batch)
+        INFERENCE_BATCHES.labels(backend="local", result="ok").inc()
+        return logits.tolist()
+
+    async def _remote(self, batch: np.ndarray) -> list:
+        try:
+            rows = await self.fallback(batch)
+        except Exception:
+            INFERENCE_BATCHES.labels(backend="remote", result="error").inc()
+            raise
+        INFERENCE_BATCHES.labels(backend="remote", result="ok").inc()
+        return rows
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+
+# INFERENCE_BACKEND=local이면 INFERENCE_MODEL_PATH의 모델을 처음 필요할 때 불러온다
+# (WARMUP_MODE=eager(기본)면 시작 시 워밍업에서 로드)
+# 불러오지 못하면 원격 호출만 사용 (INFERENCE_FALLBACK=false면 로드 실패가 그대로 전파)
+def create_inference_engine(remote: SendBatch) -> InferenceEngine:
+    backend = os.getenv("INFERENCE_BACKEND", "remote")
+    allow_fallback = os.getenv("INFERENCE_FALLBACK", "true").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    fallback = remote if allow_fallback else None
+    if backend == "remote":
+        return InferenceEngine(fallback=remote)
+    if backend != "local":
+        raise ValueError(f"알 수 없는 추론 백엔드입니다: {backend}")
+
+    path = os.getenv("INFERENCE_MODEL_PATH", os.path.join("models", "hybrid_cnn.onnx"))
+    threads = int(os.getenv("INFERENCE_INTRA_OP_THREADS", "1"))
+    return InferenceEngine(
+        fallback=fallback,
+        workers=int(os.getenv("INFERENCE_WORKERS", "1")),
+        loader=partial(load_local_model, path, intra_op_threads=threads),
+    )
@@ -0,0 +1,195 @@
+import asyncio
+import glob
+import os
+import re
+import time
+from typing import Dict, Optional, Tuple, Type
+
+from fastapi import HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# 요청/응답 바디 크기 버킷 (100B ~ 10MB)
+SIZE_BUCKETS = (100, 1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 10_000_000)
+
+# ==============================
+# Prometheus 메트릭 정의
+# ==============================
+# 요청/응답 크기 (마지막 값만 남는 Gauge 대신 분포를 기록)
+REQUEST_PAYLOAD_SIZE = Histogram(
+    "api_request_payload_bytes",
+    "API 요청 페이로드 크기(바이트)",
+    ["endpoint"],
+    buckets=SIZE_BUCKETS,
+)
+RESPONSE_SIZE_BYTES = Histogram(
+    "api_response_size_bytes",
+    "API 응답 바디 크기(바이트, 스트리밍 응답 제외)",
+    ["endpoint"],
+    buckets=SIZE_BUCKETS,
+)
+# ==============================
+
+
+# 라우터 하나의 기본 메트릭 묶음 ({prefix}_api_requests_total 등)
+class ApiMetrics:
+    def __init__(self, prefix: str, title: str):
+        self.requests = Counter(
+            f"{prefix}_api_requests_total",
+            f"{title} 관련 API 요청 수",
+            ["endpoint", "method", "status"],
+        )
+        self.latency = Histogram(
+            f"{prefix}_api_request_duration_seconds",
+            f"{title} 관련 API 요청 처리 시간(초)",
+            ["endpoint", "method"],
+        )
+        self.errors = Counter(
+            f"{prefix}_api_errors_total",
+            f"{title} 관련 API 에러 발생 수",
+            ["endpoint", "method"],
+        )
+
+
+# 엔드포인트 하나에 대해 라벨을 미리 묶어 둔 메트릭 (요청마다 labels() 조회를 피함)
+class _EndpointMetrics:
+    def __init__(self, metrics: ApiMetrics, endpoint: str):
+        self.metrics = metrics
+        self.endpoint = endpoint
+        self.request_size = REQUEST_PAYLOAD_SIZE.labels(endpoint=endpoint)
+        self.response_size = RESPONSE_SIZE_BYTES.labels(endpoint=endpoint)
+        self._latency: Dict[str, Histogram] = {}
+        self._requests: Dict[Tuple[str, int], Counter] = {}
+        self._errors: Dict[str, Counter] = {}
+
+    def record(self, method: str, status: int, seconds: float):
+        latency = self._latency.get(method)
+        if latency is None:
+            latency = self.metrics.latency.labels(endpoint=self.endpoint, method=method)
+            self._latency[method] = latency
+        latency.observe(seconds)
+
+        requests = self._requests.get((method, status))
+        if requests is None:
+            requests = self.metrics.requests.labels(
+                endpoint=self.endpoint, method=method, status=str(status)
+            )
+            self._requests[(method, status)] = requests
+        requests.inc()
+
+        if status >= 400:
+            errors = self._errors.get(method)
+            if errors is None:
+                errors = self.metrics.errors.labels(
+                    endpoint=self.endpoint, method=method
+                )
+                self._errors[method] = errors
+            errors.inc()
+
+
+def _content_length(headers) -> int:
+    value = headers.get("content-length")
+    return int(value) if value is not None and value.isdigit() else -1
+
+
+# 라우터의 route_class로 지정하면 모든 엔드포인트의 지연 시간/상태/크기를 기록한다
+# endpoint 라벨은 라우트 이름(name=, 기본값은 핸들러 함수 이름)
+def instrumented_route(metrics: ApiMetrics) -> Type[APIRoute]:
+    class InstrumentedRoute(APIRoute):
+        def get_route_handler(self):
+            handler = super().get_route_handler()
+            endpoint_metrics = _EndpointMetrics(metrics, self.name)
+
+            async def instrumented_handler(request: Request) -> Response:
+                start = time.perf_counter()
+                status = 500
+                try:
+                    response = await handler(request)
+                    status = response.status_code
+                    size = _content_length(response.headers)
+                    if size >= 0:
+                        endpoint_metrics.response_size.observe(size)
+                    return response
+                except HTTPException as e:
+                    status = e.status_code
+                    raise
+                except RequestValidationError:
+                    status = 422
+                    raise
+                finally:
+                    endpoint_metrics.record(
+                        request.method, status, time.perf_counter() - start
+                    )
+                    size = _content_length(request.headers)
+                    if size >= 0:
+                        endpoint_metrics.request_size.observe(size)
+
+            return instrumented_handler
+
+    return InstrumentedRoute
+
+
+# 여러 워커로 실행할 때 워커별 메트릭 파일을 모아 두는 디렉터리
+# (prometheus_client를 import하기 전에 환경변수로 설정되어 있어야 한다)
+def multiprocess_dir() -> Optional[str]:
+    return os.getenv("PROMETHEUS_MULTIPROC_DIR") or None
+
+
+# 서버 시작 전(워커 생성 전)에 이전 실행이 남긴 메트릭 파일을 지운다
+def prepare_multiprocess_dir(path: str):
+    os.makedirs(path, exist_ok=True)
+    for filename in glob.glob(os.path.join(path, "*.db")):
+        os.remove(filename)
+
+
+_DB_PID = re.compile(r"_(\d+)\.db$")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# 죽은 워커의 live* 게이지 파일을 정리 (카운터/히스토그램 누적값은 유지된다)
+def cleanup_dead_workers(path: str) -> int:
+    pids = set()
+    for filename in glob.glob(os.path.join(path, "gauge_live*.db")):
+        match = _DB_PID.search(filename)
+        if match:
+            pids.add(int(match.group(1)))
+
+    dead = [pid for pid in pids if not _pid_alive(pid)]
+    for pid in dead:
+        multiprocess.mark_process_dead(pid, path)
+    return len(dead)
+
+
+def _collect_multiprocess(path: str) -> bytes:
+    cleanup_dead_workers(path)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=path)
+    return generate_latest(registry)
+
+
+# Prometheus 스크랩 엔드포인트
+# 멀티 워커 모드에서는 어느 워커가 받든 모든 워커의 값을 합쳐서 응답한다
+async def handle_metrics(request: Request) -> Response:
+    path = multiprocess_dir()
+    if path is None:
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    # 워커 수만큼 파일을 읽으므로 이벤트 루프 밖에서 수행
+    data = await asyncio.to_thread(_collect_multiprocess, path)
+    return Response(data, media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import logging
+import os
+from typing import List, Optional, Sequence
+from urllib.parse import urlsplit
+
+import httpx
+from prometheus_client import Counter, Gauge, Histogram
+
+# ==============================
+# Prometheus 메트릭 정의
+# ==============================
+# 워커마다 따로 헬스 체크하므로 한 워커라도 실패로 보면 0
+REMOTE_ML_BACKEND_HEALTHY = Gauge(
+    "remote_ml_backend_healthy",
+    "원격 ML 백엔드 헬스 체크 상태 (1: 정상)",
+    ["backend"],
+    multiprocess_mode="livemin",
+)
+REMOTE_ML_BACKEND_OUTSTANDING = Gauge(
+    "remote_ml_backend_outstanding_requests",
+    "원격 ML 백엔드별 처리 중인 요청 수",
+    ["backend"],
+    multiprocess_mode="livesum",
+)
+REMOTE_ML_BACKEND_EWMA = Gauge(
+    "remote_ml_backend_latency_ewma_seconds",
+    "원격 ML 백엔드별 응답 시간 지수이동평균(초)",
+    ["backend"],
+    multiprocess_mode="livemax",
+)
+REMOTE_ML_BACKEND_LATENCY = Histogram(
+    "remote_ml_backend_request_duration_seconds",
+    "원격 ML 백엔드별 호출 지연 시간(초)",
+    ["backend"],
+)
+REMOTE_ML_BACKEND_REQUESTS = Counter(
+    "remote_ml_backend_requests_total",
+    "원격 ML 백엔드별 요청 수",
+    ["backend", "status"],
+)
+REMOTE_ML_BACKEND_EJECTIONS = Counter(
+    "remote_ml_backend_ejections_total",
+    "헬스 체크 실패로 라우팅 대상에서 제외된 횟수",
+    ["backend"],
+)
+# ==============================
+
+
+# 원격 ML 서비스 인스턴스 하나 (서킷 브레이커와 동시 요청 제한은 백엔드별로 둔다)
+class Backend:
+    def __init__(self, url: str, breaker, max_concurrency: int = 64):
+        self.url = url.rstrip("/")
+        self.name = urlsplit(self.url).netloc or self.url
+        self.breaker = breaker
+        self.limiter = asyncio.Semaphore(max_concurrency)
+        self.healthy = True
+        self.outstanding = 0
+        self.ewma: Optional[float] = None
+        self._probe_failures = 0
+        self._probe_successes = 0
+        REMOTE_ML_BACKEND_HEALTHY.labels(backend=self.name).set(1)
+
+    def start_request(self):
+        self.outstanding += 1
+        REMOTE_ML_BACKEND_OUTSTANDING.labels(backend=self.name).inc()
+
+    def finish_request(self, status: str, seconds: Optional[float], alpha: float):
+        self.outstanding -= 1
+        REMOTE_ML_BACKEND_OUTSTANDING.labels(backend=self.name).dec()
+        REMOTE_ML_BACKEND_REQUESTS.labels(backend=self.name, status=status).inc()
+        if seconds is None:
+            return
+        REMOTE_ML_BACKEND_LATENCY.labels(backend=self.name).observe(seconds)
+        if self.ewma is None:
+            self.ewma = seconds
+        else:
+            self.ewma += alpha * (seconds - self.ewma)
+        REMOTE_ML_BACKEND_EWMA.labels(backend=self.name).set(self.ewma)
+
+    # 연속 실패/성공 횟수가 임계값에 도달하면 제외/복귀
+    def record_probe(self, ok: bool, unhealthy_threshold: int, healthy_threshold: int):
+        if ok:
+            self._probe_failures = 0
+            self._probe_successes += 1
+            if self._probe_successes >= healthy_threshold:
+                self._set_healthy(True)
+        else:
+            self._probe_successes = 0
+            self._probe_failures += 1
+            if self._probe_failures >= unhealthy_threshold:
+                self._set_healthy(False)
+
+    def _set_healthy(self, healthy: bool):
+        if healthy == self.healthy:
+            return
+        self.healthy = healthy
+        REMOTE_ML_BACKEND_HEALTHY.labels(backend=self.name).set(int(healthy))
+        if healthy:
+            logging.info(f"원격 ML 백엔드 복귀: {self.name}")
+        else:
+            REMOTE_ML_BACKEND_EJECTIONS.labels(backend=self.name).inc()
+            logging.warning(f"원격 ML 백엔드 제외: {self.name}")
+
+
+# 라우팅 키와 백엔드 URL로 정한 점수 (rendezvous hashing)
+# 백엔드가 추가/제외되어도 나머지 키의 담당 백엔드는 바뀌지 않는다
+def _affinity(route_key: str, backend: Backend) -> bytes:
+    return hashlib.blake2b(
+        f"{route_key}\0{backend.url}".encode("utf-8"), digest_size=8
+    ).digest()
+
+
+# 여러 원격 ML 백엔드 중 요청을 보낼 곳을 고르고, 주기적으로 헬스 체크한다
+class BackendPool:
+    POLICIES = ("least_outstanding", "ewma")
+
+    def __init__(
+        self,
+        backends: Sequence[Backend],
+        policy: str = "least_outstanding",
+        sticky_replicas: int = 2,
+        ewma_alpha: float = 0.3,
+        health_path: str = "/ping",
+        health_interval: float = 5.0,
+        health_timeout: float = 1.0,
+        unhealthy_threshold: int = 3,
+        healthy_threshold: int = 2,
+    ):
+        if policy not in self.POLICIES:
+            raise ValueError(f"알 수 없는 로드 밸런싱 정책입니다: {policy}")
+        self.backends = list(backends)
+        self.policy = policy
+        self.sticky_replicas = max(1, sticky_replicas)
+        self.ewma_alpha = ewma_alpha
+        self.health_path = health_path
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.unhealthy_threshold = unhealthy_threshold
+        self.healthy_threshold = healthy_threshold
+        self._task: Optional[asyncio.Task] = None
+
+    def _score(self, backend: Backend):
+        if self.policy == "ewma":
+            # 응답 기록이 없는 백엔드는 0으로 보아 먼저 시도해 본다
+            return (backend.ewma or 0.0) * (backend.outstanding + 1)
+        return (backend.outstanding, backend.ewma or 0.0)
+
+    # 선호 순서대로 정렬한 백엔드 목록
+    # route_key(모델/버전)가 있으면 그 키를 담당하는 sticky_replicas개를 먼저 둔다
+    def candidates(self, route_key: Optional[str] = None) -> List[Backend]:
+        # 모두 헬스 체크에 실패했다면 전부 후보로 둔다 (전체 차단보다 시도가 낫다)
+        backends = [b for b in self.backends if b.healthy] or list(self.backends)
+        if route_key is None or len(backends) <= self.sticky_replicas:
+            return sorted(backends, key=self._score)
+
+        backends.sort(key=lambda b: _affinity(route_key, b), reverse=True)
+        preferred = backends[: self.sticky_replicas]
+        rest = backends[self.sticky_replicas :]
+        return sorted(preferred, key=self._score) + sorted(rest, key=self._score)
+
+    async def start(self, client: httpx.AsyncClient):
+        if self.health_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._health_loop(client))
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _health_loop(self, client: httpx.AsyncClient):
+        while True:
+            await self.probe_all(client)
+            await asyncio.sleep(self.health_interval)
+
+    # 모든 백엔드에 헬스 체크를 한 번 보낸다 (시작 시 워밍업에서 커넥션을 미리 열 때도 사용)
+    async def probe_all(self, client: httpx.AsyncClient):
+        await asyncio.gather(*(self._probe(client, b) for b in self.backends))
+
+    async def _probe(self, client: httpx.AsyncClient, backend: Backend):
+        try:
+            response = await client.get(
+                backend.url + self.health_path, timeout=self.health_timeout
+            )
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        backend.record_probe(ok, self.unhealthy_threshold, self.healthy_threshold)
+
+
+# REMOTE_ML_SERVICE_URLS(쉼표 구분)가 없으면 REMOTE_ML_SERVICE_URL 하나를 사용
+def backend_urls_from_env() -> List[str]:
+    urls = os.getenv("REMOTE_ML_SERVICE_URLS") or os.getenv("REMOTE_ML_SERVICE_URL")
+    return [url.strip() for url in (urls or "").split(",") if url.strip()]
+
+
+def create_backend_pool(backends: Sequence[Backend]) -> BackendPool:
+    if not backends:
+        logging.warning(
+            "원격 ML 백엔드가 설정되지 않았습니다 (REMOTE_ML_SERVICE_URLS)."
+        )
+    return BackendPool(
+        backends,
+        policy=os.getenv("REMOTE_ML_LB_POLICY", "least_outstanding"),
+        sticky_replicas=int(os.getenv("REMOTE_ML_STICKY_REPLICAS", "2")),
+        ewma_alpha=float(os.getenv("REMOTE_ML_EWMA_ALPHA", "0.3")),
+        health_path=os.getenv("REMOTE_ML_HEALTH_PATH", "/ping"),
+        health_interval=float(os.getenv("REMOTE_ML_HEALTH_INTERVAL_SECONDS", "5")),
+        health_timeout=float(os.getenv("REMOTE_ML_HEALTH_TIMEOUT_SECONDS", "1")),
+        unhealthy_threshold=int(os.getenv("REMOTE_ML_UNHEALTHY_THRESHOLD", "3")),
+        healthy_threshold=int(os.getenv("REMOTE_ML_HEALTHY_THRESHOLD", "2")),
+    )
@@ -0,0 +1,63 @@
+import base64
+import hashlib
+import hmac
+import os
+import struct
+import time
+from typing import Annotated, Optional
+
+from fastapi import Depends, Request
+
+# 캡차 통과 쿠키 이름/형식
+# 값 = base64url(발급 시각 4바이트 | 통과 플래그 1바이트 | HMAC-SHA256 앞 16바이트)
+PASS_COOKIE = "captcha_pass"
+_PAYLOAD = struct.Struct(">IB")
+_MAC_SIZE = 16
+_TOKEN_LENGTH = len(
+    base64.urlsafe_b64encode(b"\0" * (_PAYLOAD.size + _MAC_SIZE)).rstrip(b"=")
+)
+
+
+# 세션 dict 대신 서명된 통과 토큰 하나만 쿠키로 주고받는다
+# (세션 미들웨어처럼 모든 요청마다 쿠키를 디코딩/재서명하지 않음)
+class PassTokenSigner:
+    def __init__(self, secret_key: bytes, max_age: int = 3600):
+        self.key = secret_key
+        self.max_age = max_age
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self.key, payload, hashlib.sha256).digest()[:_MAC_SIZE]
+
+    def issue(self) -> str:
+        payload = _PAYLOAD.pack(int(time.time()), 1)
+        token = payload + self._sign(payload)
+        return base64.urlsafe_b64encode(token).rstrip(b"=").decode("ascii")
+
+    # 길이가 고정이라 형식 확인 후에는 항상 같은 연산(서명 1회 + 상수 시간 비교)만 수행
+    def verify(self, token: Optional[str]) -> bool:
+        if not token or len(token) != _TOKEN_LENGTH:
+            return False
+        try:
+            data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        except ValueError:
+            return False
+        payload, mac = data[: _PAYLOAD.size], data[_PAYLOAD.size :]
+        if not hmac.compare_digest(mac, self._sign(payload)):
+            return False
+        issued_at, passed = _PAYLOAD.unpack(payload)
+        return passed == 1 and 0 <= time.time() - issued_at <= self.max_age
+
+
+# SESSION_SECRET_KEY: 여러 워커/레플리카가 같은 값을 써야 /check가 어디서든 통과를 인식한다
+def create_pass_token_signer() -> PassTokenSigner:
+    return PassTokenSigner(
+        os.getenv("SESSION_SECRET_KEY", "super-secret-key").encode(),
+        max_age=int(os.getenv("SESSION_MAX_AGE_SECONDS", "3600")),
+    )
+
+
+def get_pass_token_signer(request: Request) -> PassTokenSigner:
+    return request.app.state.pass_tokens
+
+
+PassTokenDep = Annotated[PassTokenSigner, Depends(get_pass_token_signer)]
@@ -0,0 +1,3 @@
+# 앱과 오프라인 스크립트(reprocess.py)가 함께 쓰는 저장 경로
+# 스크립트가 fastapi/prometheus 없이 import할 수 있도록 다른 모듈을 import하지 않는다
+SAVE_DIR = "static/images"  # CAPTCHA 이미지 저장 디렉터리
@@ -0,0 +1,101 @@
+import io
+import json
+import os
+from typing import Dict, Mapping, Tuple
+
+import numpy as np
+
+SHAPE_HEADER = "X-Tensor-Shape"
+DTYPE_HEADER = "X-Tensor-Dtype"
+
+# 바이너리 포맷에서 허용하는 dtype (항상 little-endian으로 전송)
+SUPPORTED_DTYPES = {
+    "float32": np.dtype("<f4"),
+    "uint8": np.dtype("u1"),
+}
+
+
+def _normalize_dtype(array: np.ndarray) -> Tuple[np.ndarray, str]:
+    if array.dtype == np.uint8:
+        return array, "uint8"
+    # float64 등은 float32로 맞추고, big-endian이면 바이트 순서를 바꾼다
+    return np.ascontiguousarray(array, dtype="<f4"), "float32"
+
+
+class JsonCodec:
+    # 기존 {"inputs": [[...]]} 포맷 (하위 호환용)
+    name = "json"
+    content_type = "application/json"
+
+    def encode(self, array: np.ndarray) -> Tuple[bytes, Dict[str, str]]:
+        body = json.dumps({"inputs": array.tolist()}, separators=(",", ":"))
+        return body.encode("utf-8"), {"Content-Type": self.content_type}
+
+    def decode(self, body: bytes, headers: Mapping[str, str]) -> np.ndarray:
+        return np.asarray(json.loads(body)["inputs"], dtype=np.float32)
+
+
+class RawCodec:
+    # little-endian 원시 바이트 + shape/dtype은 HTTP 헤더로 전달
+    name = "raw"
+    content_type = "application/octet-stream"
+
+    def encode(self, array: np.ndarray) -> Tuple[bytes, Dict[str, str]]:
+        array, dtype = _normalize_dtype(array)
+        headers = {
+            "Content-Type": self.content_type,
+            SHAPE_HEADER: ",".join(str(dim) for dim in array.shape),
+            DTYPE_HEADER: dtype,
+        }
+        return array.tobytes(), headers
+
+    def decode(self, body: bytes, headers: Mapping[str, str]) -> np.ndarray:
+        dtype_name = headers.get(DTYPE_HEADER, "float32")
+        if dtype_name not in SUPPORTED_DTYPES:
+            raise ValueError(f"지원하지 않는 dtype입니다: {dtype_name}")
+        shape_value = headers.get(SHAPE_HEADER)
+        if not shape_value:
+            raise ValueError(f"{SHAPE_HEADER} 헤더가 필요합니다.")
+        shape = tuple(int(dim) for dim in shape_value.split(","))
+        return np.frombuffer(body, dtype=SUPPORTED_DTYPES[dtype_name]).reshape(shape)
+
+
+class NpyCodec:
+    # .npy 포맷 (shape/dtype이 파일 헤더에 포함됨)
+    name = "npy"
+    content_type = "application/x-npy"
+
+    def encode(self, array: np.ndarray) -> Tuple[bytes, Dict[str, str]]:
+        array, _ = _normalize_dtype(array)
+        buf = io.BytesIO()
+        np.save(buf, array, allow_pickle=False)
+        return buf.getvalue(), {"Content-Type": self.content_type}
+
+    def decode(self, body: bytes, headers: Mapping[str, str]) -> np.ndarray:
+        return np.load(io.BytesIO(body), allow_pickle=False)
+
+
+CODECS = {codec.name: codec for codec in (JsonCodec(), RawCodec(), NpyCodec())}
+CODECS_BY_CONTENT_TYPE = {codec.content_type: codec for codec in CODECS.values()}
+
+
+def get_codec(name: str = "json"):
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"알 수 없는 페이로드 포맷입니다: {name}")
+
+
+# 원격 ML 서비스로 보내는 텐서 직렬화 포맷 (REMOTE_ML_PAYLOAD_FORMAT: json | raw | npy)
+# .env가 로드된 뒤 lifespan에서 호출하며, 알 수 없는 포맷이면 시작에 실패한다
+def create_payload_codec():
+    return get_codec(os.getenv("REMOTE_ML_PAYLOAD_FORMAT", "json"))
+
+
+# Content-Type으로 코덱을 골라 요청 바디를 배열로 복원 (스텁 서버 등 수신 측용)
+def decode_payload(body: bytes, headers: Mapping[str, str]) -> np.ndarray:
+    content_type = headers.get("content-type", JsonCodec.content_type)
+    codec = CODECS_BY_CONTENT_TYPE.get(content_type.split(";")[0].strip())
+    if codec is None:
+        raise ValueError(f"지원하지 않는 Content-Type입니다: {content_type}")
+    return codec.decode(body, headers)
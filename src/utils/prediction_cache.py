@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Annotated, List, Optional
+
+import numpy as np
+from fastapi import Depends, Request
+from prometheus_client import Counter, Gauge
+
+# ==============================
+# Prometheus 메트릭 정의
+# ==============================
+PREDICTION_CACHE_REQUESTS = Counter(
+    "prediction_cache_requests_total",
+    "예측 결과 캐시 조회 결과",
+    ["tier", "result"],
+)
+PREDICTION_CACHE_BYTES = Gauge(
+    "prediction_cache_bytes",
+    "예측 결과 메모리 캐시가 사용 중인 바이트 수 (워커 합계)",
+    multiprocess_mode="livesum",
+)
+# 디스크 계층은 워커끼리 같은 디렉터리를 공유
+PREDICTION_CACHE_DISK_BYTES = Gauge(
+    "prediction_cache_disk_bytes",
+    "예측 결과 디스크 캐시가 사용 중인 바이트 수",
+    multiprocess_mode="livemax",
+)
+# ==============================
+
+
+# (모델, 버전, 입력) → 원격 ML 응답 바디(JSON 바이트) 캐시
+# 메모리 LRU(바이트 상한) + 선택적 디스크 계층
+# 버전이 정해진 호출만 캐시한다 (버전 미지정 호출은 라우터에서 최신 버전으로 정한 뒤 사용)
+class PredictionCache:
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 1024 * 1024 * 1024,
+    ):
+        self.max_bytes = max(0, max_bytes)
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._disk_lock = threading.Lock()
+        self._disk_bytes = self._scan_disk_bytes() if disk_dir else 0
+        PREDICTION_CACHE_DISK_BYTES.set(self._disk_bytes)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(model_name: str, version: Optional[str], inputs: List[List[float]]):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{model_name}\0{version or ''}\0".encode("utf-8"))
+        try:
+            # 같은 값이면 표현(1 vs 1.0 등)과 관계없이 같은 키가 되도록 float64로 정규화
+            array = np.asarray(inputs, dtype="<f8")
+            digest.update(str(array.shape).encode("ascii"))
+            digest.update(array.tobytes())
+        except ValueError:
+            # 행 길이가 서로 다른 입력은 JSON으로 정규화
+            digest.update(json.dumps(inputs, separators=(",", ":")).encode("utf-8"))
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+            PREDICTION_CACHE_REQUESTS.labels(tier="memory", result="hit").inc()
+            return body
+        PREDICTION_CACHE_REQUESTS.labels(tier="memory", result="miss").inc()
+
+        if self.disk_dir:
+            body = await asyncio.to_thread(self._read_disk, key)
+            result = "hit" if body is not None else "miss"
+            PREDICTION_CACHE_REQUESTS.labels(tier="disk", result=result).inc()
+            if body is not None:
+                self._store(key, body)
+                return body
+        return None
+
+    async def put(self, key: str, body: bytes):
+        if not self.enabled:
+            return
+        self._store(key, body)
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, body)
+
+    def _store(self, key: str, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = body
+        self._bytes += len(body)
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+        PREDICTION_CACHE_BYTES.set(self._bytes)
+
+    def _remove(self, key: str):
+        body = self._entries.pop(key, None)
+        if body is not None:
+            self._bytes -= len(body)
+            PREDICTION_CACHE_BYTES.set(self._bytes)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key: str, body: bytes):
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"예측 캐시 디스크 저장 실패: {e}")
+            return
+        with self._disk_lock:
+            self._disk_bytes += len(body)
+            if self._disk_bytes > self.disk_max_bytes:
+                self._evict_disk()
+            PREDICTION_CACHE_DISK_BYTES.set(self._disk_bytes)
+
+    def _iter_disk_files(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+    def _scan_disk_bytes(self) -> int:
+        total = 0
+        for path in self._iter_disk_files():
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    def _evict_disk(self):
+        # 상한을 넘으면 오래된 파일부터 지워 상한의 90%까지 줄인다
+        files = []
+        for path in self._iter_disk_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        target = self.disk_max_bytes * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+
+# PREDICTION_CACHE_ENABLED=true일 때만 사용 (기본은 꺼짐, 항상 원격 호출)
+def create_prediction_cache() -> PredictionCache:
+    enabled = os.getenv("PREDICTION_CACHE_ENABLED", "false").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    if not enabled:
+        return PredictionCache(max_bytes=0)
+    return PredictionCache(
+        max_bytes=int(os.getenv("PREDICTION_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+        disk_dir=os.getenv("PREDICTION_CACHE_DIR") or None,
+        disk_max_bytes=int(
+            os.getenv("PREDICTION_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024))
+        ),
+    )
+
+
+def get_prediction_cache(request: Request) -> PredictionCache:
+    return request.app.state.prediction_cache
+
+
+PredictionCacheDep = Annotated[PredictionCache, Depends(get_prediction_cache)]
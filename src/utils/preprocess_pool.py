@@ -0,0 +1,92 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Annotated
+
+from fastapi import Depends, Request
+from prometheus_client import Counter, Gauge, Histogram
+
+# ==============================
+# Prometheus 메트릭 정의
+# ==============================
+PREPROCESS_QUEUE_DEPTH = Gauge(
+    "preprocess_queue_depth",
+    "전처리 워커 풀에서 대기 또는 실행 중인 작업 수",
+    multiprocess_mode="livesum",
+)
+PREPROCESS_LATENCY = Histogram(
+    "preprocess_duration_seconds",
+    "이미지 전처리 작업 소요 시간(초, 큐 대기 포함)",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+PREPROCESS_REJECTED = Counter(
+    "preprocess_rejected_total", "전처리 큐가 가득 차 거절된 요청 수"
+)
+# ==============================
+
+
+class PoolSaturatedError(Exception):
+    pass
+
+
+# 이벤트 루프를 막지 않도록 CPU 작업을 스레드/프로세스 풀에서 실행한다
+class PreprocessPool:
+    def __init__(self, executor: Executor, max_pending: int, process_workers: int = 0):
+        self.executor = executor
+        self.max_pending = max(1, max_pending)
+        # 프로세스 풀의 워커 수 (스레드 풀이면 0, 워밍업에서 워커마다 한 번씩 실행)
+        self.process_workers = process_workers
+        self._pending = 0
+
+    async def run(self, fn, *args, **kwargs):
+        # 대기 작업이 상한에 도달하면 큐에 쌓지 않고 바로 거절 (백프레셔)
+        if self._pending >= self.max_pending:
+            PREPROCESS_REJECTED.inc()
+            raise PoolSaturatedError("전처리 대기열이 가득 찼습니다.")
+
+        self._pending += 1
+        PREPROCESS_QUEUE_DEPTH.inc()
+        start = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, partial(fn, *args, **kwargs)
+            )
+        finally:
+            self._pending -= 1
+            PREPROCESS_QUEUE_DEPTH.dec()
+            PREPROCESS_LATENCY.observe(time.monotonic() - start)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+def create_preprocess_pool() -> PreprocessPool:
+    kind = os.getenv("PREPROCESS_EXECUTOR", "thread")
+    workers = int(os.getenv("PREPROCESS_WORKERS", str(os.cpu_count() or 1)))
+    # 작업 하나가 수 ms라 대기열 64개도 대기 시간은 수백 ms 이내
+    # (워커 수 × 4로 두면 1 CPU 컨테이너에서 동시 요청 8개만으로도 429가 났다)
+    max_pending = int(os.getenv("PREPROCESS_MAX_PENDING", str(max(64, workers * 16))))
+
+    if kind == "thread":
+        executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="preprocess"
+        )
+        process_workers = 0
+    elif kind == "process":
+        executor = ProcessPoolExecutor(max_workers=workers)
+        process_workers = workers
+    else:
+        raise ValueError(f"알 수 없는 전처리 실행기입니다: {kind}")
+    return PreprocessPool(
+        executor, max_pending=max_pending, process_workers=process_workers
+    )
+
+
+def get_preprocess_pool(request: Request) -> PreprocessPool:
+    return request.app.state.preprocess_pool
+
+
+PreprocessPoolDep = Annotated[PreprocessPool, Depends(get_preprocess_pool)]
@@ -0,0 +1,49 @@
+import os
+from typing import Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+
+# /predict 요청 바디 상한 (base64 이미지 + JSON, 기본 2MB)
+# .env 로딩 이후에 호출해야 하므로 import 시점이 아니라 미들웨어를 등록할 때 읽는다
+def predict_max_body_bytes() -> int:
+    return int(os.getenv("PREDICT_MAX_BODY_BYTES", str(2 * 1024 * 1024)))
+
+
+# 지정한 경로의 요청 바디 크기를 JSON 파싱 전에 제한하는 ASGI 미들웨어
+#  - Content-Length가 상한을 넘으면 바디를 읽지 않고 바로 413
+#  - Content-Length가 없거나 거짓이면 읽는 도중 상한을 넘는 순간 413
+class BodySizeLimitMiddleware:
+    def __init__(self, app, max_bytes: int, paths: Sequence[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"요청 바디가 {self.max_bytes}바이트를 넘습니다."
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_bytes:
+                    response = JSONResponse({"detail": detail}, status_code=413)
+                    await response(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # 라우트의 바디 읽기에서 발생하므로 일반 HTTPException처럼 처리된다
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,411 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Annotated, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import Depends, Request
+from prometheus_client import Counter, Gauge
+
+from utils.ml_backends import (
+    Backend,
+    BackendPool,
+    backend_urls_from_env,
+    create_backend_pool,
+)
+
+# ==============================
+# Prometheus 메트릭 정의
+# ==============================
+REMOTE_ML_CIRCUIT_STATE = Gauge(
+    "remote_ml_circuit_state",
+    "업스트림별 서킷 브레이커 상태 (0: closed, 1: half-open, 2: open)",
+    ["upstream"],
+    multiprocess_mode="livemax",
+)
+REMOTE_ML_UNAVAILABLE = Counter(
+    "remote_ml_unavailable_total",
+    "원격 ML 호출을 사용 불가로 처리한 횟수 (circuit_open | saturated | timeout | transport)",
+    ["upstream", "reason"],
+)
+REMOTE_ML_DEADLINE = Gauge(
+    "remote_ml_deadline_seconds",
+    "엔드포인트별 가장 최근 요청에 적용한 제한 시간(초, 모델/버전 구분 없음)",
+    ["endpoint"],
+    multiprocess_mode="livemax",
+)
+REMOTE_ML_HEDGES = Counter(
+    "remote_ml_hedged_requests_total",
+    "꼬리 지연 대응으로 보낸 보조 요청 수 (fired: 발사, won: 보조 요청이 먼저 응답)",
+    ["endpoint", "result"],
+)
+# ==============================
+
+
+# 라우터에서 status_code 그대로 HTTP 응답 코드로 사용
+class UpstreamUnavailableError(Exception):
+    status_code = 503
+
+
+class CircuitOpenError(UpstreamUnavailableError):
+    pass
+
+
+class UpstreamTimeoutError(UpstreamUnavailableError):
+    status_code = 504
+
+
+# 최근 성공 응답의 지연 시간으로 엔드포인트별 제한 시간/헤지 지연을 계산
+class LatencyTracker:
+    def __init__(
+        self,
+        window: int = 200,
+        min_samples: int = 20,
+        multiplier: float = 3.0,
+        min_deadline: float = 0.05,
+        max_deadline: float = 10.0,
+    ):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.multiplier = multiplier
+        self.min_deadline = min_deadline
+        self.max_deadline = max_deadline
+        self._sorted = None
+        # 제한 시간 초과 후 늘려 둔 제한 시간 (학습된 값이 따라잡으면 해제)
+        self.backoff: Optional[float] = None
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+        self._sorted = None
+        if self.backoff is not None and self._learned_deadline() >= seconds:
+            self.backoff = None
+
+    # 제한 시간 초과: 실제 지연은 deadline 이상이므로 그 값을 (중도 절단된) 표본으로 넣고,
+    # 업스트림이 느려진 경우 따라갈 수 있도록 다음 제한 시간을 두 배로 늘린다
+    def observe_timeout(self, deadline: float):
+        self.samples.append(deadline)
+        self._sorted = None
+        self.backoff = min(self.max_deadline, deadline * 2)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self.samples)
+        index = min(len(self._sorted) - 1, int(q * len(self._sorted)))
+        return self._sorted[index]
+
+    # 표본이 충분하면 p99 × multiplier, 아니면 최대 제한 시간
+    def _learned_deadline(self) -> float:
+        p99 = self.percentile(0.99)
+        if p99 is None:
+            return self.max_deadline
+        return min(self.max_deadline, max(self.min_deadline, p99 * self.multiplier))
+
+    def deadline(self) -> float:
+        deadline = self._learned_deadline()
+        if self.backoff is not None:
+            return max(deadline, self.backoff)
+        return deadline
+
+
+class CircuitBreaker:
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout=10.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        REMOTE_ML_CIRCUIT_STATE.labels(upstream=name).set(self.state)
+
+    def _set_state(self, state: int):
+        self.state = state
+        REMOTE_ML_CIRCUIT_STATE.labels(upstream=self.name).set(state)
+
+    # open 상태에서 reset_timeout이 지나면 시험 요청 하나만 통과시킨다
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self._set_state(self.HALF_OPEN)
+            self._probing = False
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self._probing = False
+        if self.state != self.CLOSED:
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    # 결과를 모른 채 취소된 시험 요청은 다음 요청이 다시 시험하도록 되돌린다
+    def release(self):
+        self._probing = False
+
+
+# 원격 ML 호출용 클라이언트: 백엔드 선택, 적응형 제한 시간, 서킷 브레이커, 헤지 요청,
+# 백엔드별 동시 요청 제한을 공용 httpx 클라이언트 위에 얹는다
+class ResilientClient:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        backends: BackendPool,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        tracker_options: Optional[dict] = None,
+        max_trackers: int = 256,
+    ):
+        self.client = client
+        self.backends = backends
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.tracker_options = tracker_options or {}
+        self.max_trackers = max(1, max_trackers)
+        self._trackers: "OrderedDict[str, LatencyTracker]" = OrderedDict()
+
+    async def start(self):
+        await self.backends.start(self.client)
+
+    async def stop(self):
+        await self.backends.stop()
+
+    # 백엔드마다 헬스 체크를 보내 커넥션 풀을 미리 채운다
+    async def probe(self):
+        await self.backends.probe_all(self.client)
+
+    # 지연 통계는 엔드포인트 + 라우팅 키(모델/버전) 또는 latency_key(배치 크기 등)별로 따로 둔다
+    # 라우팅 키는 요청 경로에서 오므로 최근에 쓴 max_trackers개만 LRU로 유지한다
+    def tracker(self, key: str) -> LatencyTracker:
+        tracker = self._trackers.get(key)
+        if tracker is not None:
+            self._trackers.move_to_end(key)
+            return tracker
+        tracker = LatencyTracker(**self.tracker_options)
+        self._trackers[key] = tracker
+        while len(self._trackers) > self.max_trackers:
+            self._trackers.popitem(last=False)
+        return tracker
+
+    @staticmethod
+    def tracker_key(
+        endpoint: str, route_key: Optional[str], latency_key: Optional[str]
+    ) -> str:
+        key = latency_key or route_key
+        return endpoint if key is None else f"{endpoint}:{key}"
+
+    async def get(self, path: str, endpoint: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, endpoint, idempotent=True, **kwargs)
+
+    async def post(
+        self, path: str, endpoint: str, idempotent: bool = False, **kwargs
+    ) -> httpx.Response:
+        return await self.request(
+            "POST", path, endpoint, idempotent=idempotent, **kwargs
+        )
+
+    # path는 백엔드 URL 뒤에 붙일 경로. route_key(모델/버전)가 같으면 같은 백엔드로 보낸다
+    # latency_key: 지연 분포가 다른 요청(예: 배치 크기)을 route_key 대신 구분할 때 사용
+    async def request(
+        self,
+        method: str,
+        path: str,
+        endpoint: str,
+        idempotent: bool = False,
+        route_key: Optional[str] = None,
+        latency_key: Optional[str] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        backend = self._acquire(route_key)
+        # 헤지 요청까지 포함해 이번 호출에서 사용한 백엔드
+        attempted = [backend]
+
+        key = self.tracker_key(endpoint, route_key, latency_key)
+        tracker = self.tracker(key)
+        deadline = tracker.deadline()
+        REMOTE_ML_DEADLINE.labels(endpoint=endpoint).set(deadline)
+        start = time.monotonic()
+        try:
+            response = await asyncio.wait_for(
+                self._send(
+                    attempted,
+                    route_key,
+                    method,
+                    path,
+                    endpoint,
+                    tracker,
+                    idempotent,
+                    kwargs,
+                ),
+                deadline,
+            )
+        except asyncio.TimeoutError as e:
+            tracker.observe_timeout(deadline)
+            for failed in attempted:
+                failed.breaker.record_failure()
+                self._unavailable(failed.name, "timeout")
+            raise UpstreamTimeoutError(
+                f"{backend.name} 응답이 {deadline:.3f}초 안에 오지 않았습니다."
+            ) from e
+        except httpx.TimeoutException as e:
+            tracker.observe_timeout(time.monotonic() - start)
+            raise UpstreamTimeoutError(f"{backend.name} 응답 시간 초과: {e}") from e
+        except httpx.TransportError as e:
+            raise UpstreamUnavailableError(f"{backend.name} 연결 실패: {e}") from e
+
+        if response.status_code < 500:
+            tracker.observe(time.monotonic() - start)
+        return response
+
+    # 선호 순서대로 서킷이 닫혀 있고 여유가 있는 백엔드를 고른다
+    # exclude에 있는 백엔드는 다른 후보가 없을 때만 사용
+    def _acquire(self, route_key: Optional[str], exclude=()) -> Backend:
+        candidates = sorted(
+            self.backends.candidates(route_key), key=lambda b: b in exclude
+        )
+        if not candidates:
+            raise UpstreamUnavailableError("원격 ML 백엔드가 설정되지 않았습니다.")
+        saturated = False
+        for backend in candidates:
+            # 동시 요청 상한에 도달한 백엔드는 대기열을 만들지 않고 건너뛴다
+            if backend.limiter.locked():
+                saturated = True
+                continue
+            if backend.breaker.allow():
+                return backend
+
+        if saturated:
+            self._unavailable("all", "saturated")
+            raise UpstreamUnavailableError("모든 원격 ML 백엔드의 동시 요청 수 초과")
+        self._unavailable("all", "circuit_open")
+        raise CircuitOpenError("모든 원격 ML 백엔드의 서킷이 열려 있습니다.")
+
+    @staticmethod
+    def _unavailable(upstream: str, reason: str):
+        REMOTE_ML_UNAVAILABLE.labels(upstream=upstream, reason=reason).inc()
+
+    # 백엔드 하나에 대한 실제 호출. 결과를 해당 백엔드의 서킷/지연 통계에 반영한다
+    async def _attempt(self, backend: Backend, method, path, kwargs):
+        backend.start_request()
+        start = time.monotonic()
+        try:
+            async with backend.limiter:
+                response = await self.client.request(
+                    method, backend.url + path, **kwargs
+                )
+        except httpx.TransportError:
+            backend.finish_request("error", None, self.backends.ewma_alpha)
+            backend.breaker.record_failure()
+            self._unavailable(backend.name, "transport")
+            raise
+        except BaseException:
+            # 제한 시간 초과나 헤지에서 진 요청의 취소: 결과를 모르므로 판정하지 않는다
+            backend.finish_request("cancelled", None, self.backends.ewma_alpha)
+            backend.breaker.release()
+            raise
+
+        elapsed = time.monotonic() - start
+        if response.status_code >= 500:
+            backend.breaker.record_failure()
+            backend.finish_request(str(response.status_code), None, 0)
+        else:
+            backend.breaker.record_success()
+            backend.finish_request(
+                str(response.status_code), elapsed, self.backends.ewma_alpha
+            )
+        return response
+
+    async def _send(
+        self, attempted, route_key, method, path, endpoint, tracker, idempotent, kwargs
+    ):
+        first_backend = attempted[0]
+        hedge_delay = (
+            tracker.percentile(self.hedge_quantile)
+            if self.hedge and idempotent
+            else None
+        )
+        if hedge_delay is None:
+            return await self._attempt(first_backend, method, path, kwargs)
+
+        # 첫 요청이 p95 안에 끝나지 않으면 가능한 다른 백엔드로 같은 요청을 하나 더 보내
+        # 먼저 온 응답을 사용
+        first = asyncio.create_task(self._attempt(first_backend, method, path, kwargs))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if done:
+                return await first
+            try:
+                hedge_backend = self._acquire(route_key, exclude=attempted)
+            except UpstreamUnavailableError:
+                return await first
+            attempted.append(hedge_backend)
+
+            REMOTE_ML_HEDGES.labels(endpoint=endpoint, result="fired").inc()
+            second = asyncio.create_task(
+                self._attempt(hedge_backend, method, path, kwargs)
+            )
+            tasks.add(second)
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            REMOTE_ML_HEDGES.labels(
+                                endpoint=endpoint, result="won"
+                            ).inc()
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def create_ml_client(client: httpx.AsyncClient) -> ResilientClient:
+    failure_threshold = int(os.getenv("REMOTE_ML_BREAKER_FAILURES", "5"))
+    reset_timeout = float(os.getenv("REMOTE_ML_BREAKER_RESET_SECONDS", "10"))
+    max_concurrency = int(os.getenv("REMOTE_ML_MAX_CONCURRENCY", "64"))
+    backends = []
+    for url in backend_urls_from_env():
+        breaker = CircuitBreaker(
+            urlsplit(url).netloc or url, failure_threshold, reset_timeout
+        )
+        backends.append(Backend(url, breaker, max_concurrency))
+
+    return ResilientClient(
+        client,
+        create_backend_pool(backends),
+        hedge=os.getenv("REMOTE_ML_HEDGE", "false").lower() in ("1", "true", "yes"),
+        tracker_options={
+            "multiplier": float(os.getenv("REMOTE_ML_DEADLINE_MULTIPLIER", "3")),
+            "min_deadline": float(os.getenv("REMOTE_ML_DEADLINE_MIN", "0.05")),
+            "max_deadline": float(os.getenv("REMOTE_ML_DEADLINE_MAX", "10")),
+        },
+        max_trackers=int(os.getenv("REMOTE_ML_MAX_TRACKERS", "256")),
+    )
+
+
+def get_ml_client(request: Request) -> ResilientClient:
+    return request.app.state.ml_client
+
+
+MlClient = Annotated[ResilientClient, Depends(get_ml_client)]
@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Annotated, Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+from fastapi import Depends, Request
+from prometheus_client import Counter
+
+# ==============================
+# Prometheus 메트릭 정의
+# ==============================
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests_total",
+    "응답 캐시 조회 결과 (hit | miss | stale)",
+    ["cache", "result"],
+)
+# ==============================
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    etag: str
+    fetched_at: float
+
+
+def compute_etag(value: Any) -> str:
+    body = json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+# If-None-Match 헤더에 현재 ETag(또는 *)가 포함되어 있는지 확인
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # 약한 비교: W/ 접두사는 무시
+    return "*" in candidates or etag in (tag.removeprefix("W/") for tag in candidates)
+
+
+# TTL + stale-while-revalidate 캐시. 같은 키의 동시 miss는 업스트림 호출 하나로 합친다
+class AsyncTTLCache:
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: float = 30,
+        stale_seconds: float = 300,
+        max_entries: int = 1024,
+    ):
+        self.name = name
+        self.ttl = ttl_seconds
+        self.stale = stale_seconds
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # 무효화 이전에 시작된 조회 결과가 캐시에 다시 들어가지 않도록 구분
+        self._generation = 0
+
+    async def get_or_fetch(
+        self, key: str, fetch: Callable[[], Awaitable[Any]]
+    ) -> CacheEntry:
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                RESPONSE_CACHE_REQUESTS.labels(cache=self.name, result="hit").inc()
+                return entry
+            if age < self.ttl + self.stale:
+                # 오래된 값을 바로 돌려주고 갱신은 백그라운드에서 한 번만 수행
+                RESPONSE_CACHE_REQUESTS.labels(cache=self.name, result="stale").inc()
+                self._refresh(key, fetch)
+                return entry
+
+        RESPONSE_CACHE_REQUESTS.labels(cache=self.name, result="miss").inc()
+        return await asyncio.shield(self._refresh(key, fetch))
+
+    def _refresh(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, t))
+        return task
+
+    def _on_done(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # 백그라운드 갱신 실패는 기존(stale) 값을 유지하고 로그만 남긴다
+        if not task.cancelled() and task.exception() is not None:
+            logging.warning(f"{self.name} 캐시 갱신 실패({key}): {task.exception()}")
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]):
+        generation = self._generation
+        value = await fetch()
+        entry = CacheEntry(value, compute_etag(value), time.monotonic())
+        if generation != self._generation:
+            return entry
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    # key를 주지 않으면 전체 항목을 제거
+    def invalidate(self, key: Optional[str] = None) -> int:
+        self._generation += 1
+        if key is None:
+            removed = len(self._entries)
+            self._entries.clear()
+            return removed
+        return 1 if self._entries.pop(key, None) is not None else 0
+
+
+def create_model_cache() -> AsyncTTLCache:
+    return AsyncTTLCache(
+        "models",
+        ttl_seconds=float(os.getenv("MODEL_CACHE_TTL_SECONDS", "30")),
+        stale_seconds=float(os.getenv("MODEL_CACHE_STALE_SECONDS", "300")),
+    )
+
+
+def get_model_cache(request: Request) -> AsyncTTLCache:
+    return request.app.state.model_cache
+
+
+ModelCache = Annotated[AsyncTTLCache, Depends(get_model_cache)]
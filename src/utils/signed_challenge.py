@@ -0,0 +1,188 @@
+import base64
+import hashlib
+import hmac
+import logging
+import math
+import os
+import secrets
+import struct
+import time
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from prometheus_client import Counter
+
+from utils.challenge_store import CAPTCHA_STORE_SIZE, ChallengeStore
+
+# ==============================
+# Prometheus 메트릭 정의
+# ==============================
+CAPTCHA_TOKEN_REJECTED = Counter(
+    "captcha_token_rejected_total",
+    "검증에 실패한 서명 캡차 토큰 수 (malformed | signature | expired | replayed)",
+    ["reason"],
+)
+# ==============================
+
+# 토큰 = base64url(만료 시각 4바이트 | nonce 8바이트 | 정답 | HMAC-SHA256 앞 16바이트)
+# 정답은 /captcha 응답에도 그대로 나가므로 암호화하지 않고 서명만 한다
+_HEADER = struct.Struct(">I8s")
+_MAC_SIZE = 16
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(token: str) -> bytes:
+    return base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+
+
+# 고정 크기 Bloom 필터 (삭제 없음, 오탐 시 새 토큰을 재사용으로 잘못 판단할 수 있음)
+class BloomFilter:
+    def __init__(self, capacity: int, fp_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(64, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: bytes) -> Iterator[int]:
+        # 128비트 해시 하나를 둘로 나눠 k개의 위치를 만든다 (double hashing)
+        h1, h2 = struct.unpack(">QQ", hashlib.blake2b(key, digest_size=16).digest())
+        h2 |= 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    # 처음 보는 키면 기록하고 True, 이미 있던(또는 오탐) 키면 False
+    def add(self, key: bytes) -> bool:
+        added = False
+        for position in self._positions(key):
+            index, mask = position >> 3, 1 << (position & 7)
+            if not self.bits[index] & mask:
+                self.bits[index] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+
+# 만료 시각 구간별로 Bloom 필터를 나눠 두고, 구간의 토큰이 모두 만료되면 필터를 통째로 버린다
+# 살아 있는 필터 수는 TTL / bucket_seconds + 1개로 제한된다
+class ReplayFilter:
+    def __init__(self, bucket_seconds: float, capacity: int, fp_rate: float = 0.001):
+        self.bucket_seconds = bucket_seconds
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self._buckets: Dict[int, BloomFilter] = {}
+
+    def _rotate(self, now: float):
+        current = int(now // self.bucket_seconds)
+        for bucket in [bucket for bucket in self._buckets if bucket < current]:
+            del self._buckets[bucket]
+
+    # 처음 사용된 nonce면 True
+    def add(self, nonce: bytes, expires_at: float, now: float) -> bool:
+        self._rotate(now)
+        bucket = int(expires_at // self.bucket_seconds)
+        bloom = self._buckets.get(bucket)
+        if bloom is None:
+            bloom = BloomFilter(self.capacity, self.fp_rate)
+            self._buckets[bucket] = bloom
+        return bloom.add(nonce)
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self._buckets.values())
+
+
+# 서버에 정답을 저장하지 않는 캡차 저장소
+# 캡차 ID 자체가 정답과 만료 시각을 담은 서명 토큰이라 어느 워커/레플리카든 검증할 수 있다
+# 재사용 방지는 워커별 ReplayFilter로 하므로 레플리카 간에는 공유되지 않는다
+class SignedChallengeStore(ChallengeStore):
+    backend = "signed"
+
+    def __init__(
+        self,
+        keys: Sequence[bytes],
+        ttl_seconds: float = 300,
+        replay_filter: Optional[ReplayFilter] = None,
+    ):
+        if not keys:
+            raise ValueError("서명 키가 하나 이상 필요합니다.")
+        # 첫 번째 키로 서명하고, 나머지는 키 교체 중 이전 토큰 검증용
+        self.keys: List[bytes] = list(keys)
+        self.ttl = ttl_seconds
+        self.replay_filter = replay_filter or ReplayFilter(
+            bucket_seconds=max(1.0, ttl_seconds / 4), capacity=100_000
+        )
+        self._size = CAPTCHA_STORE_SIZE.labels(backend=self.backend)
+
+    @staticmethod
+    def _sign(key: bytes, payload: bytes) -> bytes:
+        return hmac.new(key, payload, hashlib.sha256).digest()[:_MAC_SIZE]
+
+    async def issue(self, expected: str) -> str:
+        expires_at = math.ceil(time.time() + self.ttl)
+        payload = _HEADER.pack(expires_at, secrets.token_bytes(8)) + expected.encode()
+        return _b64encode(payload + self._sign(self.keys[0], payload))
+
+    # 서명/만료를 확인하고 (정답, 만료 시각, nonce)를 돌려준다
+    def _verify(self, token: str, now: float) -> Optional[tuple]:
+        try:
+            data = _b64decode(token)
+        except ValueError:
+            data = b""
+        if len(data) <= _HEADER.size + _MAC_SIZE:
+            CAPTCHA_TOKEN_REJECTED.labels(reason="malformed").inc()
+            return None
+
+        payload, mac = data[:-_MAC_SIZE], data[-_MAC_SIZE:]
+        if not any(
+            hmac.compare_digest(mac, self._sign(key, payload)) for key in self.keys
+        ):
+            CAPTCHA_TOKEN_REJECTED.labels(reason="signature").inc()
+            return None
+
+        expires_at, nonce = _HEADER.unpack_from(payload)
+        if expires_at <= now:
+            CAPTCHA_TOKEN_REJECTED.labels(reason="expired").inc()
+            return None
+        return payload[_HEADER.size :].decode(), expires_at, nonce
+
+    async def get(self, challenge_id: str) -> Optional[str]:
+        verified = self._verify(challenge_id, time.time())
+        return verified[0] if verified else None
+
+    async def consume(self, challenge_id: str) -> Optional[str]:
+        now = time.time()
+        verified = self._verify(challenge_id, now)
+        if verified is None:
+            return None
+        expected, expires_at, nonce = verified
+        if not self.replay_filter.add(nonce, expires_at, now):
+            CAPTCHA_TOKEN_REJECTED.labels(reason="replayed").inc()
+            return None
+        self._size.set(len(self.replay_filter))
+        return expected
+
+
+# CAPTCHA_TOKEN_SECRET: 쉼표로 구분한 서명 키 목록 (첫 번째 키로 서명)
+# 설정하지 않으면 프로세스마다 임의의 키를 만들므로 다른 워커/레플리카에서 검증할 수 없다
+def create_signed_challenge_store(ttl_seconds: float) -> SignedChallengeStore:
+    secret = os.getenv("CAPTCHA_TOKEN_SECRET", "")
+    keys = [key.strip().encode() for key in secret.split(",") if key.strip()]
+    if not keys:
+        logging.warning(
+            "CAPTCHA_TOKEN_SECRET이 설정되지 않아 임시 서명 키를 사용합니다. "
+            "여러 워커/레플리카에서는 같은 키를 설정하세요."
+        )
+        keys = [secrets.token_bytes(32)]
+
+    buckets = max(1, int(os.getenv("CAPTCHA_REPLAY_FILTER_BUCKETS", "4")))
+    replay_filter = ReplayFilter(
+        bucket_seconds=max(1.0, ttl_seconds / buckets),
+        capacity=int(os.getenv("CAPTCHA_REPLAY_FILTER_CAPACITY", "100000")),
+        fp_rate=float(os.getenv("CAPTCHA_REPLAY_FILTER_FP_RATE", "0.001")),
+    )
+    return SignedChallengeStore(
+        keys, ttl_seconds=ttl_seconds, replay_filter=replay_filter
+    )
@@ -0,0 +1,202 @@
+import asyncio
+import base64
+import io
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from PIL import Image, ImageDraw
+from prometheus_client import Gauge
+
+from utils.image_processing import INPUT_SIZE, decode_image_timed
+from utils.import_profile import ImportProfiler
+
+# ==============================
+# Prometheus 메트릭 정의
+# ==============================
+# 콜드 스타트 추적용 (워커마다 시작할 때 한 번 기록)
+STARTUP_PHASE_SECONDS = Gauge(
+    "startup_phase_seconds",
+    "서버 시작 단계별 소요 시간(초) (imports | lifespan | warmup_<단계>)",
+    ["phase"],
+    multiprocess_mode="livemax",
+)
+STARTUP_IMPORT_SECONDS = Gauge(
+    "startup_import_seconds",
+    "시작 시 모듈별 import 시간(초, 하위 import 포함)",
+    ["module"],
+    multiprocess_mode="livemax",
+)
+STARTUP_IMPORT_RSS = Gauge(
+    "startup_import_rss_bytes",
+    "시작 시 모듈별 import로 늘어난 RSS(바이트, 하위 import 포함)",
+    ["module"],
+    multiprocess_mode="livemax",
+)
+APP_READY = Gauge(
+    "app_ready",
+    "워밍업이 끝나 요청을 받을 준비가 됐는지 (0 | 1)",
+    multiprocess_mode="livemin",
+)
+# ==============================
+
+# eager: 워밍업이 끝난 뒤 요청을 받는다 (기본)
+# background: 바로 요청을 받고 워밍업은 백그라운드에서, 끝날 때까지 /ready는 503
+# off: 워밍업 없음. 무거운 import/모델 로드는 그것이 필요한 첫 요청에서 일어난다
+WARMUP_MODES = ("eager", "background", "off")
+
+
+# 시작 시 import 시간을 로그로 출력하고 메트릭에 기록 (프로세스당 한 번)
+# 모듈별 트리는 IMPORT_PROFILE=true일 때만
+# IMPORT_REPORT_MIN_MS: 이보다 오래 걸린 import만 남긴다 (.env 로딩 이후에 읽는다)
+def report_imports(profiler: ImportProfiler):
+    if not profiler.stop():
+        return
+    min_seconds = float(os.getenv("IMPORT_REPORT_MIN_MS", "5")) / 1000
+    STARTUP_PHASE_SECONDS.labels(phase="imports").set(profiler.seconds)
+    for record in profiler.records:
+        if record is None or record.seconds < min_seconds:
+            continue
+        STARTUP_IMPORT_SECONDS.labels(module=record.name).set(record.seconds)
+        STARTUP_IMPORT_RSS.labels(module=record.name).set(record.rss_bytes)
+
+    rss = (profiler.finish_rss - profiler.start_rss) / 2**20
+    lines = profiler.report(min_seconds)
+    logging.info(
+        f"startup imports: {profiler.seconds * 1000:.0f} ms, RSS {rss:+.1f} MB"
+        + "".join("\n" + line for line in lines)
+    )
+
+
+# 프론트 캔버스와 같은 크기의 투명 배경 PNG에 획 하나
+def _warmup_image(size: int) -> str:
+    image = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    draw.line(
+        [(size * 0.4, size * 0.2), (size * 0.55, size * 0.8)],
+        fill=(0, 0, 0, 255),
+        width=max(1, size // 20),
+    )
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+# 워밍업 진행 상태와 /ready 응답
+class Readiness:
+    def __init__(self, mode: str = "eager", step_timeout: float = 10.0):
+        if mode not in WARMUP_MODES:
+            raise ValueError(f"알 수 없는 워밍업 모드입니다: {mode}")
+        self.mode = mode
+        self.step_timeout = step_timeout
+        self.ready = False
+        self.error: Optional[str] = None
+        self.steps: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        APP_READY.set(0)
+
+    def _set_ready(self):
+        self.ready = True
+        APP_READY.set(1)
+
+    async def _step(self, name: str, coro, required: bool = False):
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(coro, self.step_timeout)
+            self.steps[name] = f"{(time.monotonic() - start) * 1000:.1f} ms"
+        except Exception as e:
+            self.steps[name] = f"error: {e!r}"
+            if required:
+                raise
+            logging.warning(f"워밍업 단계 실패 ({name}), 계속 진행: {e!r}")
+        finally:
+            STARTUP_PHASE_SECONDS.labels(phase=f"warmup_{name}").set(
+                time.monotonic() - start
+            )
+
+    # 1) 로컬 모델 로드 (onnxruntime/torch import 포함, 실패는 치명적)
+    # 2) 전처리 경로: 디코딩/중앙 정렬/텐서 변환 (프로세스 풀이면 워커마다 한 번씩)
+    #    실제 요청이 429를 받지 않도록 대기열의 절반 이상은 쓰지 않는다
+    # 3) 원격 ML 커넥션 풀: 백엔드마다 헬스 체크로 연결을 미리 연다
+    # 4) 더미 입력으로 추론 한 번
+    # 2~4의 실패는 로그만 남긴다 (원격 서비스 장애가 준비 상태를 막지 않도록)
+    async def warm_up(self, state):
+        engine = state.inference_engine
+        if engine.local:
+            loop = asyncio.get_running_loop()
+            await self._step(
+                "model", loop.run_in_executor(engine.executor, engine.load), True
+            )
+
+        limits = state.image_limits
+        image = _warmup_image(limits.target_size)
+        pool = state.preprocess_pool
+        jobs = max(1, min(pool.process_workers, pool.max_pending // 2))
+        await self._step(
+            "preprocess",
+            asyncio.gather(
+                *(pool.run(decode_image_timed, image, limits) for _ in range(jobs))
+            ),
+        )
+        await self._step("http_pool", state.ml_client.probe())
+        batch = np.zeros((1, 1, INPUT_SIZE, INPUT_SIZE), dtype=np.float32)
+        await self._step("inference", engine(batch))
+
+    async def _run(self, state):
+        start = time.monotonic()
+        try:
+            await self.warm_up(state)
+        except Exception as e:
+            self.error = repr(e)
+            raise
+        STARTUP_PHASE_SECONDS.labels(phase="warmup").set(time.monotonic() - start)
+        logging.info(f"warm-up ({self.mode}): {self.steps}")
+        self._set_ready()
+
+    async def start(self, state):
+        if self.mode == "off":
+            self._set_ready()
+        elif self.mode == "eager":
+            await self._run(state)
+        else:
+            self._task = asyncio.create_task(self._run(state))
+            self._task.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"백그라운드 워밍업 실패: {task.exception()!r}")
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def status(self) -> dict:
+        status = {"ready": self.ready, "mode": self.mode, "steps": self.steps}
+        if self.error is not None:
+            status["error"] = self.error
+        return status
+
+
+# WARMUP_MODE: eager | background | off
+# WARMUP_STEP_TIMEOUT_SECONDS: 워밍업 단계별 제한 시간
+def create_readiness() -> Readiness:
+    return Readiness(
+        mode=os.getenv("WARMUP_MODE", "eager"),
+        step_timeout=float(os.getenv("WARMUP_STEP_TIMEOUT_SECONDS", "10")),
+    )
+
+
+# 로드 밸런서/쿠버네티스 readiness probe용 (워밍업 전이면 503)
+async def handle_ready(request: Request):
+    readiness: Readiness = request.app.state.readiness
+    return JSONResponse(readiness.status(), status_code=200 if readiness.ready else 503)
@@ -0,0 +1,81 @@
+import os
+import time
+import zipfile
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+CHUNK_SIZE = 64 * 1024
+
+
+# ZIP에 담을 항목: 이름, 바이트 청크, (알고 있다면) 원본 크기, 압축 방식
+class ZipMember(NamedTuple):
+    arcname: str
+    chunks: Iterable[bytes]
+    size: Optional[int] = None
+    compress_type: int = zipfile.ZIP_STORED
+    mtime: Optional[float] = None
+
+
+# ZipFile이 쓰는 바이트를 모아 두었다가 꺼내 가는 seek 불가능한 출력 버퍼
+class _ChunkSink:
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def read_file_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def file_member(
+    path: str, arcname: str, compress_type: int = zipfile.ZIP_STORED
+) -> ZipMember:
+    stat = os.stat(path)
+    return ZipMember(
+        arcname=arcname,
+        chunks=read_file_chunks(path),
+        size=stat.st_size,
+        compress_type=compress_type,
+        mtime=stat.st_mtime,
+    )
+
+
+# 항목을 읽는 대로 ZIP 바이트 청크를 내보낸다 (아카이브 전체를 메모리에 두지 않음).
+# 출력이 seek 불가능하므로 각 항목의 CRC/크기는 data descriptor로 뒤에 기록된다.
+def stream_zip(members: Iterable[ZipMember]) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", allowZip64=True) as zf:
+        for member in members:
+            date_time = time.localtime(member.mtime or time.time())[:6]
+            zinfo = zipfile.ZipInfo(member.arcname, date_time=date_time)
+            zinfo.compress_type = member.compress_type
+            if member.size is not None:
+                zinfo.file_size = member.size
+            with zf.open(zinfo, mode="w", force_zip64=member.size is None) as dest:
+                for chunk in member.chunks:
+                    dest.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    # 중앙 디렉터리는 close 시점에 기록된다
+    data = sink.drain()
+    if data:
+        yield data
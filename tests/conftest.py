@@ -0,0 +1,86 @@
+import base64
+import io
+import os
+
+import httpx
+import numpy as np
+import pytest
+import stub_ml_server
+from fastapi.testclient import TestClient
+from PIL import Image, ImageDraw
+
+from utils.http_client import InstrumentedTransport
+
+# 스텁이 모든 입력에 대해 이 숫자를 예측하도록 고정
+PREDICTED_DIGIT = 7
+
+
+def _fixed_logits(inputs: np.ndarray) -> list:
+    rows = inputs.reshape(inputs.shape[0], -1)
+    return np.eye(10, dtype=np.float32)[[PREDICTED_DIGIT] * len(rows)].tolist()
+
+
+# 원격 ML 서비스 스텁: 장애 주입 설정은 테스트마다 초기화
+@pytest.fixture
+def stub_ml(monkeypatch):
+    faults = dict(stub_ml_server.FAULTS)
+    stub_ml_server.FAULTS.update(latency_ms=0, error_rate=0, slow_rate=0)
+    monkeypatch.setattr(stub_ml_server, "_fake_logits", _fixed_logits)
+    yield stub_ml_server
+    stub_ml_server.FAULTS.update(faults)
+
+
+# 임시 디렉터리(static/, 라벨 DB)에서 앱을 띄우도록 설정하고 원격 ML 호출은 스텁으로 연결
+# 환경 변수는 lifespan에서 읽으므로 TestClient를 시작하기 전에 바꾸면 된다
+@pytest.fixture
+def app(tmp_path, monkeypatch, stub_ml):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("REMOTE_ML_SERVICE_URLS", raising=False)
+    monkeypatch.setenv("REMOTE_ML_SERVICE_URL", "http://stub-ml")
+    monkeypatch.setenv("REMOTE_ML_HEALTH_INTERVAL_SECONDS", "0")
+    monkeypatch.setenv("CAPTCHA_STORE_BACKEND", "memory")
+    monkeypatch.setenv("WARMUP_MODE", "off")
+    monkeypatch.setenv("PREPROCESS_EXECUTOR", "thread")
+
+    import main
+
+    monkeypatch.setattr(
+        main,
+        "create_http_client",
+        lambda: httpx.AsyncClient(
+            transport=InstrumentedTransport(httpx.ASGITransport(app=stub_ml.app))
+        ),
+    )
+    return main.app
+
+
+@pytest.fixture
+def client(app):
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+# 프론트 캔버스처럼 흰 바탕에 검은 획 하나를 그린 PNG data URL
+@pytest.fixture
+def canvas() -> str:
+    image = Image.new("L", (280, 280), 255)
+    ImageDraw.Draw(image).line([(100, 50), (150, 230)], fill=0, width=15)
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+# static/images에 이미지를 저장하고 앱의 라벨 저장소에 기록 (seq 1부터)
+@pytest.fixture
+def save_dataset(client):
+    def save(count: int) -> list:
+        os.makedirs("static/images", exist_ok=True)
+        rows = []
+        for i in range(count):
+            filename = f"captcha_{i}.png"
+            Image.new("L", (28, 28), i).save(os.path.join("static/images", filename))
+            rows.append((filename, str(i)))
+        client.app.state.label_store.save_labels(rows)
+        return rows
+
+    return save
@@ -0,0 +1,95 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from utils.batcher import MicroBatcher
+
+
+class BadInput(ValueError):
+    pass
+
+
+# 각 입력 행의 첫 값을 예측 결과로 돌려주는 가짜 원격 호출
+class Backend:
+    def __init__(self, delay: float = 0.0):
+        self.calls = []
+        self.delay = delay
+
+    async def __call__(self, batch: np.ndarray) -> list:
+        self.calls.append(len(batch))
+        await asyncio.sleep(self.delay)
+        if (batch < 0).any():
+            raise BadInput("음수 입력")
+        return [float(row.flat[0]) for row in batch]
+
+
+def _row(value: float, width: int = 4) -> np.ndarray:
+    return np.full((1, width), value, dtype=np.float32)
+
+
+def _run(batcher: MicroBatcher, *inputs) -> list:
+    async def scenario():
+        await batcher.start()
+        try:
+            return await asyncio.gather(
+                *(batcher.submit(x) for x in inputs), return_exceptions=True
+            )
+        finally:
+            await batcher.stop()
+
+    return asyncio.run(scenario())
+
+
+def test_concurrent_submits_share_one_call():
+    backend = Backend()
+    results = _run(MicroBatcher(backend, max_wait_ms=20), *map(_row, range(5)))
+    assert results == [[0.0], [1.0], [2.0], [3.0], [4.0]]
+    assert backend.calls == [5]
+
+
+def test_batches_are_capped():
+    backend = Backend()
+    batcher = MicroBatcher(backend, max_batch_size=2, max_wait_ms=20)
+    results = _run(batcher, *map(_row, range(5)))
+    assert results == [[0.0], [1.0], [2.0], [3.0], [4.0]]
+    assert backend.calls == [2, 2, 1]
+
+
+def test_different_shapes_are_sent_separately():
+    backend = Backend()
+    results = _run(MicroBatcher(backend, max_wait_ms=20), _row(1, 4), _row(2, 8))
+    assert results == [[1.0], [2.0]]
+    assert sorted(backend.calls) == [1, 1]
+
+
+def test_client_error_is_isolated_to_its_request():
+    backend = Backend()
+    batcher = MicroBatcher(
+        backend, max_wait_ms=20, split_on_error=lambda e: isinstance(e, BadInput)
+    )
+    good, bad, other = _run(batcher, _row(1), _row(-1), _row(2))
+    assert good == [1.0] and other == [2.0]
+    assert isinstance(bad, BadInput)
+    # 한 번 묶어 보낸 뒤 실패하면 요청별로 다시 보낸다
+    assert backend.calls == [3, 1, 1, 1]
+
+
+def test_other_errors_fail_the_whole_batch():
+    backend = Backend()
+    results = _run(MicroBatcher(backend, max_wait_ms=20), _row(1), _row(-1))
+    assert all(isinstance(result, BadInput) for result in results)
+    assert backend.calls == [2]
+
+
+def test_prediction_count_mismatch_is_an_error():
+    async def short(batch):
+        return [0.0]
+
+    results = _run(MicroBatcher(short, max_wait_ms=20), _row(1), _row(2))
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_submit_requires_start():
+    with pytest.raises(RuntimeError):
+        asyncio.run(MicroBatcher(Backend()).submit(_row(1)))
@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+from starlette.datastructures import Headers
+
+from utils.bulk_inference import BulkInputError, read_bulk_batches
+
+NDJSON = {"content-type": "application/x-ndjson"}
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def _read_batches(headers: dict, *parts: bytes, batch_size: int = 2) -> list:
+    async def collect():
+        return [
+            (json.loads(body), rows)
+            async for body, rows in read_bulk_batches(
+                _chunks(*parts), Headers(headers), batch_size
+            )
+        ]
+
+    return asyncio.run(collect())
+
+
+def test_ndjson_batches_split_across_chunks():
+    batches = _read_batches(NDJSON, b"[1, 2]\n[3,", b" 4]\n\n[5, 6]\n", b"[7, 8]")
+    assert batches == [
+        ({"inputs": [[1, 2], [3, 4]]}, 2),
+        ({"inputs": [[5, 6], [7, 8]]}, 2),
+    ]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b'[1, 2]\n["a", "b"]\n', b"[1, 2]\n[3]\n", b"[[1, 2]]\n", b"{not json}\n"],
+)
+def test_ndjson_rejects_bad_rows(body):
+    with pytest.raises(BulkInputError):
+        _read_batches(NDJSON, body)
+
+
+@pytest.mark.parametrize(
+    "parts, line",
+    [
+        ((b"1\n",), 1),
+        ((b"[1, 2]\n[3]\n",), 2),
+        # 빈 줄도 세어 요청 본문의 줄 번호와 맞춘다
+        ((b"[1, 2]\n\n[3, 4]\n", b'["x", 1]'), 4),
+    ],
+)
+def test_ndjson_errors_report_one_based_line(parts, line):
+    with pytest.raises(BulkInputError, match=f"^{line}번째 줄"):
+        _read_batches(NDJSON, *parts)
+
+
+def test_raw_batches():
+    values = np.arange(6, dtype=np.float32)
+    headers = {"content-type": "application/octet-stream", "x-tensor-shape": "3,2"}
+    batches = _read_batches(headers, values.tobytes())
+    assert batches == [
+        ({"inputs": [[0, 1], [2, 3]]}, 2),
+        ({"inputs": [[4, 5]]}, 1),
+    ]
+
+
+def test_unsupported_content_type():
+    with pytest.raises(BulkInputError):
+        _read_batches({"content-type": "text/csv"}, b"1,2\n")
+
+
+@pytest.fixture
+def bulk_client(monkeypatch, request):
+    monkeypatch.setenv("MODEL_BULK_BATCH_SIZE", "2")
+    return request.getfixturevalue("client")
+
+
+def test_bulk_endpoint_streams_predictions_in_order(bulk_client):
+    body = b"".join(json.dumps([i, i]).encode() + b"\n" for i in range(5))
+    response = bulk_client.post(
+        "/models/predict/HybridCNN/1/bulk", content=body, headers=NDJSON
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.content.splitlines()
+    assert len(lines) == 5
+    assert all(len(json.loads(line)) == 10 for line in lines)
+
+
+@pytest.mark.parametrize("body", [b"", b"[1, 2]\n[1]\n"])
+def test_bulk_endpoint_rejects_bad_input(bulk_client, body):
+    response = bulk_client.post(
+        "/models/predict/HybridCNN/1/bulk", content=body, headers=NDJSON
+    )
+    assert response.status_code == 400
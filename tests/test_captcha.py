@@ -0,0 +1,82 @@
+import pytest
+from conftest import PREDICTED_DIGIT
+
+
+def _issue(client, expected: str) -> str:
+    store = client.app.state.challenge_store
+    return client.portal.call(store.issue, expected)
+
+
+def test_captcha_issues_unique_ids(client):
+    first = client.get("/captcha").json()
+    second = client.get("/captcha").json()
+    assert first["id"] != second["id"]
+    assert first["expected"] in [str(digit) for digit in range(10)]
+
+
+@pytest.mark.parametrize(
+    "expected, passed",
+    [(str(PREDICTED_DIGIT), True), (str((PREDICTED_DIGIT + 1) % 10), False)],
+)
+def test_predict_compares_with_expected_digit(client, canvas, expected, passed):
+    captcha_id = _issue(client, expected)
+    response = client.post("/predict", json={"id": captcha_id, "image": canvas})
+    assert response.status_code == 200
+    assert response.json()["passed"] is passed
+
+
+def test_challenge_is_single_use(client, canvas):
+    captcha_id = client.get("/captcha").json()["id"]
+    assert (
+        client.post("/predict", json={"id": captcha_id, "image": canvas}).status_code
+        == 200
+    )
+    assert (
+        client.post("/predict", json={"id": captcha_id, "image": canvas}).status_code
+        == 400
+    )
+
+
+def test_unknown_challenge_is_rejected(client, canvas):
+    response = client.post("/predict", json={"id": "missing", "image": canvas})
+    assert response.status_code == 400
+
+
+# 전처리 큐 포화(429)는 캡차를 소비하지 않으므로 같은 ID로 다시 시도할 수 있다
+def test_retry_after_pool_saturated(client, canvas):
+    pool = client.app.state.preprocess_pool
+    captcha_id = _issue(client, str(PREDICTED_DIGIT))
+
+    pool._pending = pool.max_pending
+    try:
+        response = client.post("/predict", json={"id": captcha_id, "image": canvas})
+    finally:
+        pool._pending = 0
+    assert response.status_code == 429
+
+    response = client.post("/predict", json={"id": captcha_id, "image": canvas})
+    assert response.status_code == 200
+    assert response.json()["passed"] is True
+
+
+# 추론 서버 장애도 캡차를 소비하지 않는다
+def test_retry_after_upstream_failure(client, canvas, stub_ml):
+    captcha_id = _issue(client, str(PREDICTED_DIGIT))
+
+    stub_ml.FAULTS["error_rate"] = 1.0
+    response = client.post("/predict", json={"id": captcha_id, "image": canvas})
+    assert response.status_code >= 500
+
+    stub_ml.FAULTS["error_rate"] = 0.0
+    response = client.post("/predict", json={"id": captcha_id, "image": canvas})
+    assert response.status_code == 200
+    assert response.json()["passed"] is True
+
+
+@pytest.mark.parametrize("image", ["data:image/png;base64,AAAA", "not a data url"])
+def test_invalid_image_keeps_challenge(client, canvas, image):
+    captcha_id = _issue(client, str(PREDICTED_DIGIT))
+    response = client.post("/predict", json={"id": captcha_id, "image": image})
+    assert response.status_code in (400, 413, 415)
+    response = client.post("/predict", json={"id": captcha_id, "image": canvas})
+    assert response.status_code == 200
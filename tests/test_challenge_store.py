@@ -0,0 +1,166 @@
+import asyncio
+import types
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from utils import challenge_store, signed_challenge
+from utils.challenge_store import (
+    ChallengeStore,
+    KeyValueChallengeStore,
+    MemoryChallengeStore,
+    RedisChallengeStore,
+    create_challenge_store,
+)
+from utils.signed_challenge import SignedChallengeStore
+
+
+# 저장소 모듈이 보는 시계를 테스트에서 움직인다
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    fake_time = types.SimpleNamespace(monotonic=clock, time=clock)
+    monkeypatch.setattr(challenge_store, "time", fake_time)
+    monkeypatch.setattr(signed_challenge, "time", fake_time)
+    return clock
+
+
+def test_interfaces_are_abstract():
+    with pytest.raises(TypeError):
+        ChallengeStore()
+    with pytest.raises(TypeError):
+        KeyValueChallengeStore()
+
+
+@pytest.mark.parametrize("backend", ["memory", "signed", "fakeredis"])
+def test_issue_get_consume_once(backend, monkeypatch):
+    if backend == "fakeredis":
+        monkeypatch.setenv("CAPTCHA_STORE_BACKEND", "redis")
+        monkeypatch.setenv("CAPTCHA_STORE_REDIS_URL", "fakeredis://")
+    else:
+        monkeypatch.setenv("CAPTCHA_STORE_BACKEND", backend)
+
+    # Redis 클라이언트는 실행 중인 이벤트 루프 안에서 만든다
+    async def scenario():
+        store = create_challenge_store()
+        challenge_id = await store.issue("1234")
+        assert await store.get(challenge_id) == "1234"
+        # 조회만 해서는 삭제되지 않는다
+        assert await store.get(challenge_id) == "1234"
+        assert await store.consume(challenge_id) == "1234"
+        # 같은 ID를 다시 쓰면 거부
+        assert await store.consume(challenge_id) is None
+        assert await store.get("unknown") is None
+        assert await store.consume("unknown") is None
+        await store.close()
+
+    asyncio.run(scenario())
+
+
+def test_unknown_backend(monkeypatch):
+    monkeypatch.setenv("CAPTCHA_STORE_BACKEND", "memcached")
+    with pytest.raises(ValueError):
+        create_challenge_store()
+
+
+def test_memory_store_expires(clock):
+    store = MemoryChallengeStore(ttl_seconds=10)
+
+    async def scenario():
+        first = await store.issue("1")
+        clock.now += 5
+        second = await store.issue("2")
+        clock.now += 6
+        assert await store.get(first) is None
+        assert await store.get(second) == "2"
+        # 새 항목을 넣을 때 앞쪽의 만료 항목이 정리된다
+        clock.now += 5
+        await store.issue("3")
+        assert len(store) == 1
+
+    asyncio.run(scenario())
+
+
+def test_memory_store_evicts_oldest_issued_first(clock):
+    store = MemoryChallengeStore(ttl_seconds=60, max_entries=2)
+
+    async def scenario():
+        first = await store.issue("1")
+        second = await store.issue("2")
+        # 조회해도 순서는 바뀌지 않는다 (발급 순 = 만료 순 유지)
+        assert await store.get(first) == "1"
+        third = await store.issue("3")
+        assert len(store) == 2
+        assert await store.get(first) is None
+        assert await store.get(second) == "2"
+        assert await store.get(third) == "3"
+
+    asyncio.run(scenario())
+
+
+def test_redis_store_expires_and_tracks_size():
+    async def scenario():
+        store = RedisChallengeStore(FakeAsyncRedis(), ttl_seconds=0.05)
+        expired = await store.issue("1")
+        await asyncio.sleep(0.1)
+        live = await store.issue("2")
+        assert await store.get(expired) is None
+        assert await store.consume(expired) is None
+        # 색인에서도 만료 항목이 정리된다
+        assert await store.refresh_size() == 1
+        assert await store.consume(live) == "2"
+        assert await store.refresh_size() == 0
+        await store.close()
+
+    asyncio.run(scenario())
+
+
+def test_redis_store_consumes_once_under_concurrency():
+    async def scenario():
+        store = RedisChallengeStore(FakeAsyncRedis())
+        challenge_id = await store.issue("42")
+        results = await asyncio.gather(*(store.consume(challenge_id) for _ in range(5)))
+        await store.close()
+        return results
+
+    assert sorted(asyncio.run(scenario()), key=str) == ["42"] + [None] * 4
+
+
+def test_signed_store_rejects_tampering_and_expiry(clock):
+    store = SignedChallengeStore([b"k1"], ttl_seconds=10)
+    other = SignedChallengeStore([b"k2"], ttl_seconds=10)
+
+    async def scenario():
+        token = await store.issue("1234")
+        # 다른 키로 서명한 토큰, 잘린 토큰, 글자를 바꾼 토큰은 거부
+        assert await store.get(await other.issue("1234")) is None
+        assert await store.get(token[:10]) is None
+        flipped = token[:-1] + ("A" if token[-1] != "A" else "B")
+        assert await store.get(flipped) is None
+        assert await store.get("not base64 !") is None
+
+        clock.now += 11
+        assert await store.consume(token) is None
+
+    asyncio.run(scenario())
+
+
+def test_signed_store_accepts_previous_key_during_rotation(clock):
+    old = SignedChallengeStore([b"old"], ttl_seconds=10)
+    rotated = SignedChallengeStore([b"new", b"old"], ttl_seconds=10)
+
+    async def scenario():
+        token = await old.issue("99")
+        assert await rotated.consume(token) == "99"
+        assert await rotated.consume(token) is None
+        assert await old.get(await rotated.issue("1")) is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,93 @@
+import asyncio
+import os
+
+from PIL import Image
+from prometheus_client import REGISTRY
+
+from utils.dataset_writer import DatasetWriter
+from utils.image_label_store import ImageLabelStore
+
+
+def _dropped(reason: str) -> float:
+    return (
+        REGISTRY.get_sample_value("dataset_captures_dropped_total", {"reason": reason})
+        or 0.0
+    )
+
+
+def _writer(tmp_path, **kwargs) -> DatasetWriter:
+    store = ImageLabelStore(
+        str(tmp_path / "labels.db"), legacy_csv_path=str(tmp_path / "labels.csv")
+    )
+    return DatasetWriter(store, save_dir=str(tmp_path / "images"), **kwargs)
+
+
+def _image(value: int) -> Image.Image:
+    return Image.new("L", (28, 28), value)
+
+
+def test_writes_images_and_labels_in_batches(tmp_path):
+    writer = _writer(tmp_path, flush_size=2, flush_interval_ms=1000)
+
+    async def scenario():
+        await writer.start()
+        accepted = [
+            writer.submit("a.png", _image(0), "1"),
+            writer.submit("b.png", _image(1), "2"),
+            writer.submit("c.png", _image(2), None),
+        ]
+        # 종료 시 대기 중인 캡처를 모두 기록한다
+        await writer.stop()
+        return accepted
+
+    assert asyncio.run(scenario()) == [True, True, True]
+    assert sorted(os.listdir(tmp_path / "images")) == ["a.png", "b.png", "c.png"]
+    with Image.open(tmp_path / "images" / "b.png") as saved:
+        assert saved.getpixel((0, 0)) == 1
+    # 라벨이 없는 캡처는 이미지만 저장
+    assert writer.label_store.load_labels() == {"a.png": "1", "b.png": "2"}
+
+
+def test_drops_when_queue_is_full(tmp_path):
+    writer = _writer(tmp_path, max_queue=1)
+    before = _dropped("overflow")
+
+    async def scenario():
+        await writer.start()
+        # 백그라운드 태스크가 큐를 비우기 전에 연달아 넣는다
+        accepted = [writer.submit(f"{i}.png", _image(i), "1") for i in range(3)]
+        await writer.stop()
+        return accepted
+
+    assert asyncio.run(scenario()) == [True, False, False]
+    assert _dropped("overflow") - before == 2
+    assert os.listdir(tmp_path / "images") == ["0.png"]
+
+
+def test_sampling_and_stopped_writer_drop(tmp_path):
+    sampled = _writer(tmp_path, sample_rate=0.0)
+    before = _dropped("sampled"), _dropped("stopped")
+
+    async def scenario():
+        await sampled.start()
+        result = sampled.submit("a.png", _image(0), "1")
+        await sampled.stop()
+        return result
+
+    assert asyncio.run(scenario()) is False
+    assert _writer(tmp_path).submit("b.png", _image(0), "1") is False
+    assert _dropped("sampled") - before[0] == 1
+    assert _dropped("stopped") - before[1] == 1
+    assert not os.path.exists(tmp_path / "images")
+
+
+def test_predict_saves_capture(client, canvas):
+    captcha = client.get("/captcha").json()
+    response = client.post("/predict", json={"id": captcha["id"], "image": canvas})
+    assert response.status_code == 200
+
+    # writer를 멈추면 대기 중인 캡처를 모두 기록한다 (lifespan 종료와 같은 경로)
+    client.portal.call(client.app.state.dataset_writer.stop)
+    filename = f"captcha_{captcha['id']}.png"
+    assert os.path.exists(os.path.join("static", "images", filename))
+    assert client.app.state.label_store.get_label(filename) == captcha["expected"]
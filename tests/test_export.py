@@ -0,0 +1,113 @@
+import hashlib
+import io
+import json
+import os
+import zipfile
+
+from utils.zip_stream import ZipMember, stream_zip
+
+
+def test_stream_zip_round_trip():
+    stored = os.urandom(200_000)
+    members = [
+        ZipMember(
+            "stored.bin",
+            (stored[i : i + 65536] for i in range(0, len(stored), 65536)),
+            size=len(stored),
+        ),
+        # 크기를 모르는 항목은 ZIP64 data descriptor로 기록
+        ZipMember(
+            "labels.csv",
+            iter([b"filename,label\n", b"a.png,1\n"]),
+            compress_type=zipfile.ZIP_DEFLATED,
+        ),
+    ]
+    chunks = list(stream_zip(members))
+    # 항목을 읽는 대로 내보내므로 아카이브가 한 덩어리로 나오지 않는다
+    assert len(chunks) > 2
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    assert archive.namelist() == ["stored.bin", "labels.csv"]
+    assert archive.read("stored.bin") == stored
+    assert archive.read("labels.csv") == b"filename,label\na.png,1\n"
+    assert archive.getinfo("stored.bin").compress_type == zipfile.ZIP_STORED
+
+
+def test_full_export(client, save_dataset):
+    rows = save_dataset(3)
+    response = client.get("/images")
+    assert response.status_code == 200
+    assert response.headers["X-Export-Next-Cursor"] == "3"
+
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert sorted(archive.namelist()) == sorted(
+        [filename for filename, _ in rows] + ["labels.csv"]
+    )
+    labels = archive.read("labels.csv").decode().splitlines()
+    assert labels == ["filename,label"] + [f"{f},{label}" for f, label in rows]
+
+
+def test_full_export_of_empty_dataset(client):
+    response = client.get("/images")
+    assert response.status_code == 200
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.namelist() == ["labels.csv"]
+    assert archive.read("labels.csv").decode().splitlines() == ["filename,label"]
+
+
+def test_incremental_export(client, save_dataset):
+    save_dataset(3)
+    params = {"since_seq": 1, "limit": 1}
+    response = client.get("/images", params=params)
+    assert response.status_code == 200
+    assert response.headers["X-Export-Cursor-Start"] == "1"
+    assert response.headers["X-Export-Next-Cursor"] == "2"
+    assert response.headers["X-Export-Has-More"] == "true"
+
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.namelist() == ["captcha_1.png", "labels.csv", "manifest.json"]
+    manifest = json.loads(archive.read("manifest.json"))
+    assert manifest["next_cursor"] == 2
+    assert manifest["has_more"] is True
+    (entry,) = manifest["files"]
+    assert entry["seq"] == 2
+    assert entry["label"] == "1"
+    assert entry["sha256"] == hashlib.sha256(archive.read("captcha_1.png")).hexdigest()
+
+    # 같은 커서 범위는 같은 바이트 (끊긴 다운로드를 다시 받아도 동일)
+    assert client.get("/images", params=params).content == response.content
+
+    response = client.get("/images", params={"since_seq": 2})
+    assert response.headers["X-Export-Has-More"] == "false"
+    assert response.headers["X-Export-Next-Cursor"] == "3"
+
+
+def test_incremental_export_since_time(client, save_dataset):
+    save_dataset(2)
+    response = client.get("/images", params={"since": 0})
+    assert response.headers["X-Export-Cursor-Start"] == "0"
+    assert response.headers["X-Export-Next-Cursor"] == "2"
+
+
+def test_incremental_export_reports_missing_files(client, save_dataset):
+    save_dataset(2)
+    os.remove("static/images/captcha_0.png")
+    response = client.get("/images", params={"since_seq": 0})
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    manifest = json.loads(archive.read("manifest.json"))
+    assert manifest["missing"] == ["captcha_0.png"]
+    assert [entry["filename"] for entry in manifest["files"]] == ["captcha_1.png"]
+
+
+def test_export_rejects_negative_cursor(client):
+    assert client.get("/images", params={"since_seq": -1}).status_code == 422
+
+
+def test_default_limit_is_read_per_request(client, save_dataset, monkeypatch):
+    save_dataset(3)
+    # 앱이 시작된 뒤에 바뀐 값도 다음 요청부터 적용된다
+    monkeypatch.setenv("EXPORT_DEFAULT_LIMIT", "2")
+    response = client.get("/images", params={"since_seq": 0})
+    assert response.headers["X-Export-Next-Cursor"] == "2"
+    assert response.headers["X-Export-Has-More"] == "true"
@@ -0,0 +1,55 @@
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from utils.http_client import InstrumentedTransport, create_http_client
+
+
+def _sample(name: str) -> float:
+    return REGISTRY.get_sample_value(name) or 0.0
+
+
+def test_pool_settings_are_read_when_the_client_is_created(monkeypatch):
+    monkeypatch.setenv("REMOTE_ML_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("REMOTE_ML_MAX_KEEPALIVE", "3")
+    monkeypatch.setenv("REMOTE_ML_READ_TIMEOUT", "2.5")
+
+    async def scenario():
+        async with create_http_client() as client:
+            pool = client._transport._transport._pool
+            return pool._max_connections, pool._max_keepalive_connections, client
+
+    max_connections, max_keepalive, client = asyncio.run(scenario())
+    assert (max_connections, max_keepalive) == (7, 3)
+    assert client.timeout.read == 2.5
+    assert _sample("remote_ml_pool_max_connections") == 7
+
+
+# 동시 요청이 모두 끝나면 진행 중 요청 게이지가 원래 값으로 돌아온다
+def test_instrumented_transport_tracks_requests(stub_ml):
+    async def scenario():
+        transport = InstrumentedTransport(httpx.ASGITransport(app=stub_ml.app))
+        async with httpx.AsyncClient(transport=transport) as client:
+            responses = await asyncio.gather(
+                *(client.get("http://stub-ml/ping") for _ in range(5))
+            )
+        return [response.status_code for response in responses]
+
+    before = _sample("remote_ml_pool_requests_in_flight")
+    assert asyncio.run(scenario()) == [200] * 5
+    assert _sample("remote_ml_pool_requests_in_flight") == before
+
+
+# 모든 원격 호출이 lifespan에서 만든 클라이언트 하나를 공유하고, 종료 시 닫힌다
+def test_lifespan_shares_one_client(app, canvas):
+    with TestClient(app) as client:
+        http_client = app.state.http_client
+        assert app.state.ml_client.client is http_client
+        captcha_id = client.get("/captcha").json()["id"]
+        response = client.post("/predict", json={"id": captcha_id, "image": canvas})
+        assert response.status_code == 200
+        assert client.get("/models/").status_code == 200
+        assert not http_client.is_closed
+    assert http_client.is_closed
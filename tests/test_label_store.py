@@ -0,0 +1,108 @@
+import csv
+import io
+import os
+
+from utils.image_label_store import ImageLabelStore
+
+
+def _store(tmp_path, **kwargs) -> ImageLabelStore:
+    return ImageLabelStore(
+        str(tmp_path / "labels.db"),
+        legacy_csv_path=str(tmp_path / "labels.csv"),
+        **kwargs,
+    )
+
+
+def test_save_and_get(tmp_path):
+    store = _store(tmp_path)
+    store.save_label("a.png", "3")
+
+    assert store.get_label("a.png") == "3"
+    assert store.get_label("missing.png") is None
+    assert store.load_labels() == {"a.png": "3"}
+
+
+def test_upsert_moves_label_to_new_seq(tmp_path):
+    store = _store(tmp_path)
+    store.save_labels([("a.png", "1"), ("b.png", "2")])
+    store.save_label("a.png", "9")
+
+    records = list(store.iter_labels())
+    assert [(r.filename, r.label) for r in records] == [("b.png", "2"), ("a.png", "9")]
+    assert store.max_seq() == records[-1].seq
+
+
+def test_iter_labels_pages_by_seq(tmp_path):
+    store = _store(tmp_path)
+    store.save_labels((f"{i}.png", str(i % 10)) for i in range(25))
+
+    records = list(store.iter_labels(batch_size=10))
+    assert len(records) == 25
+    assert [r.seq for r in records] == sorted(r.seq for r in records)
+
+    after = list(store.iter_labels(after_seq=records[19].seq, batch_size=10))
+    assert [r.filename for r in after] == [f"{i}.png" for i in range(20, 25)]
+
+
+def test_empty_store(tmp_path):
+    store = _store(tmp_path)
+    assert store.max_seq() == 0
+    assert store.seq_before_time(0) == 0
+    assert list(store.iter_labels_csv()) == ["filename,label\r\n"]
+
+
+def test_seq_before_time(tmp_path):
+    store = _store(tmp_path)
+    store.save_label("old.png", "1")
+    old = store.iter_labels().__next__()
+    store.save_label("new.png", "2")
+
+    assert store.seq_before_time(old.created_at - 1) == 0
+    # 이후 저장된 라벨이 없으면 현재 max_seq가 커서가 된다
+    assert store.seq_before_time(old.created_at + 3600) == store.max_seq()
+
+
+def test_labels_csv_export(tmp_path):
+    store = _store(tmp_path)
+    store.save_labels([("a.png", "1"), ("b.png", "2"), ("c.png", "3")])
+
+    chunks = list(store.iter_labels_csv(batch_rows=2))
+    assert len(chunks) == 2
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows == [
+        ["filename", "label"],
+        ["a.png", "1"],
+        ["b.png", "2"],
+        ["c.png", "3"],
+    ]
+
+    out = io.StringIO()
+    store.write_labels_csv(out, after_seq=1)
+    assert out.getvalue().splitlines() == ["filename,label", "b.png,2", "c.png,3"]
+
+
+def test_imports_legacy_csv_once(tmp_path):
+    legacy = tmp_path / "labels.csv"
+    legacy.write_text("filename,label\na.png,1\nb.png,2\na.png,5\n")
+
+    store = _store(tmp_path)
+    assert store.load_labels() == {"a.png": "5", "b.png": "2"}
+    assert not legacy.exists()
+    assert (tmp_path / "labels.csv.imported").exists()
+
+    # 다른 인스턴스가 같은 DB를 열어도 다시 가져오지 않는다
+    assert len(list(_store(tmp_path).iter_labels())) == 2
+
+
+def test_lifespan_uses_labels_db_path(app, monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    db_path = tmp_path / "custom" / "labels.db"
+    monkeypatch.setenv("LABELS_DB_PATH", str(db_path))
+
+    with TestClient(app) as client:
+        store = client.app.state.label_store
+        assert store.db_path == str(db_path)
+        store.save_label("a.png", "1")
+
+    assert os.path.exists(db_path)
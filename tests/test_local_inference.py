@@ -0,0 +1,240 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+from conftest import PREDICTED_DIGIT
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from utils.local_inference import (
+    InferenceEngine,
+    OnnxModel,
+    create_inference_engine,
+    load_local_model,
+)
+
+BATCH = np.zeros((2, 1, 28, 28), dtype=np.float32)
+
+
+def _batches(backend: str, result: str) -> float:
+    value = REGISTRY.get_sample_value(
+        "inference_batches_total", {"backend": backend, "result": result}
+    )
+    return value or 0.0
+
+
+def _fallbacks() -> float:
+    return REGISTRY.get_sample_value("inference_fallback_total") or 0.0
+
+
+# 배치 행마다 고정된 숫자를 예측하는 로컬 모델
+class FakeModel:
+    def __init__(self, digit: int = 3, error: Exception = None):
+        self.digit = digit
+        self.error = error
+        self.calls = 0
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return np.eye(10, dtype=np.float32)[[self.digit] * len(batch)]
+
+
+# 원격 호출 대신 호출 횟수만 세고 다른 숫자를 돌려준다
+class FakeRemote:
+    def __init__(self, digit: int = 9):
+        self.digit = digit
+        self.calls = 0
+
+    async def __call__(self, batch: np.ndarray) -> list:
+        self.calls += 1
+        return np.eye(10)[[self.digit] * len(batch)].tolist()
+
+
+def _run(engine: InferenceEngine, batch: np.ndarray = BATCH) -> list:
+    try:
+        return asyncio.run(engine(batch))
+    finally:
+        engine.shutdown()
+
+
+def test_local_model_answers_without_remote_call():
+    model, remote = FakeModel(), FakeRemote()
+    before = _batches("local", "ok")
+
+    rows = _run(InferenceEngine(model=model, fallback=remote))
+
+    assert [int(np.argmax(row)) for row in rows] == [3, 3]
+    assert model.calls == 1 and remote.calls == 0
+    assert _batches("local", "ok") == before + 1
+
+
+def test_local_error_falls_back_to_remote():
+    remote = FakeRemote()
+    before = (_batches("local", "error"), _fallbacks())
+
+    rows = _run(InferenceEngine(model=FakeModel(error=RuntimeError()), fallback=remote))
+
+    assert [int(np.argmax(row)) for row in rows] == [9, 9]
+    assert remote.calls == 1
+    assert (_batches("local", "error"), _fallbacks()) == (
+        before[0] + 1,
+        before[1] + 1,
+    )
+
+
+def test_local_error_without_fallback_propagates():
+    engine = InferenceEngine(model=FakeModel(error=RuntimeError("boom")))
+    with pytest.raises(RuntimeError, match="boom"):
+        _run(engine)
+
+
+def test_model_is_loaded_once_on_first_use():
+    model = FakeModel()
+    loads = []
+
+    def loader():
+        loads.append(threading.current_thread().name)
+        return model
+
+    engine = InferenceEngine(fallback=FakeRemote(), workers=2, loader=loader)
+    assert engine.local and engine.model is None
+
+    async def scenario():
+        return await asyncio.gather(*(engine(BATCH) for _ in range(4)))
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        engine.shutdown()
+
+    assert len(results) == 4
+    # 추론 스레드에서 한 번만 불러온다
+    assert len(loads) == 1 and loads[0].startswith("inference")
+    assert model.calls == 4
+
+
+def test_load_failure_switches_to_remote():
+    remote = FakeRemote()
+
+    def loader():
+        raise FileNotFoundError("models/hybrid_cnn.onnx")
+
+    engine = InferenceEngine(fallback=remote, loader=loader)
+
+    async def scenario():
+        first = await engine(BATCH)
+        # 전환 뒤에는 다시 불러오지 않고 바로 원격으로 보낸다
+        assert not engine.local
+        second = await engine(BATCH)
+        return first, second
+
+    try:
+        first, second = asyncio.run(scenario())
+    finally:
+        engine.shutdown()
+
+    assert first == second
+    assert remote.calls == 2
+
+
+def test_load_failure_without_fallback_propagates():
+    def loader():
+        raise FileNotFoundError("models/hybrid_cnn.onnx")
+
+    engine = InferenceEngine(loader=loader)
+    with pytest.raises(FileNotFoundError):
+        engine.load()
+    engine.shutdown()
+
+
+def test_unknown_model_format():
+    with pytest.raises(ValueError):
+        load_local_model("model.pkl")
+
+
+@pytest.mark.parametrize(
+    "env, local, has_fallback",
+    [
+        ({}, False, True),
+        ({"INFERENCE_BACKEND": "local"}, True, True),
+        ({"INFERENCE_BACKEND": "local", "INFERENCE_FALLBACK": "false"}, True, False),
+    ],
+)
+def test_create_inference_engine(monkeypatch, env, local, has_fallback):
+    for name in ("INFERENCE_BACKEND", "INFERENCE_FALLBACK"):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    remote = FakeRemote()
+
+    engine = create_inference_engine(remote)
+
+    assert engine.local is local
+    assert engine.model is None
+    assert (engine.fallback is remote) is has_fallback
+    engine.shutdown()
+
+
+def test_create_inference_engine_rejects_unknown_backend(monkeypatch):
+    monkeypatch.setenv("INFERENCE_BACKEND", "gpu")
+    with pytest.raises(ValueError):
+        create_inference_engine(FakeRemote())
+
+
+# 입력을 펼쳐 (784 → 10) 행렬을 곱하는 최소 ONNX 모델
+def _write_onnx_model(path, batch_dim):
+    onnx = pytest.importorskip("onnx")
+    from onnx import TensorProto, helper, numpy_helper
+
+    weights = np.zeros((28 * 28, 10), dtype=np.float32)
+    weights[:, 4] = 1.0
+    graph = helper.make_graph(
+        [
+            helper.make_node("Flatten", ["input"], ["flat"]),
+            helper.make_node("MatMul", ["flat", "weights"], ["logits"]),
+        ],
+        "hybrid_cnn_stub",
+        [
+            helper.make_tensor_value_info(
+                "input", TensorProto.FLOAT, [batch_dim, 1, 28, 28]
+            )
+        ],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, [batch_dim, 10])],
+        [numpy_helper.from_array(weights, "weights")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+    return str(path)
+
+
+@pytest.mark.parametrize("batch_dim", ["N", 1])
+def test_onnx_model_runs_batches(tmp_path, batch_dim):
+    pytest.importorskip("onnxruntime")
+    path = _write_onnx_model(tmp_path / "model.onnx", batch_dim)
+
+    model = load_local_model(path)
+
+    assert isinstance(model, OnnxModel)
+    assert model.fixed_batch is (batch_dim == 1)
+    batch = np.ones((3, 1, 28, 28), dtype=np.float64)
+    logits = model.predict(batch)
+    assert logits.shape == (3, 10)
+    assert np.argmax(logits, axis=1).tolist() == [4, 4, 4]
+
+
+def test_predict_falls_back_when_local_model_is_missing(app, monkeypatch, canvas):
+    monkeypatch.setenv("INFERENCE_BACKEND", "local")
+    monkeypatch.setenv("INFERENCE_MODEL_PATH", "models/missing.onnx")
+    with TestClient(app) as client:
+        assert client.app.state.inference_engine.local
+        store = client.app.state.challenge_store
+        captcha_id = client.portal.call(store.issue, str(PREDICTED_DIGIT))
+        response = client.post("/predict", json={"id": captcha_id, "image": canvas})
+        # 로드에 실패하면 원격 스텁이 예측한다
+        assert not client.app.state.inference_engine.local
+    assert response.status_code == 200
+    assert response.json()["passed"] is True
@@ -0,0 +1,213 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from pydantic import BaseModel
+
+from utils.metrics import (
+    ApiMetrics,
+    cleanup_dead_workers,
+    handle_metrics,
+    instrumented_route,
+    multiprocess_dir,
+    prepare_multiprocess_dir,
+)
+
+# 전역 레지스트리에 한 번만 등록된다
+TEST_API = ApiMetrics("metrics_test", "Metrics test")
+
+
+class Item(BaseModel):
+    name: str
+
+
+def _test_app() -> FastAPI:
+    router = APIRouter(route_class=instrumented_route(TEST_API))
+
+    @router.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    @router.get("/missing", name="missing_item")
+    async def missing():
+        raise HTTPException(status_code=404)
+
+    @router.post("/items")
+    async def create_item(item: Item):
+        return item
+
+    @router.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _requests(endpoint: str, method: str, status: int) -> float:
+    return _sample(
+        "metrics_test_api_requests_total",
+        endpoint=endpoint,
+        method=method,
+        status=str(status),
+    )
+
+
+def _errors(endpoint: str, method: str) -> float:
+    return _sample("metrics_test_api_errors_total", endpoint=endpoint, method=method)
+
+
+def test_records_status_latency_and_sizes():
+    before = {
+        "requests": _requests("ok", "GET", 200),
+        "latency": _sample(
+            "metrics_test_api_request_duration_seconds_count",
+            endpoint="ok",
+            method="GET",
+        ),
+        "response": _sample("api_response_size_bytes_count", endpoint="ok"),
+        "errors": _errors("ok", "GET"),
+    }
+
+    with TestClient(_test_app()) as client:
+        for _ in range(2):
+            assert client.get("/ok").status_code == 200
+
+    assert _requests("ok", "GET", 200) == before["requests"] + 2
+    assert (
+        _sample(
+            "metrics_test_api_request_duration_seconds_count",
+            endpoint="ok",
+            method="GET",
+        )
+        == before["latency"] + 2
+    )
+    assert (
+        _sample("api_response_size_bytes_count", endpoint="ok")
+        == before["response"] + 2
+    )
+    # 성공 응답은 에러로 세지 않는다
+    assert _errors("ok", "GET") == before["errors"]
+
+
+def test_errors_are_labelled_by_status():
+    before = {
+        "missing": _requests("missing_item", "GET", 404),
+        "invalid": _requests("create_item", "POST", 422),
+        "crash": _requests("boom", "GET", 500),
+        "errors": [
+            _errors("missing_item", "GET"),
+            _errors("create_item", "POST"),
+            _errors("boom", "GET"),
+        ],
+        "payload": _sample("api_request_payload_bytes_sum", endpoint="create_item"),
+    }
+
+    with TestClient(_test_app(), raise_server_exceptions=False) as client:
+        # endpoint 라벨은 name=으로 준 라우트 이름
+        assert client.get("/missing").status_code == 404
+        assert client.post("/items", json={"title": "x"}).status_code == 422
+        assert client.post("/items", json={"name": "x"}).status_code == 200
+        assert client.get("/boom").status_code == 500
+
+    assert _requests("missing_item", "GET", 404) == before["missing"] + 1
+    assert _requests("create_item", "POST", 422) == before["invalid"] + 1
+    assert _requests("boom", "GET", 500) == before["crash"] + 1
+    assert [
+        _errors("missing_item", "GET"),
+        _errors("create_item", "POST"),
+        _errors("boom", "GET"),
+    ] == [count + 1 for count in before["errors"]]
+    # 요청 바디 크기는 Content-Length 기준
+    sent = len(b'{"title":"x"}') + len(b'{"name":"x"}')
+    payload = _sample("api_request_payload_bytes_sum", endpoint="create_item")
+    assert payload == before["payload"] + sent
+
+
+def test_app_routes_are_instrumented(client):
+    labels = {"endpoint": "get_captcha", "method": "GET", "status": "200"}
+    before = _sample("captcha_api_requests_total", **labels)
+
+    assert client.get("/captcha").status_code == 200
+    assert client.get("/metrics").status_code == 200
+
+    assert _sample("captcha_api_requests_total", **labels) == before + 1
+    assert "captcha_api_requests_total" in client.get("/metrics").text
+
+
+# 멀티 워커 모드의 워커 하나: 값을 기록하고 stdin이 닫힐 때까지 살아 있는다
+WORKER = """
+import sys
+from prometheus_client import Counter, Gauge
+value = int(sys.argv[1])
+Gauge("mp_test_inflight", "t", multiprocess_mode="livesum").set(value)
+Counter("mp_test_requests", "t").inc(value)
+print("ready", flush=True)
+sys.stdin.read()
+"""
+
+
+def _start_worker(path, value: int, keep_alive: bool) -> subprocess.Popen:
+    worker = subprocess.Popen(
+        [sys.executable, "-c", WORKER, str(value)],
+        env={**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(path)},
+        stdin=subprocess.PIPE if keep_alive else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert worker.stdout.readline().strip() == "ready"
+    worker.stdout.close()
+    if not keep_alive:
+        worker.wait()
+    return worker
+
+
+def _scrape() -> dict:
+    response = asyncio.run(handle_metrics(None))
+    return {
+        sample.name: sample.value
+        for family in text_string_to_metric_families(response.body.decode())
+        for sample in family.samples
+        if sample.name.startswith("mp_test_")
+    }
+
+
+def test_multiprocess_dir(monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", "")
+    assert multiprocess_dir() is None
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", "/tmp/metrics")
+    assert multiprocess_dir() == "/tmp/metrics"
+
+
+def test_prepare_removes_previous_run(tmp_path):
+    (tmp_path / "counter_123.db").write_bytes(b"stale")
+    (tmp_path / "notes.txt").write_text("keep")
+    prepare_multiprocess_dir(str(tmp_path / "new"))
+    prepare_multiprocess_dir(str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == ["new", "notes.txt"]
+
+
+def test_scrape_sums_workers_and_drops_dead_live_gauges(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    live = _start_worker(tmp_path, 2, keep_alive=True)
+    try:
+        _start_worker(tmp_path, 3, keep_alive=False)
+        # 죽은 워커의 게이지는 빠지고 카운터 누적값은 유지된다
+        assert _scrape() == {"mp_test_inflight": 2, "mp_test_requests_total": 5}
+        assert cleanup_dead_workers(str(tmp_path)) == 0
+    finally:
+        live.stdin.close()
+        live.wait()
+
+    assert cleanup_dead_workers(str(tmp_path)) == 1
+    assert _scrape() == {"mp_test_requests_total": 5}
@@ -0,0 +1,131 @@
+import asyncio
+from functools import wraps
+
+import httpx
+import pytest
+
+from utils.ml_backends import Backend, BackendPool, backend_urls_from_env
+from utils.resilient_client import CircuitBreaker
+
+URLS = [f"http://ml-{i}:8000" for i in range(5)]
+
+
+# Backend의 세마포어는 Python 3.9에서 만들 때의 이벤트 루프에 묶이므로
+# 백엔드 생성부터 실행 중인 루프 안에서 한다
+def in_loop(test):
+    @wraps(test)
+    def wrapper(*args, **kwargs):
+        async def scenario():
+            return test(*args, **kwargs)
+
+        return asyncio.run(scenario())
+
+    return wrapper
+
+
+def _backends(*urls: str):
+    return [Backend(url, CircuitBreaker(url)) for url in urls]
+
+
+@in_loop
+def test_least_outstanding_prefers_idle_backend():
+    a, b, c = _backends(*URLS[:3])
+    pool = BackendPool([a, b, c], sticky_replicas=1)
+    a.start_request()
+    a.start_request()
+    b.start_request()
+    assert pool.candidates() == [c, b, a]
+
+    # 처리 중인 요청 수가 같으면 응답이 빠른 쪽
+    c.start_request()
+    c.finish_request("200", 0.5, alpha=0.3)
+    b.finish_request("200", 0.1, alpha=0.3)
+    assert pool.candidates()[:2] == [b, c]
+
+
+@in_loop
+def test_ewma_policy():
+    fast, slow, new = _backends(*URLS[:3])
+    pool = BackendPool([fast, slow, new], policy="ewma")
+    for backend, seconds in ((fast, 0.01), (slow, 0.2)):
+        backend.start_request()
+        backend.finish_request("200", seconds, alpha=0.3)
+    # 기록이 없는 백엔드를 먼저 시도한 뒤 지연 시간 x (처리 중 + 1) 순
+    assert pool.candidates() == [new, fast, slow]
+
+    for _ in range(30):
+        fast.start_request()
+    assert pool.candidates()[1:] == [slow, fast]
+    assert fast.ewma == pytest.approx(0.01)
+
+
+@in_loop
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        BackendPool(_backends(URLS[0]), policy="random")
+
+
+@in_loop
+def test_route_key_sticks_to_same_replicas():
+    backends = _backends(*URLS)
+    pool = BackendPool(backends, sticky_replicas=2)
+    preferred = set(pool.candidates("HybridCNN/1")[:2])
+    assert set(pool.candidates("HybridCNN/1")[:2]) == preferred
+    # 키마다 담당 레플리카가 퍼진다
+    owners = {frozenset(pool.candidates(f"model/{i}")[:2]) for i in range(50)}
+    assert len(owners) > 3
+
+    # 담당이 아닌 백엔드가 빠져도 담당 레플리카는 그대로
+    others = [b for b in backends if b not in preferred]
+    smaller = BackendPool([b for b in backends if b is not others[0]])
+    assert set(smaller.candidates("HybridCNN/1")[:2]) == preferred
+
+
+@in_loop
+def test_unhealthy_backends_are_skipped_unless_all_fail():
+    a, b = _backends(*URLS[:2])
+    pool = BackendPool([a, b])
+    for _ in range(3):
+        a.record_probe(False, unhealthy_threshold=3, healthy_threshold=2)
+    assert not a.healthy
+    assert pool.candidates() == [b]
+
+    for _ in range(3):
+        b.record_probe(False, unhealthy_threshold=3, healthy_threshold=2)
+    assert set(pool.candidates()) == {a, b}
+
+
+def test_health_checks_eject_and_restore():
+    status = {"ml-0:8000": 200, "ml-1:8000": 500}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/ping"
+        return httpx.Response(status[request.url.netloc.decode()])
+
+    async def scenario():
+        a, b = _backends(*URLS[:2])
+        pool = BackendPool([a, b], unhealthy_threshold=2, healthy_threshold=2)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+            await pool.probe_all(http)
+            assert b.healthy
+            await pool.probe_all(http)
+            assert a.healthy and not b.healthy
+
+            status["ml-1:8000"] = 200
+            await pool.probe_all(http)
+            assert not b.healthy
+            await pool.probe_all(http)
+            assert b.healthy
+
+    asyncio.run(scenario())
+
+
+@in_loop
+def test_backend_urls_from_env(monkeypatch):
+    monkeypatch.setenv("REMOTE_ML_SERVICE_URL", "http://single")
+    monkeypatch.setenv("REMOTE_ML_SERVICE_URLS", " http://a:1/ , ,http://b:2")
+    assert backend_urls_from_env() == ["http://a:1/", "http://b:2"]
+
+    monkeypatch.delenv("REMOTE_ML_SERVICE_URLS")
+    assert backend_urls_from_env() == ["http://single"]
+    assert Backend("http://a:1/", CircuitBreaker("a")).url == "http://a:1"
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from utils.response_cache import AsyncTTLCache
+
+ADMIN_TOKEN = "test-admin-token"
+
+
+class Upstream:
+    def __init__(self):
+        self.calls = 0
+
+    async def fetch(self):
+        self.calls += 1
+        return {"version": self.calls}
+
+
+def test_cache_hit_until_invalidated():
+    async def scenario():
+        cache = AsyncTTLCache("test", ttl_seconds=60)
+        upstream = Upstream()
+        first = await cache.get_or_fetch("models", upstream.fetch)
+        second = await cache.get_or_fetch("models", upstream.fetch)
+        assert upstream.calls == 1
+        assert first.etag == second.etag
+
+        assert cache.invalidate("models") == 1
+        third = await cache.get_or_fetch("models", upstream.fetch)
+        assert upstream.calls == 2
+        assert third.value == {"version": 2}
+        assert third.etag != first.etag
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_all():
+    async def scenario():
+        cache = AsyncTTLCache("test", ttl_seconds=60)
+        upstream = Upstream()
+        await cache.get_or_fetch("models", upstream.fetch)
+        await cache.get_or_fetch("versions:HybridCNN", upstream.fetch)
+        assert cache.invalidate() == 2
+        assert cache.invalidate("models") == 0
+
+    asyncio.run(scenario())
+
+
+# 무효화 전에 시작된 조회 결과는 캐시에 다시 들어가지 않는다
+def test_invalidate_during_fetch_does_not_store_old_value():
+    async def scenario():
+        cache = AsyncTTLCache("test", ttl_seconds=60)
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def slow_fetch():
+            started.set()
+            await release.wait()
+            return {"version": "old"}
+
+        pending = asyncio.ensure_future(cache.get_or_fetch("models", slow_fetch))
+        await started.wait()
+        cache.invalidate()
+        release.set()
+        assert (await pending).value == {"version": "old"}
+
+        upstream = Upstream()
+        entry = await cache.get_or_fetch("models", upstream.fetch)
+        assert upstream.calls == 1
+        assert entry.value == {"version": 1}
+
+    asyncio.run(scenario())
+
+
+# TTL이 지난 값은 바로 돌려주고 갱신은 백그라운드에서 한 번만
+def test_stale_entry_is_served_while_revalidating():
+    async def scenario():
+        cache = AsyncTTLCache("test", ttl_seconds=0, stale_seconds=60)
+        upstream = Upstream()
+        await cache.get_or_fetch("models", upstream.fetch)
+        stale = await cache.get_or_fetch("models", upstream.fetch)
+        assert stale.value == {"version": 1}
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert upstream.calls == 2
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def admin_client(monkeypatch, request):
+    monkeypatch.setenv("MODEL_CACHE_ADMIN_TOKEN", ADMIN_TOKEN)
+    return request.getfixturevalue("client")
+
+
+def _fill(client):
+    assert client.get("/models/").status_code == 200
+    assert client.get("/models/HybridCNN/versions/").status_code == 200
+
+
+def test_invalidate_endpoint_is_disabled_without_token(client):
+    _fill(client)
+    response = client.post(
+        "/models/cache/invalidate", headers={"X-Admin-Token": ADMIN_TOKEN}
+    )
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Admin-Token": "wrong"}])
+def test_invalidate_endpoint_rejects_bad_token(admin_client, headers):
+    response = admin_client.post("/models/cache/invalidate", headers=headers)
+    assert response.status_code == 403
+
+
+def test_invalidate_endpoint_clears_model_entries(admin_client):
+    _fill(admin_client)
+    response = admin_client.post(
+        "/models/cache/invalidate",
+        params={"model_name": "HybridCNN"},
+        headers={"X-Admin-Token": ADMIN_TOKEN},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"invalidated": 2}
+
+    _fill(admin_client)
+    response = admin_client.post(
+        "/models/cache/invalidate", headers={"X-Admin-Token": ADMIN_TOKEN}
+    )
+    assert response.json() == {"invalidated": 2}
+
+
+def test_models_endpoint_revalidates_with_etag(client):
+    response = client.get("/models/")
+    etag = response.headers["ETag"]
+    response = client.get("/models/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
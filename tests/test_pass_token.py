@@ -0,0 +1,106 @@
+import types
+
+import pytest
+from conftest import PREDICTED_DIGIT
+from fastapi.testclient import TestClient
+
+from utils import pass_token
+from utils.pass_token import PASS_COOKIE, PassTokenSigner, create_pass_token_signer
+
+
+def _issue(client, expected: str) -> str:
+    store = client.app.state.challenge_store
+    return client.portal.call(store.issue, expected)
+
+
+def test_issue_and_verify():
+    signer = PassTokenSigner(b"key")
+    token = signer.issue()
+    assert signer.verify(token)
+    assert not PassTokenSigner(b"other").verify(token)
+
+
+@pytest.mark.parametrize(
+    "token",
+    [None, "", "short", "!" * 28, "A" * 28],
+)
+def test_rejects_malformed_tokens(token):
+    assert not PassTokenSigner(b"key").verify(token)
+
+
+def test_rejects_tampered_token():
+    signer = PassTokenSigner(b"key")
+    token = signer.issue()
+    flipped = ("A" if token[0] != "A" else "B") + token[1:]
+    assert len(flipped) == len(token)
+    assert not signer.verify(flipped)
+
+
+def test_token_expires_after_max_age(monkeypatch):
+    signer = PassTokenSigner(b"key", max_age=60)
+    token = signer.issue()
+    now = pass_token.time.time()
+
+    monkeypatch.setattr(
+        pass_token, "time", types.SimpleNamespace(time=lambda: now + 59)
+    )
+    assert signer.verify(token)
+    monkeypatch.setattr(
+        pass_token, "time", types.SimpleNamespace(time=lambda: now + 61)
+    )
+    assert not signer.verify(token)
+
+
+def test_create_signer_from_env(monkeypatch):
+    monkeypatch.setenv("SESSION_SECRET_KEY", "from-env")
+    monkeypatch.setenv("SESSION_MAX_AGE_SECONDS", "120")
+    signer = create_pass_token_signer()
+    assert signer.key == b"from-env"
+    assert signer.max_age == 120
+
+
+def test_passing_challenge_grants_access(client, canvas):
+    assert client.get("/check").json() == {"access": "denied"}
+
+    captcha_id = _issue(client, str(PREDICTED_DIGIT))
+    response = client.post("/predict", json={"id": captcha_id, "image": canvas})
+    assert response.status_code == 200
+    assert response.json()["passed"] is True
+
+    cookie = response.headers["set-cookie"]
+    assert cookie.startswith(f"{PASS_COOKIE}=")
+    assert "HttpOnly" in cookie and "samesite=lax" in cookie.lower()
+    assert client.get("/check").json() == {"access": "granted"}
+
+
+def test_failed_challenge_denies_access(client, canvas):
+    captcha_id = _issue(client, str((PREDICTED_DIGIT + 1) % 10))
+    response = client.post("/predict", json={"id": captcha_id, "image": canvas})
+    assert response.status_code == 200
+    assert response.json()["passed"] is False
+    assert "set-cookie" not in response.headers
+    assert client.get("/check").json() == {"access": "denied"}
+
+
+def test_forged_cookie_denies_access(client):
+    forged = PassTokenSigner(b"attacker").issue()
+    client.cookies.set(PASS_COOKIE, forged)
+    assert client.get("/check").json() == {"access": "denied"}
+
+
+# SESSION_SECRET_KEY가 같으면 다른 워커/레플리카에서도 통과를 인식한다
+def test_pass_is_shared_by_secret_key(app, monkeypatch, canvas):
+    monkeypatch.setenv("SESSION_SECRET_KEY", "shared")
+    with TestClient(app) as first:
+        captcha_id = _issue(first, str(PREDICTED_DIGIT))
+        first.post("/predict", json={"id": captcha_id, "image": canvas})
+        token = first.cookies[PASS_COOKIE]
+
+    with TestClient(app) as second:
+        second.cookies.set(PASS_COOKIE, token)
+        assert second.get("/check").json() == {"access": "granted"}
+
+    monkeypatch.setenv("SESSION_SECRET_KEY", "rotated")
+    with TestClient(app) as third:
+        third.cookies.set(PASS_COOKIE, token)
+        assert third.get("/check").json() == {"access": "denied"}
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from conftest import PREDICTED_DIGIT
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+from utils.payload_codec import (
+    CODECS,
+    create_payload_codec,
+    decode_payload,
+    get_codec,
+)
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+@pytest.mark.parametrize("dtype", [np.float32, np.float64, np.uint8])
+def test_round_trip(name, dtype):
+    array = (np.arange(2 * 784) % 256).astype(dtype).reshape(2, 1, 28, 28)
+    body, headers = get_codec(name).encode(array)
+
+    decoded = decode_payload(body, Headers(headers))
+    assert decoded.shape == array.shape
+    np.testing.assert_array_equal(decoded, array.astype(decoded.dtype))
+    if name != "json":
+        # 바이너리 포맷은 uint8을 그대로, 나머지는 float32로 보낸다
+        assert decoded.dtype == (np.uint8 if dtype == np.uint8 else np.float32)
+
+
+def test_raw_sends_little_endian():
+    array = np.array([[1.0, 2.0]], dtype=">f8")
+    body, headers = get_codec("raw").encode(array)
+    assert body == np.array([[1.0, 2.0]], dtype="<f4").tobytes()
+    assert headers["X-Tensor-Shape"] == "1,2"
+    assert headers["X-Tensor-Dtype"] == "float32"
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        {"content-type": "application/octet-stream"},
+        {
+            "content-type": "application/octet-stream",
+            "x-tensor-shape": "2",
+            "x-tensor-dtype": "int64",
+        },
+        {"content-type": "text/csv"},
+    ],
+)
+def test_decode_rejects_bad_headers(headers):
+    with pytest.raises(ValueError):
+        decode_payload(b"\0" * 8, Headers(headers))
+
+
+def test_format_is_read_from_environment(monkeypatch):
+    monkeypatch.setenv("REMOTE_ML_PAYLOAD_FORMAT", "npy")
+    assert create_payload_codec().name == "npy"
+
+    monkeypatch.setenv("REMOTE_ML_PAYLOAD_FORMAT", "protobuf")
+    with pytest.raises(ValueError):
+        create_payload_codec()
+
+
+def test_unknown_format_fails_startup(app, monkeypatch):
+    monkeypatch.setenv("REMOTE_ML_PAYLOAD_FORMAT", "protobuf")
+    with pytest.raises(ValueError):
+        with TestClient(app):
+            pass
+
+
+@pytest.mark.parametrize("name", ["raw", "npy"])
+def test_predict_over_binary_format(app, monkeypatch, canvas, name):
+    monkeypatch.setenv("REMOTE_ML_PAYLOAD_FORMAT", name)
+    with TestClient(app) as client:
+        store = client.app.state.challenge_store
+        captcha_id = client.portal.call(store.issue, str(PREDICTED_DIGIT))
+        response = client.post("/predict", json={"id": captcha_id, "image": canvas})
+    # 스텁이 바디를 복원해 고정된 숫자를 예측했으면 통과
+    assert response.status_code == 200
+    assert response.json()["passed"] is True
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from routers.model import _latest_version
+from utils.prediction_cache import PredictionCache
+
+INPUTS = {"inputs": [[0.0, 1.0], [2.0, 3.0]]}
+
+
+def test_key_ignores_number_representation():
+    key = PredictionCache.make_key("m", "1", [[1, 2]])
+    assert key == PredictionCache.make_key("m", "1", [[1.0, 2.0]])
+    assert key != PredictionCache.make_key("m", "2", [[1, 2]])
+    assert key != PredictionCache.make_key("m", "1", [[2, 1]])
+    # 행 길이가 다른 입력도 키를 만들 수 있다
+    assert PredictionCache.make_key("m", "1", [[1], [1, 2]])
+
+
+def test_memory_tier_evicts_by_bytes():
+    cache = PredictionCache(max_bytes=10)
+
+    async def scenario():
+        await cache.put("a", b"12345")
+        await cache.put("b", b"12345")
+        assert await cache.get("a") == b"12345"
+        # a를 방금 읽었으므로 b가 먼저 밀려난다
+        await cache.put("c", b"123")
+        assert await cache.get("b") is None
+        assert await cache.get("a") == b"12345"
+        # 상한보다 큰 값은 저장하지 않는다
+        await cache.put("d", b"x" * 11)
+        assert await cache.get("d") is None
+
+    asyncio.run(scenario())
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    async def scenario():
+        await PredictionCache(disk_dir=str(tmp_path)).put("ab12", b"[1]")
+        return await PredictionCache(disk_dir=str(tmp_path)).get("ab12")
+
+    assert asyncio.run(scenario()) == b"[1]"
+
+
+def test_disabled_cache_stores_nothing():
+    cache = PredictionCache(max_bytes=0)
+
+    async def scenario():
+        await cache.put("a", b"1")
+        return await cache.get("a")
+
+    assert not cache.enabled
+    assert asyncio.run(scenario()) is None
+
+
+@pytest.mark.parametrize(
+    "versions, latest",
+    [
+        ([{"version": "2"}, {"version": "10"}, {"version": "9"}], "10"),
+        ([{"version": 3}], "3"),
+        ([], None),
+        ([{"version": "staging"}, {"name": "m"}, "1"], None),
+        ({"versions": ["1"]}, None),
+    ],
+)
+def test_latest_version(versions, latest):
+    assert _latest_version(versions) == latest
+
+
+@pytest.fixture
+def remote_calls(stub_ml, monkeypatch):
+    calls = []
+    fake_logits = stub_ml._fake_logits
+
+    def counting(inputs):
+        calls.append(inputs.shape)
+        return fake_logits(inputs)
+
+    monkeypatch.setattr(stub_ml, "_fake_logits", counting)
+    return calls
+
+
+@pytest.fixture
+def cached_client(monkeypatch, request):
+    monkeypatch.setenv("PREDICTION_CACHE_ENABLED", "true")
+    return request.getfixturevalue("client")
+
+
+def test_unversioned_predictions_are_cached_by_latest_version(
+    cached_client, remote_calls
+):
+    first = cached_client.post("/models/predict/HybridCNN/", json=INPUTS)
+    assert first.status_code == 200
+    assert cached_client.post("/models/predict/HybridCNN/", json=INPUTS).json() == (
+        first.json()
+    )
+    # 스텁의 최신 버전은 "1"이므로 버전 지정 호출과 같은 캐시 항목을 쓴다
+    assert cached_client.post("/models/predict/HybridCNN/1/", json=INPUTS).json() == (
+        first.json()
+    )
+    assert len(remote_calls) == 1
+
+    cached_client.post("/models/predict/HybridCNN/2/", json=INPUTS)
+    assert len(remote_calls) == 2
+
+
+def test_predictions_are_not_cached_by_default(client, remote_calls):
+    for _ in range(2):
+        assert client.post("/models/predict/HybridCNN/", json=INPUTS).status_code == 200
+        assert (
+            client.post("/models/predict/HybridCNN/1/", json=INPUTS).status_code == 200
+        )
+    assert len(remote_calls) == 4
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageOps
+
+from utils.image_processing import (
+    INPUT_SIZE,
+    MNIST_MEAN,
+    MNIST_STD,
+    center_batch,
+    center_image,
+    to_model_input,
+    to_model_input_batch,
+)
+
+
+# 프론트 캔버스와 비슷한 흰 바탕 검은 획 이미지
+def synthetic_canvas(rng: np.random.Generator, size: int = 280) -> Image.Image:
+    image = Image.new("L", (size, size), color=255)
+    draw = ImageDraw.Draw(image)
+    points = [
+        tuple(int(v) for v in rng.integers(40, size - 40, size=2)) for _ in range(6)
+    ]
+    draw.line(points, fill=0, width=int(rng.integers(8, 20)))
+    return image
+
+
+# 기존 torchvision 파이프라인 (Resize((28, 28)) → Grayscale → ToTensor → Normalize)을
+# 같은 float32 연산 순서로 옮긴 기준 구현
+#  - Resize: PIL 이미지에는 Image.resize(BILINEAR)를 그대로 호출
+#  - ToTensor: uint8 → float32 / 255
+#  - Normalize: (x - mean) / std (float32)
+def torchvision_reference(image: Image.Image) -> np.ndarray:
+    resized = image.resize((INPUT_SIZE, INPUT_SIZE), Image.Resampling.BILINEAR)
+    tensor = np.asarray(resized.convert("L"), dtype=np.float32) / np.float32(255)
+    normalized = (tensor - np.float32(MNIST_MEAN)) / np.float32(MNIST_STD)
+    return normalized[np.newaxis]
+
+
+# 이전 center_image 구현 (np.argwhere + PIL crop/expand/pad)
+def legacy_center_image(image: Image.Image, padding: int = 20) -> Image.Image:
+    img_array = np.array(image)
+    if img_array.max() == 0:
+        return image
+    coords = np.argwhere((img_array < 200).astype(np.uint8))
+    if coords.size == 0:
+        return image
+    y0, x0 = coords.min(axis=0)
+    y1, x1 = coords.max(axis=0) + 1
+    cropped = image.crop((x0, y0, x1, y1))
+    padded_image = ImageOps.expand(cropped, border=padding // 2, fill=255)
+    max_dim = max(padded_image.size)
+    return ImageOps.pad(padded_image, (max_dim, max_dim), color=255)
+
+
+@pytest.fixture
+def canvases():
+    rng = np.random.default_rng(0)
+    return [synthetic_canvas(rng) for _ in range(50)]
+
+
+def test_center_image_matches_legacy(canvases):
+    for image in canvases:
+        expected = np.asarray(legacy_center_image(image))
+        np.testing.assert_array_equal(np.asarray(center_image(image)), expected)
+
+
+def test_center_batch_matches_legacy(canvases):
+    stacked = np.stack([np.asarray(image) for image in canvases])
+    for image, centered in zip(canvases, center_batch(stacked)):
+        np.testing.assert_array_equal(centered, np.asarray(legacy_center_image(image)))
+
+
+# 획이 없는 이미지와 완전히 검은 이미지는 원본 그대로
+@pytest.mark.parametrize("fill", [0, 255])
+def test_center_image_keeps_blank_images(fill):
+    image = Image.new("L", (64, 48), color=fill)
+    np.testing.assert_array_equal(np.asarray(center_image(image)), np.asarray(image))
+
+
+def test_model_input_matches_torchvision_reference(canvases):
+    images = [center_image(canvas) for canvas in canvases]
+    batch = to_model_input_batch(images)
+    assert batch.shape == (len(images), 1, INPUT_SIZE, INPUT_SIZE)
+    assert batch.dtype == np.float32
+    for i, image in enumerate(images):
+        expected = torchvision_reference(image)
+        np.testing.assert_allclose(to_model_input(image), expected, rtol=0, atol=1e-6)
+        np.testing.assert_allclose(batch[i], expected, rtol=0, atol=1e-6)
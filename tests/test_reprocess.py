@@ -0,0 +1,112 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import reprocess
+from utils.image_label_store import ImageLabelStore
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    images_dir = tmp_path / "images"
+    images_dir.mkdir()
+    store = ImageLabelStore(
+        str(tmp_path / "labels.db"), legacy_csv_path=str(tmp_path / "labels.csv")
+    )
+
+    def save(names_and_labels):
+        for filename, _ in names_and_labels:
+            if filename != "missing.png":
+                Image.new("L", (56, 56), 255).save(images_dir / filename)
+        store.save_labels(names_and_labels)
+
+    return tmp_path, images_dir, save
+
+
+def _run(monkeypatch, tmp_path, images_dir, *extra):
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "reprocess.py",
+            "--out",
+            str(tmp_path / "out"),
+            "--images-dir",
+            str(images_dir),
+            "--labels-db",
+            str(tmp_path / "labels.db"),
+            "--workers",
+            "1",
+            "--shard-size",
+            "2",
+            *extra,
+        ],
+    )
+    assert reprocess.main() == 0
+    with open(tmp_path / "out" / reprocess.MANIFEST) as f:
+        return json.load(f)
+
+
+def test_writes_shards_and_resumes(dataset, monkeypatch):
+    tmp_path, images_dir, save = dataset
+    save([("a.png", "1"), ("b.png", "2"), ("missing.png", "3"), ("bad.png", "x")])
+
+    manifest = _run(monkeypatch, tmp_path, images_dir, "--raw")
+    assert [shard["name"] for shard in manifest["shards"]] == [
+        "shard-00000",
+        "shard-00001",
+    ]
+    assert manifest["next_seq"] == 4
+    assert manifest["shards"][1]["missing"] == 1
+    assert manifest["shards"][1]["invalid"] == 1
+
+    prefix = tmp_path / "out" / "shard-00000"
+    images = np.load(f"{prefix}.images.npy")
+    assert images.shape == (2, 28, 28) and images.dtype == np.uint8
+    assert np.load(f"{prefix}.labels.npy").tolist() == [1, 2]
+    assert np.load(f"{prefix}.seqs.npy").tolist() == [1, 2]
+
+    # 다시 실행하면 manifest의 next_seq 이후만 처리한다
+    save([("c.png", "5")])
+    manifest = _run(monkeypatch, tmp_path, images_dir, "--raw")
+    assert len(manifest["shards"]) == 3
+    assert manifest["shards"][2]["first_seq"] == 5
+    assert manifest["next_seq"] == 5
+    assert np.load(tmp_path / "out" / "shard-00002.labels.npy").tolist() == [5]
+
+
+def test_refuses_to_resume_with_different_config(dataset, monkeypatch):
+    tmp_path, images_dir, save = dataset
+    save([("a.png", "1")])
+    manifest = _run(monkeypatch, tmp_path, images_dir)
+    images = np.load(tmp_path / "out" / "shard-00000.images.npy")
+    assert images.shape == (1, 1, 28, 28) and images.dtype == np.float32
+
+    with pytest.raises(SystemExit):
+        _run(monkeypatch, tmp_path, images_dir, "--raw")
+    restarted = _run(monkeypatch, tmp_path, images_dir, "--raw", "--restart")
+    assert manifest["config"]["raw"] is False
+    assert restarted["config"]["raw"] is True
+    assert len(restarted["shards"]) == 1
+
+
+def test_does_not_import_web_stack():
+    src = os.path.join(os.path.dirname(__file__), os.pardir, "src")
+    code = (
+        "import sys, reprocess; "
+        "print(sorted({'fastapi', 'prometheus_client', 'starlette'} "
+        "& set(sys.modules)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=src,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,128 @@
+import base64
+import io
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from utils.image_processing import (
+    ImageLimits,
+    ImageTooLargeError,
+    InvalidImageError,
+    create_image_limits,
+    load_image,
+)
+from utils.request_limits import BodySizeLimitMiddleware, predict_max_body_bytes
+
+
+def _data_url(image: Image.Image, image_format: str = "PNG", mime: str = "png") -> str:
+    buf = io.BytesIO()
+    image.save(buf, format=image_format)
+    encoded = base64.b64encode(buf.getvalue()).decode()
+    return f"data:image/{mime};base64,{encoded}"
+
+
+def test_load_image_decodes_to_grayscale():
+    image = load_image(_data_url(Image.new("RGBA", (280, 280), (0, 0, 0, 255))))
+    assert image.mode == "L"
+    assert image.size == (280, 280)
+
+
+def test_load_image_downscales_large_input():
+    data_url = _data_url(Image.new("L", (1120, 1120), 255))
+    assert load_image(data_url, ImageLimits(target_size=280)).size == (280, 280)
+    assert load_image(data_url, ImageLimits(target_size=560)).size == (560, 560)
+
+
+@pytest.mark.parametrize(
+    "data_url",
+    [
+        "no separator",
+        "image/png;base64,AAAA",
+        "data:image/gif;base64,R0lGODlh",
+        "data:image/png;base64,/9j/4AAQSkZJRgABAQ==",
+        "data:image/png;base64,iVBORw0KGgoAAAAN가나다",
+        "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAAAAAA6fptVAAAA",
+    ],
+)
+def test_load_image_rejects_malformed_input(data_url):
+    with pytest.raises(InvalidImageError) as excinfo:
+        load_image(data_url)
+    assert excinfo.value.status_code == 400
+
+
+# 선언한 MIME 타입과 실제 파일 시그니처가 다르면 본문을 디코딩하기 전에 거절
+def test_load_image_checks_signature_against_mime():
+    data_url = _data_url(Image.new("L", (10, 10)), "JPEG", mime="png")
+    with pytest.raises(InvalidImageError, match="선언한 형식"):
+        load_image(data_url)
+
+
+def test_load_image_enforces_limits():
+    data_url = _data_url(Image.new("L", (300, 300), 255))
+    with pytest.raises(ImageTooLargeError):
+        load_image(data_url, ImageLimits(max_bytes=10))
+    with pytest.raises(ImageTooLargeError) as excinfo:
+        load_image(data_url, ImageLimits(max_pixels=200 * 200))
+    assert excinfo.value.status_code == 413
+
+
+# 상한은 import 시점이 아니라 호출 시점(.env 로딩 이후)의 환경 변수를 따른다
+def test_limits_are_read_when_created(monkeypatch):
+    monkeypatch.setenv("IMAGE_MAX_BYTES", "1234")
+    monkeypatch.setenv("IMAGE_MAX_PIXELS", "5678")
+    monkeypatch.setenv("IMAGE_TARGET_SIZE", "140")
+    monkeypatch.setenv("PREDICT_MAX_BODY_BYTES", "999")
+    assert create_image_limits() == ImageLimits(1234, 5678, 140)
+    assert predict_max_body_bytes() == 999
+
+
+def _echo_app(max_bytes: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/predict")
+    @app.post("/other")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    app.add_middleware(
+        BodySizeLimitMiddleware, max_bytes=max_bytes, paths=("/predict",)
+    )
+    return app
+
+
+def test_body_limit_rejects_declared_length():
+    client = TestClient(_echo_app(10))
+    assert client.post("/predict", content=b"x" * 10).json() == {"size": 10}
+    assert client.post("/predict", content=b"x" * 11).status_code == 413
+    # 다른 경로에는 적용하지 않는다
+    assert client.post("/other", content=b"x" * 11).json() == {"size": 11}
+
+
+# Content-Length 없이 스트리밍되는 바디도 상한을 넘는 순간 거절
+def test_body_limit_rejects_streamed_body():
+    def chunks():
+        for _ in range(4):
+            yield b"x" * 5
+
+    response = TestClient(_echo_app(10)).post("/predict", content=chunks())
+    assert response.status_code == 413
+
+
+def test_predict_rejects_large_body_with_cors_headers(client):
+    response = client.post(
+        "/predict",
+        content=b"x" * (predict_max_body_bytes() + 1),
+        headers={"Origin": "http://front.example", "content-type": "application/json"},
+    )
+    assert response.status_code == 413
+    assert response.headers["access-control-allow-origin"] == "*"
+
+
+def test_predict_uses_image_limits_from_lifespan(app, monkeypatch, canvas):
+    monkeypatch.setenv("IMAGE_MAX_BYTES", "100")
+    with TestClient(app) as client:
+        captcha_id = client.get("/captcha").json()["id"]
+        response = client.post("/predict", json={"id": captcha_id, "image": canvas})
+        assert response.status_code == 413
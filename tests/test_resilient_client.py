@@ -0,0 +1,182 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from utils.ml_backends import Backend, BackendPool
+from utils.resilient_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+    ResilientClient,
+    UpstreamTimeoutError,
+)
+
+
+def test_breaker_opens_after_failures_and_recovers():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    # half-open: 시험 요청 하나만 통과
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_reopens_when_probe_fails():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+# 취소된 시험 요청은 결과를 판정하지 않고 다음 요청이 다시 시험한다
+def test_breaker_release_allows_next_probe():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_tracker_learns_deadline_from_samples():
+    tracker = LatencyTracker(min_samples=20, multiplier=3.0, min_deadline=0.01)
+    assert tracker.deadline() == tracker.max_deadline
+    for _ in range(20):
+        tracker.observe(0.02)
+    assert tracker.deadline() == pytest.approx(0.06)
+
+
+# 제한 시간 초과 후에는 제한 시간을 늘려 느려진 업스트림을 따라가고,
+# 늘어난 지연이 학습되면 늘려 둔 값은 해제된다
+def test_tracker_backs_off_after_timeout_and_recovers():
+    tracker = LatencyTracker(min_samples=20, multiplier=3.0, min_deadline=0.05)
+    for _ in range(100):
+        tracker.observe(0.01)
+    assert tracker.deadline() == pytest.approx(0.05)
+
+    tracker.observe_timeout(0.05)
+    assert tracker.deadline() == pytest.approx(0.1)
+    tracker.observe_timeout(0.1)
+    assert tracker.deadline() == pytest.approx(0.2)
+
+    tracker.observe(0.08)
+    assert tracker.backoff is None
+    assert tracker.deadline() == pytest.approx(0.24)
+
+
+def test_tracker_backoff_is_capped():
+    tracker = LatencyTracker(max_deadline=1.0)
+    tracker.observe_timeout(0.8)
+    assert tracker.deadline() == 1.0
+
+
+def _client(http: httpx.AsyncClient, breaker: CircuitBreaker) -> ResilientClient:
+    backends = BackendPool([Backend("http://stub-ml", breaker)], health_interval=0)
+    return ResilientClient(
+        http,
+        backends,
+        tracker_options={"min_samples": 10, "min_deadline": 0.05},
+    )
+
+
+async def _call(client: ResilientClient):
+    return await client.get("/models/", endpoint="models", route_key="HybridCNN/1")
+
+
+# 업스트림이 갑자기 느려져도 시간 초과 몇 번 뒤에는 다시 응답을 받는다
+def test_client_deadline_recovers_after_slowdown(stub_ml):
+    async def scenario():
+        transport = httpx.ASGITransport(app=stub_ml.app)
+        async with httpx.AsyncClient(transport=transport) as http:
+            client = _client(http, CircuitBreaker("stub", 5, 0.05))
+            for _ in range(20):
+                assert (await _call(client)).status_code == 200
+
+            stub_ml.FAULTS["latency_ms"] = 150
+            results = []
+            for _ in range(8):
+                try:
+                    results.append((await _call(client)).status_code)
+                except UpstreamTimeoutError:
+                    results.append("timeout")
+            return results, client.tracker("models:HybridCNN/1")
+
+    results, tracker = asyncio.run(scenario())
+    assert results[0] == "timeout"
+    assert results[-3:] == [200, 200, 200]
+    assert tracker.deadline() > 0.15
+
+
+def test_client_breaker_opens_and_recovers(stub_ml):
+    async def scenario():
+        transport = httpx.ASGITransport(app=stub_ml.app)
+        async with httpx.AsyncClient(transport=transport) as http:
+            breaker = CircuitBreaker("stub", failure_threshold=3, reset_timeout=0.1)
+            client = _client(http, breaker)
+
+            stub_ml.FAULTS["error_rate"] = 1.0
+            for _ in range(3):
+                assert (await _call(client)).status_code == 503
+            with pytest.raises(CircuitOpenError):
+                await _call(client)
+
+            stub_ml.FAULTS["error_rate"] = 0.0
+            await asyncio.sleep(0.12)
+            assert (await _call(client)).status_code == 200
+            return breaker.state
+
+    assert asyncio.run(scenario()) == CircuitBreaker.CLOSED
+
+
+# 라우팅 키는 요청 경로에서 오므로 지연 통계와 메트릭 레이블이 무한히 늘어나지 않아야 한다
+def test_trackers_and_deadline_labels_are_bounded(stub_ml):
+    async def scenario():
+        transport = httpx.ASGITransport(app=stub_ml.app)
+        async with httpx.AsyncClient(transport=transport) as http:
+            backends = BackendPool(
+                [Backend("http://stub-ml", CircuitBreaker("stub"))], health_interval=0
+            )
+            client = ResilientClient(http, backends, max_trackers=8)
+            for i in range(50):
+                await client.post(
+                    f"/models/predict/m{i}/v{i}/",
+                    endpoint="bounded_predict",
+                    route_key=f"m{i}/v{i}",
+                    json={"inputs": [[1.0, 2.0]]},
+                )
+            # 다시 쓴 키는 가장 최근 것으로 옮겨져 다음 축출 대상에서 빠진다
+            await client.get(
+                "/models/", endpoint="bounded_predict", route_key="m42/v42"
+            )
+            await client.get("/models/", endpoint="bounded_predict", route_key="new")
+            return client
+
+    client = asyncio.run(scenario())
+    assert len(client._trackers) == 8
+    assert "bounded_predict:m42/v42" in client._trackers
+    assert "bounded_predict:m43/v43" not in client._trackers
+    assert "bounded_predict:new" in client._trackers
+
+    labels = {
+        sample.labels["endpoint"]
+        for metric in REGISTRY.collect()
+        if metric.name == "remote_ml_deadline_seconds"
+        for sample in metric.samples
+    }
+    assert "bounded_predict" in labels
+    assert not any(label.startswith("bounded_predict:") for label in labels)
@@ -0,0 +1,116 @@
+import types
+
+import pytest
+from conftest import PREDICTED_DIGIT
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from utils import signed_challenge
+from utils.signed_challenge import BloomFilter, ReplayFilter
+
+
+def _rejected(reason: str) -> float:
+    value = REGISTRY.get_sample_value(
+        "captcha_token_rejected_total", {"reason": reason}
+    )
+    return value or 0.0
+
+
+@pytest.fixture
+def signed_app(app, monkeypatch):
+    monkeypatch.setenv("CAPTCHA_STORE_BACKEND", "signed")
+    monkeypatch.setenv("CAPTCHA_TOKEN_SECRET", "current,previous")
+    return app
+
+
+@pytest.fixture
+def signed_client(signed_app):
+    with TestClient(signed_app) as client:
+        yield client
+
+
+def _issue_passing(client) -> str:
+    store = client.app.state.challenge_store
+    return client.portal.call(store.issue, str(PREDICTED_DIGIT))
+
+
+def test_token_passes_once(signed_client, canvas):
+    captcha_id = _issue_passing(signed_client)
+    before = _rejected("replayed")
+
+    first = signed_client.post("/predict", json={"id": captcha_id, "image": canvas})
+    assert first.status_code == 200
+    assert first.json()["passed"] is True
+
+    replay = signed_client.post("/predict", json={"id": captcha_id, "image": canvas})
+    assert replay.status_code == 400
+    assert _rejected("replayed") == before + 1
+
+
+def test_tampered_token_is_rejected(signed_client, canvas):
+    captcha_id = signed_client.get("/captcha").json()["id"]
+    flipped = captcha_id[:-1] + ("A" if captcha_id[-1] != "A" else "B")
+    before = (_rejected("signature"), _rejected("malformed"))
+
+    for bad_id in (flipped, captcha_id[:8]):
+        response = signed_client.post("/predict", json={"id": bad_id, "image": canvas})
+        assert response.status_code == 400
+    assert (_rejected("signature"), _rejected("malformed")) == (
+        before[0] + 1,
+        before[1] + 1,
+    )
+
+
+def test_expired_token_is_rejected(signed_client, canvas, monkeypatch):
+    captcha_id = _issue_passing(signed_client)
+    now = signed_challenge.time.time()
+    monkeypatch.setattr(
+        signed_challenge, "time", types.SimpleNamespace(time=lambda: now + 301)
+    )
+    before = _rejected("expired")
+
+    response = signed_client.post("/predict", json={"id": captcha_id, "image": canvas})
+
+    assert response.status_code == 400
+    assert _rejected("expired") == before + 1
+
+
+# 같은 키를 쓰는 다른 워커/레플리카는 저장소를 공유하지 않아도 토큰을 검증한다
+def test_token_is_verified_by_another_instance(signed_app, canvas, monkeypatch):
+    with TestClient(signed_app) as issuer:
+        captcha_id = _issue_passing(issuer)
+
+    # 키 교체: 새 키를 앞에 두고 이전 키는 검증용으로 남긴다
+    monkeypatch.setenv("CAPTCHA_TOKEN_SECRET", "next,current")
+    with TestClient(signed_app) as verifier:
+        response = verifier.post("/predict", json={"id": captcha_id, "image": canvas})
+    assert response.status_code == 200
+    assert response.json()["passed"] is True
+
+    monkeypatch.setenv("CAPTCHA_TOKEN_SECRET", "other")
+    with TestClient(signed_app) as stranger:
+        response = stranger.post("/predict", json={"id": captcha_id, "image": canvas})
+    assert response.status_code == 400
+
+
+def test_bloom_filter_remembers_keys():
+    bloom = BloomFilter(capacity=1000, fp_rate=0.001)
+    keys = [f"nonce-{i}".encode() for i in range(1000)]
+    # 채우는 동안 오탐(처음 보는 키를 이미 있다고 판단)은 드물게만 생긴다
+    added = sum(bloom.add(key) for key in keys)
+    assert added >= 990
+    assert bloom.count == added
+    # 한 번 넣은 키는 절대 새 키로 받아들이지 않는다
+    assert not any(bloom.add(key) for key in keys)
+
+
+def test_replay_filter_drops_expired_buckets():
+    replay = ReplayFilter(bucket_seconds=10, capacity=100)
+    assert replay.add(b"a", expires_at=15, now=0)
+    assert replay.add(b"b", expires_at=25, now=0)
+    assert not replay.add(b"a", expires_at=15, now=1)
+    assert len(replay) == 2
+
+    # 만료 시각이 10~20 구간인 토큰은 모두 만료됐으므로 필터를 버린다
+    assert replay.add(b"c", expires_at=35, now=21)
+    assert len(replay) == 2
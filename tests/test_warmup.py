@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from utils import warmup
+from utils.import_profile import ImportProfiler, ImportRecord
+
+
+def test_profiler_stops_once():
+    profiler = ImportProfiler()
+    profiler.install()
+    assert profiler.stop() is True
+    assert profiler.stop() is False
+    assert profiler.seconds >= 0
+
+
+def test_report_imports_reads_threshold_at_report_time(monkeypatch, caplog):
+    profiler = ImportProfiler()
+    profiler.records = [
+        ImportRecord("slow_module_for_test", 0, 0.050, 1024),
+        ImportRecord("fast_module_for_test", 0, 0.002, 0),
+        None,
+    ]
+    monkeypatch.setenv("IMPORT_REPORT_MIN_MS", "10")
+
+    with caplog.at_level(logging.INFO):
+        warmup.report_imports(profiler)
+
+    assert "slow_module_for_test" in caplog.text
+    assert "fast_module_for_test" not in caplog.text
+    assert REGISTRY.get_sample_value(
+        "startup_import_seconds", {"module": "slow_module_for_test"}
+    ) == pytest.approx(0.050)
+    assert (
+        REGISTRY.get_sample_value(
+            "startup_import_seconds", {"module": "fast_module_for_test"}
+        )
+        is None
+    )
+
+    # 두 번째 호출은 아무것도 하지 않는다 (워커당 한 번 보고)
+    caplog.clear()
+    warmup.report_imports(profiler)
+    assert caplog.text == ""
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        warmup.Readiness(mode="lazy")
+
+
+def test_off_mode_is_ready_immediately(client):
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json() == {"ready": True, "mode": "off", "steps": {}}
+
+
+def test_eager_mode_warms_up_before_serving(app, monkeypatch):
+    monkeypatch.setenv("WARMUP_MODE", "eager")
+    with TestClient(app) as client:
+        status = client.get("/ready").json()
+    assert status["ready"] is True
+    assert set(status["steps"]) == {"preprocess", "http_pool", "inference"}
+    assert not any(step.startswith("error") for step in status["steps"].values())
+
+
+def test_background_mode_reports_not_ready_until_done(app, monkeypatch):
+    monkeypatch.setenv("WARMUP_MODE", "background")
+    gate = threading.Event()
+    warm_up = warmup.Readiness.warm_up
+
+    async def gated_warm_up(self, state):
+        await asyncio.to_thread(gate.wait)
+        await warm_up(self, state)
+
+    monkeypatch.setattr(warmup.Readiness, "warm_up", gated_warm_up)
+
+    with TestClient(app) as client:
+        try:
+            # 워밍업 중에도 요청은 받는다
+            assert client.get("/ready").status_code == 503
+            assert client.get("/captcha").status_code == 200
+        finally:
+            gate.set()
+
+        deadline = time.monotonic() + 5
+        while client.get("/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)